@@ -1,17 +1,28 @@
 import streamlit as st
 import os
-import re
-import json
-import pandas as pd
-import PyPDF2
-import google.generativeai as genai
-from groq import Groq
+import uuid
 from dotenv import load_dotenv
-from fpdf import FPDF
-from PIL import Image
 import warnings
 from streamlit.errors import StreamlitSecretNotFoundError
 from pathlib import Path
+from pdf_extract import get_pdf_extractor
+from image_prep import as_gemini_parts, get_image_preprocessor
+import telemetry
+from client_registry import get_client_registry
+from jobs import FAILED, get_job_executor, job_key, report_progress
+from chat_context import ChatContext
+from prompt_compaction import compact
+from llm import configure_gemini, configure_groq, query_llm, LLMStream
+from rate_limiter import get_rate_limiter, set_session
+from session_store import SESSION_ID_RE, get_session_store
+from pipeline import (
+    parse_resume_to_json, create_pdf, generate_resume, stream_resume,
+    generate_resume_sections, rank_job_descriptions, recommend_courses, run_skill_gap,
+)
+
+# Heavy dependencies are imported by the tool that needs them, not here:
+# pandas and the catalog indexes by the Skill Gap Analyzer, PIL by the chatbot,
+# PyPDF2/fpdf on the first PDF, and the provider SDKs on the first LLM call.
 
 # --- 1. CONFIGURATION & SETUP ---
 # Suppress deprecation warnings
@@ -74,41 +85,22 @@ if not GOOGLE_API_KEY:
 
 # Configure Clients
 try:
-    genai.configure(api_key=GOOGLE_API_KEY)
+    configure_gemini(GOOGLE_API_KEY)
 except Exception as e:
     st.error(f"Error configuring Google API: {e}")
 
-groq_client = None
 if GROQ_API_KEY:
     try:
-        groq_client = Groq(api_key=GROQ_API_KEY)
+        configure_groq(GROQ_API_KEY)
     except Exception as e:
         st.warning(f"Groq API Key found but client failed to initialize: {e}")
 
+# Prometheus /metrics endpoint, only when METRICS_PORT is set (started once per process)
+telemetry.start_metrics_server()
+
 # --- 2. DEFAULT COURSE DATABASE ---
-DEFAULT_COURSES = [
-    {"Skill": "Data preprocessing", "Course Name": "Data Science Foundations", "URL": "https://skillsbuild.org/data-science", "Platform": "IBM SkillsBuild"},
-    {"Skill": "Data pipelines", "Course Name": "ETL and Data Pipelines with Shell Airflow and Kafka", "URL": "https://www.coursera.org/learn/etl-and-data-pipelines-shell-airflow-kafka", "Platform": "Coursera"},
-    {"Skill": "Insights", "Course Name": "Data Visualization with Python", "URL": "https://www.coursera.org/learn/python-for-data-visualization", "Platform": "Coursera"},
-    {"Skill": "Machine Learning", "Course Name": "Machine Learning with Python", "URL": "https://www.coursera.org/learn/machine-learning-with-python", "Platform": "Coursera"},
-    {"Skill": "Cloud", "Course Name": "Introduction to Cloud Computing", "URL": "https://www.coursera.org/learn/introduction-to-cloud", "Platform": "Coursera"},
-    {"Skill": "Python", "Course Name": "Python for Everybody", "URL": "https://www.coursera.org/specializations/python", "Platform": "Coursera"},
-    {"Skill": "SQL", "Course Name": "SQL for Data Science", "URL": "https://www.coursera.org/learn/sql-for-data-science", "Platform": "Coursera"},
-    {"Skill": "Generative AI", "Course Name": "Introduction to Generative AI", "URL": "https://www.cloudskillsboost.google/course_templates/536", "Platform": "Google Cloud"},
-    {"Skill": "AWS", "Course Name": "AWS Fundamentals", "URL": "https://www.coursera.org/specializations/aws-fundamentals", "Platform": "Coursera"},
-    {"Skill": "Azure", "Course Name": "Microsoft Azure Fundamentals AZ-900", "URL": "https://learn.microsoft.com/en-us/credentials/certifications/azure-fundamentals/", "Platform": "Microsoft"},
-    {"Skill": "Docker", "Course Name": "Docker for Developers", "URL": "https://www.udemy.com/topic/docker/", "Platform": "Udemy"},
-    {"Skill": "Kubernetes", "Course Name": "Architecting with Google Kubernetes Engine", "URL": "https://www.coursera.org/specializations/architecting-with-google-kubernetes-engine", "Platform": "Google Cloud"},
-    {"Skill": "HTML", "Course Name": "Introduction to HTML5", "URL": "https://www.coursera.org/learn/html", "Platform": "Coursera"},
-    {"Skill": "CSS", "Course Name": "CSS3", "URL": "https://www.coursera.org/learn/intro-css", "Platform": "Coursera"},
-    {"Skill": "JavaScript", "Course Name": "JavaScript Algorithms and Data Structures", "URL": "https://www.freecodecamp.org/learn/javascript-algorithms-and-data-structures/", "Platform": "freeCodeCamp"},
-    {"Skill": "React", "Course Name": "Meta Front-End Developer Professional Certificate", "URL": "https://www.coursera.org/professional-certificates/meta-front-end-developer", "Platform": "Coursera"},
-    {"Skill": "Node.js", "Course Name": "Developing Cloud Applications with Node.js and React", "URL": "https://www.coursera.org/learn/cloud-applications-nodejs-react", "Platform": "Coursera"},
-    {"Skill": "Communication", "Course Name": "Effective Communication: Writing, Design, and Presentation", "URL": "https://www.coursera.org/specializations/effective-communication", "Platform": "Coursera"},
-    {"Skill": "Leadership", "Course Name": "Strategic Leadership and Management", "URL": "https://www.coursera.org/specializations/strategic-leadership", "Platform": "Coursera"},
-    {"Skill": "Project Management", "Course Name": "Google Project Management Professional Certificate", "URL": "https://www.coursera.org/professional-certificates/google-project-management", "Platform": "Coursera"},
-    {"Skill": "Cybersecurity", "Course Name": "Google Cybersecurity Professional Certificate", "URL": "https://www.coursera.org/professional-certificates/google-cybersecurity", "Platform": "Coursera"}
-]
+# Lives in course_catalog (course_catalog.DEFAULT_COURSES) so the headless tools
+# share the same fallback; it is only loaded by the Skill Gap Analyzer.
 
 # --- 3. CUSTOM UI STYLING (BLACK THEME) ---
 def apply_custom_css():
@@ -200,157 +192,140 @@ def apply_custom_css():
     </style>
     """, unsafe_allow_html=True)
 
+# The theme styles the sidebar and the widgets every tool uses, so it is injected
+# before the tool is chosen; it is one markdown element and imports nothing.
 apply_custom_css()
 
 # --- 4. LLM HELPER FUNCTIONS ---
+# Provider access lives in llm.py and the analysis/generation steps in pipeline.py
 
-def generate_with_fallback(model_name, prompt, image_data=None):
-    """
-    Tries to generate content with the primary model.
-    If it fails (e.g., 404 Not Found), falls back to gemini-1.5-flash.
-    """
-    try:
-        real_model_name = model_name.replace("models/", "")
-        model = genai.GenerativeModel(real_model_name)
-        if image_data:
-            return model.generate_content([prompt, image_data])
-        return model.generate_content(prompt)
-    except Exception as e:
-        if "404" in str(e) or "not found" in str(e).lower():
-            # Fallback to stable gemini-1.5-flash if 2.5 fails
-            try:
-                fallback_model = genai.GenerativeModel("gemini-1.5-flash")
-                if image_data:
-                    return fallback_model.generate_content([prompt, image_data])
-                return fallback_model.generate_content(prompt)
-            except Exception as fallback_error:
-                raise fallback_error
-        else:
-            raise e
-
-def query_llm(prompt, model_name, image_data=None):
-    """Unified function to query either Gemini or Groq."""
-    try:
-        # GROQ LOGIC
-        if model_name.startswith("groq/"):
-            if not groq_client:
-                return "Error: GROQ_API_KEY not found in secrets."
-            
-            real_model_name = model_name.replace("groq/", "")
-            
-            completion = groq_client.chat.completions.create(
-                messages=[{"role": "user", "content": prompt}],
-                model=real_model_name,
-            )
-            return completion.choices[0].message.content
-
-        # GEMINI LOGIC (Default)
-        else:
-            response = generate_with_fallback(model_name, prompt, image_data)
-            return response.text
-
-    except Exception as e:
-        return f"Error generating content: {str(e)}"
 
 def extract_text_from_pdf(uploaded_file):
     try:
-        reader = PyPDF2.PdfReader(uploaded_file)
-        text = "\n".join([page.extract_text() for page in reader.pages if page.extract_text()])
-        return text
+        result = get_pdf_extractor().extract(uploaded_file)
+        if result.truncated:
+            st.warning(f"Only the first {result.pages_read + len(result.skipped_pages)} of {result.pages} pages were read.")
+        if result.skipped_pages:
+            st.warning(f"Skipped {len(result.skipped_pages)} page(s) that took too long to read.")
+        return result.text
     except Exception as e:
         st.error(f"Error reading PDF: {e}")
         return None
 
-def parse_resume_to_json(text, model_name):
-    prompt = f"""
-    Extract keys: name, email, phone, links, summary, experience, education, skills, certifications.
-    Return ONLY valid JSON.
-    RESUME TEXT: {text}
-    """
-    json_str = query_llm(prompt, model_name)
+def prepare_image_attachment(uploaded_file):
     try:
-        json_str = json_str.strip()
-        if json_str.startswith("```json"):
-            json_str = json_str[7:]
-        if json_str.endswith("```"):
-            json_str = json_str[:-3]
-        return json.loads(json_str)
-    except:
+        return get_image_preprocessor().prepare(uploaded_file)
+    except Exception as e:
+        st.error(f"Error reading image: {e}")
         return None
 
-def create_pdf(markdown_text, theme_color="#000000"):
-    if theme_color.startswith('#'): theme_color = theme_color.lstrip('#')
-    try: r, g, b = int(theme_color[0:2], 16), int(theme_color[2:4], 16), int(theme_color[4:6], 16)
-    except: r, g, b = 0, 0, 0
-
-    pdf = FPDF()
-    pdf.add_page()
-    pdf.set_auto_page_break(auto=True, margin=15)
-    pdf.set_font("Arial", size=11)
-
-    for line in markdown_text.split('\n'):
-        pdf.set_text_color(0, 0, 0)
-        pdf.set_font("Arial", size=11)
-
-        if line.startswith('# '):
-            pdf.set_text_color(r, g, b)
-            pdf.set_font("Arial", 'B', 16)
-            pdf.cell(0, 10, line.replace('# ', ''), ln=True)
-        elif line.startswith('## '):
-            pdf.set_text_color(r, g, b)
-            pdf.set_font("Arial", 'B', 14)
-            pdf.cell(0, 10, line.replace('## ', ''), ln=True)
-        elif line.startswith('### '):
-            pdf.set_text_color(r, g, b)
-            pdf.set_font("Arial", 'B', 12)
-            pdf.cell(0, 10, line.replace('### ', ''), ln=True)
-        else:
-            clean_line = line.replace('**', '').replace('* ', '• ')
-            try: clean_line = clean_line.encode('latin-1', 'replace').decode('latin-1')
-            except: clean_line = clean_line.encode('ascii', 'ignore').decode('ascii')
-            pdf.multi_cell(0, 6, clean_line)
-            
-    return pdf.output(dest='S').encode('latin-1')
-
-def analyze_skill_gap(resume_text, job_desc, model_name):
-    prompt = f"""
-    Compare RESUME and JD.
-    JD: {job_desc}
-    RESUME: {resume_text}
-    Output: 1. Matching Skills, 2. Missing Skills, 3. Verdict.
+def _kb(n):
+    return f"{n / 1024:,.0f} KB"
+
+# --- COURSE CATALOG (shared across sessions) ---
+# Cached loaders are keyed by file signature / upload digest, so editing the CSV
+# or uploading a different file produces a fresh entry. The substring index and
+# the TF-IDF retriever used by recommend_courses are built once alongside the
+# DataFrame; for the catalog file the TF-IDF matrix is also persisted next to it.
+
+def _build_catalog_indexes(df, persist_path=None):
+    from course_index import get_course_index
+    from course_retrieval import get_course_retriever
+    get_course_index(df)
+    get_course_retriever(df, persist_path)
+    return df
+
+@st.cache_resource(max_entries=8, show_spinner=False)
+def _load_catalog_file(path, mtime_ns, size):
+    import course_catalog
+    from course_retrieval import persist_path_for
+    return _build_catalog_indexes(course_catalog.read_catalog_file(path), persist_path_for(path))
+
+@st.cache_resource(max_entries=8, show_spinner=False)
+def _load_catalog_upload(digest, _data):
+    import course_catalog
+    return _build_catalog_indexes(course_catalog.read_catalog_bytes(_data))
+
+@st.cache_resource(show_spinner=False)
+def _load_default_catalog():
+    import course_catalog
+    return _build_catalog_indexes(course_catalog.catalog_from_records(course_catalog.DEFAULT_COURSES))
+
+def load_course_catalog(uploaded_csv, csv_path):
+    """Uploaded CSV > catalog file on disk > DEFAULT_COURSES."""
+    import course_catalog
+    try:
+        if uploaded_csv:
+            data = uploaded_csv.getvalue()
+            return _load_catalog_upload(course_catalog.content_digest(data), data)
+        if os.path.exists(csv_path):
+            return _load_catalog_file(*course_catalog.file_signature(csv_path))
+    except Exception as e:
+        st.warning(f"Could not load course catalog ({e}). Using built-in courses.")
+    return _load_default_catalog()
+
+# --- BACKGROUND JOBS ---
+# LLM steps run on the shared job executor; session state only holds the job id,
+# so reruns triggered by other widgets do not throw the work away.
+JOB_POLL_SECONDS = 0.5
+
+def _skill_gap_job(resume_text, job_desc, model_name, mode, courses_df):
+    analysis, missing = run_skill_gap(resume_text, job_desc, model_name, mode, courses_df)
+    recs = recommend_courses(missing, courses_df) if missing and courses_df is not None else {}
+    return analysis, missing, recs
+
+def _rank_job(resume_text, job_descs, model_name, mode, courses_df, top_k):
+    return rank_job_descriptions(resume_text, job_descs, model_name, mode, courses_df, top_k)
+
+def _resume_job(user_data, job_desc, model_name):
+    resume_stream = stream_resume(user_data, job_desc, model_name)
+    partial = ""
+    for chunk in resume_stream:
+        partial += chunk
+        report_progress(partial)
+    return resume_stream.text
+
+def _resume_sections_job(user_data, job_desc, model_name):
+    return generate_resume_sections(user_data, job_desc, model_name, on_progress=report_progress)
+
+def _resume_import_job(text, model_name):
+    # Fields show up in the progress box as soon as the model has written them
+    def on_partial(fields):
+        report_progress("\n".join(f"**{k}**: {str(v)[:120]}" for k, v in fields.items() if v))
+    return parse_resume_to_json(text, model_name, on_partial=on_partial)
+
+@st.fragment(run_every=JOB_POLL_SECONDS)
+def _job_progress(job_id, message, show_partial):
+    job = get_job_executor().get(job_id)
+    if job is None or job.done:
+        st.rerun()
+    position = get_rate_limiter().queue_position(st.session_state.get("session_id"))
+    queued = f" · waiting for model quota, #{position} in queue" if position else ""
+    st.info(f"⏳ {message} ({job.elapsed:.0f}s){queued}")
+    if show_partial and job.progress:
+        with st.container(border=True):
+            st.markdown(job.progress)
+
+def poll_job(state_key, message, show_partial=False):
     """
-    return query_llm(prompt, model_name)
-
-def generate_resume(user_data, job_desc, model_name):
-    prompt = f"""
-    Create a resume (Markdown).
-    Details: {json.dumps(user_data)}
-    Target JD: {job_desc}
+    The finished job whose id is in st.session_state[state_key], or None.
+    While it runs, shows `message` (and its partial output) and polls until it is done.
     """
-    return query_llm(prompt, model_name)
-
-def extract_missing_skills(analysis_text):
-    missing = []
-    lines = analysis_text.split('\n')
-    capture = False
-    for line in lines:
-        s = line.strip()
-        if "missing" in s.lower() and "skill" in s.lower(): capture = True; continue
-        if capture and "verdict" in s.lower(): capture = False; break
-        if capture:
-            clean = re.sub(r"^[\-\*\•\d\.]+\s*", "", s).replace("**", "").split(":")[0].strip()
-            if clean and len(clean) < 80: missing.append(clean)
-    return list(dict.fromkeys(missing))
-
-def recommend_courses(missing_skills, courses_df):
-    recs = {}
-    if courses_df is None or courses_df.empty: return recs
-    for skill in missing_skills:
-        skill_lower = skill.lower()
-        matches = courses_df[courses_df['Skill'].str.lower().apply(lambda x: skill_lower in str(x) or str(x) in skill_lower)]
-        if not matches.empty:
-            recs[skill] = matches.drop_duplicates('Course Name')[['Course Name', 'URL']].head(2).to_dict('records')
-    return recs
+    job_id = st.session_state.get(state_key)
+    if not job_id:
+        return None
+    job = get_job_executor().get(job_id)
+    if job is None:
+        del st.session_state[state_key]
+        st.warning("That result has expired. Please run it again.")
+        return None
+    if not job.done:
+        _job_progress(job_id, message, show_partial)
+        return None
+    if job.status == FAILED:
+        st.error(f"Error: {job.error}")
+        return None
+    return job
 
 # --- 5. STREAMLIT UI LAYOUT ---
 
@@ -358,19 +333,66 @@ def recommend_courses(missing_skills, courses_df):
 if "model_name" not in st.session_state:
     st.session_state["model_name"] = "gemini-2.5-flash"
 
+# Provider calls from this session (and the jobs it submits) queue fairly against other sessions.
+# With SESSION_URL_RESTORE the id also lives in the URL (?sid=...), so a reloaded tab gets its chat back.
+if "session_id" not in st.session_state:
+    session_id = uuid.uuid4().hex
+    if get_session_store().url_restore:
+        if SESSION_ID_RE.fullmatch(st.query_params.get("sid", "")):
+            session_id = st.query_params["sid"]
+        else:
+            st.query_params["sid"] = session_id
+    st.session_state["session_id"] = session_id
+set_session(st.session_state["session_id"])
+
 if "resume_data" not in st.session_state:
     st.session_state["resume_data"] = {
         "name": "", "email": "", "phone": "", "links": "",
         "summary": "", "experience": "", "education": "", "skills": "", "certifications": ""
     }
 
+def render_diagnostics(limit=20):
+    """Last `limit` traced requests, newest first, with their per-stage spans."""
+    traces = telemetry.recent_traces(limit)
+    with st.expander(f"🩺 Diagnostics (last {len(traces)} requests)", expanded=True):
+        st.caption("Provider clients, rate limits, background jobs and session memory (shared by all sessions)")
+        st.json({
+            "clients": get_client_registry().stats(),
+            "rate_limits": get_rate_limiter().stats(),
+            "sessions": get_session_store().stats(),
+            "images": get_image_preprocessor().stats(),
+            "jobs": get_job_executor().stats(),
+        }, expanded=False)
+        if not traces:
+            st.caption("No requests traced yet.")
+            return
+        rows = []
+        for t in traces:
+            llm_spans = [sp for sp in t["spans"] if sp["name"] == "llm"]
+            rows.append({
+                "time": t["start"],
+                "request": t["name"],
+                "duration (s)": round(t["duration_s"], 3),
+                "stages": ", ".join(sp["name"] for sp in t["spans"]),
+                "llm calls": len(llm_spans),
+                "providers": ", ".join(dict.fromkeys(sp.get("provider", "?") for sp in llm_spans)),
+                "cache hits": sum(bool(sp.get("cache_hit")) for sp in llm_spans),
+                "fallbacks": sum(bool(sp.get("fallback_taken")) for sp in llm_spans),
+                "prompt tokens": sum(sp.get("prompt_tokens_est", 0) for sp in llm_spans),
+                "response tokens": sum(sp.get("response_tokens_est", 0) for sp in llm_spans),
+                "error": t.get("error", ""),
+            })
+        st.dataframe(rows, use_container_width=True, hide_index=True)
+        st.caption("Latest request")
+        st.json(traces[0], expanded=False)
+
 # --- SIDEBAR ---
 with st.sidebar:
     st.markdown("## 🚀 Career Assistant")
     st.caption("AI-Powered Career Optimization")
     st.markdown("---")
     
-    app_mode = st.radio("Select Tool:", ["Skill Gap Analyzer", "Resume Builder", "Career Chatbot"])
+    app_mode = st.radio("Select Tool:", ["Skill Gap Analyzer", "Resume Builder", "Career Chatbot"], key="app_mode")
     
     # Removed Settings/Model Selection - Hardcoded to Free Model
     st.session_state["model_name"] = "gemini-2.5-flash"
@@ -382,21 +404,18 @@ with st.sidebar:
         st.caption("Database")
         uploaded_csv = st.file_uploader("Upload Course CSV", type="csv")
         csv_path = "data/skillsbuild_courses.csv"
-        
-        if uploaded_csv: 
-            courses_df = pd.read_csv(uploaded_csv)
-        elif os.path.exists(csv_path):
-            try:
-                courses_df = pd.read_csv(csv_path)
-                rename_map = {}
-                for c in courses_df.columns:
-                    if "skill" in c.lower(): rename_map[c] = "Skill"
-                    if "course" in c.lower(): rename_map[c] = "Course Name"
-                    if "url" in c.lower(): rename_map[c] = "URL"
-                courses_df.rename(columns=rename_map, inplace=True)
-            except: pass
-        else:
-            courses_df = pd.DataFrame(DEFAULT_COURSES)
+        courses_df = load_course_catalog(uploaded_csv, csv_path)
+
+        st.caption("Analysis Mode")
+        analysis_modes = {
+            "Full (AI reads both documents)": "full",
+            "Assisted (local match + AI verdict)": "assisted",
+            "Fast (local only, no AI call)": "fast",
+        }
+        analysis_mode = analysis_modes[st.radio("Analysis Mode", list(analysis_modes), label_visibility="collapsed")]
+
+    st.markdown("---")
+    show_diagnostics = st.toggle("🩺 Show diagnostics", value=False)
 
 # --- APP MODES ---
 
@@ -412,42 +431,93 @@ if app_mode == "Skill Gap Analyzer":
             uploaded_resume = st.file_uploader("Upload PDF", type="pdf")
         with c2: 
             st.markdown("#### 2. Target Job Description")
-            job_desc = st.text_area("Paste JD text here...", height=150)
+            rank_mode = st.toggle("Rank several job descriptions", help="Scores every JD locally and runs the full analysis only on the best matches.")
+            if rank_mode:
+                job_desc = st.text_area("Paste the JDs, separated by a line of ---", height=150)
+                rank_top_k = st.number_input("Analyze the top", min_value=1, max_value=10, value=3)
+            else:
+                job_desc = st.text_area("Paste JD text here...", height=150)
             
         analyze_btn = st.button("🔍 Run Analysis")
 
-    if analyze_btn:
+    if analyze_btn and rank_mode:
+        from jd_ranking import split_job_descriptions
+        job_descs = split_job_descriptions(job_desc)
+        if uploaded_resume and job_descs:
+            text = extract_text_from_pdf(uploaded_resume)
+            if text:
+                model_name = st.session_state["model_name"]
+                st.session_state["rank_job"] = get_job_executor().submit(
+                    _rank_job, text, job_descs, model_name, analysis_mode, courses_df, int(rank_top_k), name="jd_rank",
+                    key=job_key("jd_rank", text, job_descs, model_name, analysis_mode, id(courses_df), int(rank_top_k)),
+                ).id
+        else: st.error("Upload a resume and paste at least one job description.")
+    elif analyze_btn:
         if uploaded_resume and job_desc:
-            with st.spinner("AI is analyzing your profile..."):
-                text = extract_text_from_pdf(uploaded_resume)
-                if text:
-                    analysis = analyze_skill_gap(text, job_desc, st.session_state["model_name"])
-                    missing = extract_missing_skills(analysis)
-                    
-                    st.markdown("---")
-                    st.success("Analysis Complete!")
-                    
-                    c_res, c_rec = st.columns([1, 1])
-                    
-                    with c_res:
-                        st.subheader("📝 Analysis Report")
-                        with st.container(border=True):
-                            st.markdown(analysis)
-                    
-                    with c_rec:
-                        st.subheader("🎓 Recommended Courses")
-                        if missing:
-                            if courses_df is not None:
-                                recs = recommend_courses(missing, courses_df)
-                                if recs:
-                                    for skill, links in recs.items():
-                                        with st.expander(f"📚 {skill}", expanded=True):
-                                            for l in links: st.markdown(f"[{l['Course Name']}]({l['URL']})")
-                                else: st.info("No database matches found.")
-                            else: st.warning("Upload a CSV to get course links.")
-                        else: st.success("Profile matches well!")
+            text = extract_text_from_pdf(uploaded_resume)
+            if text:
+                model_name = st.session_state["model_name"]
+                st.session_state["skill_gap_job"] = get_job_executor().submit(
+                    _skill_gap_job, text, job_desc, model_name, analysis_mode, courses_df, name="skill_gap",
+                    key=job_key("skill_gap", text, job_desc, model_name, analysis_mode, id(courses_df)),
+                ).id
         else: st.error("Upload both files to proceed.")
 
+    job = poll_job("rank_job", "Ranking job descriptions...") if rank_mode else None
+    if job is not None:
+        ranked = job.result
+        st.markdown("---")
+        st.success(f"Ranked {len(ranked)} job descriptions.")
+        st.dataframe([{
+            "rank": rank,
+            "job": row["title"],
+            "fit score": row["score"],
+            "skill coverage": f"{row['skill_coverage']:.0%}",
+            "missing skills": ", ".join(row["missing"]) or "—",
+            "courses": ", ".join(c["Course Name"] for links in row["courses"].values() for c in links) or "—",
+            "analyzed": "✅" if "analysis" in row else "",
+        } for rank, row in enumerate(ranked, 1)], use_container_width=True, hide_index=True)
+        for rank, row in enumerate(ranked, 1):
+            if "analysis" not in row and "error" not in row:
+                continue
+            with st.expander(f"#{rank} {row['title']}", expanded=rank == 1):
+                if "error" in row:
+                    st.error(row["error"])
+                    continue
+                c_res, c_rec = st.columns([1, 1])
+                with c_res:
+                    st.markdown(row["analysis"])
+                with c_rec:
+                    for skill, links in row["courses"].items():
+                        st.markdown(f"**📚 {skill}**")
+                        for l in links: st.markdown(f"- [{l['Course Name']}]({l['URL']})")
+
+    job = poll_job("skill_gap_job", "AI is analyzing your profile...") if not rank_mode else None
+    if job is not None:
+        analysis, missing, recs = job.result
+
+        st.markdown("---")
+        st.success("Analysis Complete!")
+
+        c_res, c_rec = st.columns([1, 1])
+
+        with c_res:
+            st.subheader("📝 Analysis Report")
+            with st.container(border=True):
+                st.markdown(analysis)
+
+        with c_rec:
+            st.subheader("🎓 Recommended Courses")
+            if missing:
+                if courses_df is not None:
+                    if recs:
+                        for skill, links in recs.items():
+                            with st.expander(f"📚 {skill}", expanded=True):
+                                for l in links: st.markdown(f"[{l['Course Name']}]({l['URL']})")
+                    else: st.info("No database matches found.")
+                else: st.warning("Upload a CSV to get course links.")
+            else: st.success("Profile matches well!")
+
 # 2. RESUME BUILDER
 elif app_mode == "Resume Builder":
     st.title("📝 Resume Builder")
@@ -458,14 +528,20 @@ elif app_mode == "Resume Builder":
         uploaded_auto = st.file_uploader("Upload PDF to Auto-Fill", type="pdf", key="auto_fill")
         if uploaded_auto:
             if st.button("⚡ Extract Data"):
-                with st.spinner("Extracting..."):
-                    text = extract_text_from_pdf(uploaded_auto)
-                    if text:
-                        extracted_data = parse_resume_to_json(text, st.session_state["model_name"])
-                        if extracted_data:
-                            st.session_state["resume_data"] = extracted_data
-                            st.success("Data Imported!")
-                            st.rerun()
+                text = extract_text_from_pdf(uploaded_auto)
+                if text:
+                    model_name = st.session_state["model_name"]
+                    st.session_state["autofill_job"] = get_job_executor().submit(
+                        _resume_import_job, text, model_name, name="resume_import",
+                        key=job_key("resume_import", text, model_name),
+                    ).id
+        job = poll_job("autofill_job", "Extracting...", show_partial=True)
+        if job is not None:
+            del st.session_state["autofill_job"]
+            if job.result:
+                st.session_state["resume_data"] = job.result
+                st.rerun()
+            st.warning("Could not extract data from this resume.")
 
     # Form
     with st.form("resume_form"):
@@ -488,72 +564,90 @@ elif app_mode == "Resume Builder":
 
         st.subheader("4. Target Job (Tailoring)")
         target_jd = st.text_area("Paste Job Description (Optional)", height=100)
+        section_mode = st.checkbox("⚡ Section by section (after an edit, only changed sections are rewritten)", value=True)
         
         submitted = st.form_submit_button("✨ Generate Resume")
     
     if submitted:
         if name and experience:
-            with st.spinner("Generating Resume Documents..."):
-                user_data = {
-                    "name": name, "email": email, "phone": phone, "links": links,
-                    "summary": summary, "experience": experience,
-                    "education": education, "skills": skills,
-                    "certifications": certifications
-                }
-                resume_content = generate_resume(user_data, target_jd, st.session_state["model_name"])
-                
-                # --- PREVIEW SECTION ---
-                st.markdown("---")
-                st.subheader("👀 Live Preview")
-                
-                st.markdown(f"""
-                <style>
-                div[data-testid="stMarkdownContainer"] h1, 
-                div[data-testid="stMarkdownContainer"] h2, 
-                div[data-testid="stMarkdownContainer"] h3 {{
-                    color: {resume_theme_color} !important;
-                }}
-                </style>
+            user_data = {
+                "name": name, "email": email, "phone": phone, "links": links,
+                "summary": summary, "experience": experience,
+                "education": education, "skills": skills,
+                "certifications": certifications
+            }
+            model_name = st.session_state["model_name"]
+            resume_job = _resume_sections_job if section_mode else _resume_job
+            st.session_state["resume_job"] = get_job_executor().submit(
+                resume_job, user_data, target_jd, model_name, name="resume_builder",
+                key=job_key("resume_builder", section_mode, user_data, target_jd, model_name),
+            ).id
+            st.session_state["resume_file_stem"] = f"{name}_Resume"
+        else: st.warning("Please fill in Name and Experience to generate.")
+
+    if st.session_state.get("resume_job"):
+        # --- PREVIEW SECTION ---
+        st.markdown("---")
+        st.subheader("👀 Live Preview")
+        
+        st.markdown(f"""
+        <style>
+        div[data-testid="stMarkdownContainer"] h1, 
+        div[data-testid="stMarkdownContainer"] h2, 
+        div[data-testid="stMarkdownContainer"] h3 {{
+            color: {resume_theme_color} !important;
+        }}
+        </style>
+        """, unsafe_allow_html=True)
+        
+        # The preview fills in as the background job streams the resume
+        job = poll_job("resume_job", "Writing your resume...", show_partial=True)
+        if job is not None:
+            resume_content = job.result
+            file_stem = st.session_state["resume_file_stem"]
+            with st.container(border=True):
+                st.markdown(resume_content)
+            
+            # --- FILES AT THE BOTTOM ---
+            st.markdown("<br><br>", unsafe_allow_html=True)
+        
+            with st.container():
+                st.markdown("""
+                <div style="background-color: #161b22; padding: 20px; border-radius: 10px; color: white; text-align: center; margin-bottom: 20px; border: 1px solid #30363d;">
+                    <h2 style="color: white; margin:0;">📂 Download Your Files</h2>
+                    <p style="color: #8b949e; margin-top: 5px;">Your resume has been generated in multiple formats.</p>
+                </div>
                 """, unsafe_allow_html=True)
-                
-                with st.container(border=True):
-                    st.markdown(resume_content)
-                
-                # --- FILES AT THE BOTTOM ---
-                st.markdown("<br><br>", unsafe_allow_html=True)
-                
-                with st.container():
-                    st.markdown("""
-                    <div style="background-color: #161b22; padding: 20px; border-radius: 10px; color: white; text-align: center; margin-bottom: 20px; border: 1px solid #30363d;">
-                        <h2 style="color: white; margin:0;">📂 Download Your Files</h2>
-                        <p style="color: #8b949e; margin-top: 5px;">Your resume has been generated in multiple formats.</p>
-                    </div>
-                    """, unsafe_allow_html=True)
-                    
-                    c_dl1, c_dl2 = st.columns(2)
-                    
-                    with c_dl1:
-                        st.info("📄 **PDF Version**\n\nBest for emailing.")
-                        try:
+            
+                c_dl1, c_dl2 = st.columns(2)
+            
+                with c_dl1:
+                    st.info("📄 **PDF Version**\n\nBest for emailing.")
+                    try:
+                        with telemetry.trace("resume_pdf"), telemetry.span("pdf_render", chars=len(resume_content)):
                             pdf_bytes = create_pdf(resume_content, resume_theme_color)
-                            st.download_button("⬇️ Download PDF", data=pdf_bytes, file_name=f"{name}_Resume.pdf", mime="application/pdf", use_container_width=True)
-                        except Exception as e: st.error(f"PDF Error: {e}")
-                        
-                    with c_dl2:
-                        st.info("📝 **Markdown Version**\n\nBest for editing raw text.")
-                        st.download_button("⬇️ Download Markdown", data=resume_content, file_name=f"{name}_Resume.md", mime="text/markdown", use_container_width=True)
-
-        else: st.warning("Please fill in Name and Experience to generate.")
+                        st.download_button("⬇️ Download PDF", data=pdf_bytes, file_name=f"{file_stem}.pdf", mime="application/pdf", use_container_width=True)
+                    except Exception as e: st.error(f"PDF Error: {e}")
+                
+                with c_dl2:
+                    st.info("📝 **Markdown Version**\n\nBest for editing raw text.")
+                    st.download_button("⬇️ Download Markdown", data=resume_content, file_name=f"{file_stem}.md", mime="text/markdown", use_container_width=True)
 
 # 3. CHATBOT
 elif app_mode == "Career Chatbot":
     st.title("💬 Career Coach")
     st.markdown("### Ask me about interviews, salaries, or career paths.")
     
+    # History, attachments and summary live in the bounded session store, not in session_state
+    chat_session = get_session_store().get(st.session_state["session_id"])
+    chat_history = chat_session.messages
+
     chat_container = st.container(border=True)
     with chat_container:
-        if "messages" not in st.session_state: st.session_state.messages = []
-        for message in st.session_state.messages:
+        if chat_history.spilled and st.toggle(f"Show {chat_history.spilled} earlier messages", key="chat_show_earlier"):
+            for message in chat_history[:chat_history.spilled]:
+                with st.chat_message(message["role"]): st.markdown(message["content"])
+        for message in chat_history.recent:
             with st.chat_message(message["role"]): st.markdown(message["content"])
 
     uploaded_file = None
@@ -565,30 +659,56 @@ elif app_mode == "Career Chatbot":
     if prompt := st.chat_input("Type your question here..."):
         with chat_container:
             st.chat_message("user").markdown(prompt)
+            # Downscaled once per upload (cached by content hash), however many turns it is sent with
+            prepared_image = None
+            if uploaded_file and uploaded_file.type in ["image/png", "image/jpeg", "image/jpg"]:
+                prepared_image = prepare_image_attachment(uploaded_file)
             if uploaded_file:
-                if uploaded_file.type in ["image/png", "image/jpeg", "image/jpg"]:
-                     st.chat_message("user").image(uploaded_file, caption="Attached Image", width=300)
+                if prepared_image:
+                     pages = f", {len(prepared_image.parts)} pages" if len(prepared_image.parts) > 1 else ""
+                     st.chat_message("user").image(
+                         prepared_image.parts[0], width=300,
+                         caption=f"Attached Image ({_kb(prepared_image.original_bytes)} → {_kb(prepared_image.processed_bytes)}{pages})")
                 else:
                      st.chat_message("user").markdown(f"📎 *Attached: {uploaded_file.name}*")
             
-            st.session_state.messages.append({"role": "user", "content": prompt})
-
-            with st.spinner("Thinking..."):
-                try:
-                    context_prompt = "You are an expert AI Career Coach. Keep answers short.\n\nHistory:\n"
-                    for msg in st.session_state.messages: context_prompt += f"{msg['role'].upper()}: {msg['content']}\n"
-                    
-                    image_data = None
-                    if uploaded_file and uploaded_file.type in ["image/png", "image/jpeg", "image/jpg"]:
-                        image_data = Image.open(uploaded_file)
-                    
-                    final_prompt = prompt
-                    if uploaded_file and uploaded_file.type == "application/pdf":
-                         pdf_text = extract_text_from_pdf(uploaded_file)
-                         final_prompt = f"{prompt}\n\n[ATTACHED PDF CONTENT]:\n{pdf_text}"
-                    
-                    ai_reply = query_llm(context_prompt + f"\nUSER: {final_prompt}", st.session_state["model_name"], image_data)
-                    
-                    with st.chat_message("assistant"): st.markdown(ai_reply)
-                    st.session_state.messages.append({"role": "assistant", "content": ai_reply})
-                except Exception as e: st.error(f"Error: {e}")
\ No newline at end of file
+            try:
+                model_name = st.session_state["model_name"]
+                chat_ctx = ChatContext(chat_session.state, model_name)
+
+                with telemetry.trace("chat", model=model_name):
+                    with st.spinner("Thinking..."):
+                        image_data = as_gemini_parts(prepared_image) if prepared_image else None
+
+                        # PDFs are stored once in the chat context and referenced by id
+                        attachment_ids = []
+                        if uploaded_file and uploaded_file.type == "application/pdf":
+                            pdf_text = extract_text_from_pdf(uploaded_file)
+                            if pdf_text:
+                                # Cleaned up here; ChatContext trims it to the prompt budget
+                                pdf_text = compact(pdf_text).text
+                                attachment_ids.append(chat_ctx.add_attachment(uploaded_file.name, pdf_text))
+
+                        context_prompt = chat_ctx.build_prompt(
+                            chat_history, prompt,
+                            summarize=lambda p: query_llm(p, model_name),
+                            attachment_ids=attachment_ids,
+                        )
+
+                    user_msg = {"role": "user", "content": prompt}
+                    if uploaded_file:
+                        user_msg["attachment_names"] = [uploaded_file.name]
+                    if attachment_ids:
+                        user_msg["attachments"] = attachment_ids
+                    chat_history.append(user_msg)
+
+                    reply_stream = LLMStream(context_prompt, model_name, image_data)
+                    with st.chat_message("assistant"): st.write_stream(reply_stream)
+                    ai_reply = reply_stream.text
+                    chat_history.append({"role": "assistant", "content": ai_reply})
+            except Exception as e: st.error(f"Error: {e}")
+
+# --- DIAGNOSTICS ---
+if show_diagnostics:
+    st.markdown("---")
+    render_diagnostics()
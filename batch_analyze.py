@@ -0,0 +1,216 @@
+"""
+Headless Skill Gap Analyzer for resume x job-description matrices.
+
+    python batch_analyze.py --resumes resumes/ --jds jds/ --out results.jsonl --csv results.csv
+
+Every (resume PDF, JD .txt) pair runs through run_skill_gap (full, assisted
+or fast mode) and recommend_courses. Pairs run concurrently (bounded
+by --concurrency); every provider call they make (re-asks, hedges and
+verdicts included) is metered by the shared rate_limiter, and each result is
+appended to the JSONL (and optional CSV) file as soon as it completes.
+Re-running the same command resumes: pairs already recorded with status "ok"
+are skipped, failed ones are retried.
+"""
+import argparse
+import asyncio
+import csv
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+import course_catalog
+import telemetry
+from llm import configure_gemini, configure_groq
+from pdf_extract import get_pdf_extractor
+from pipeline import SKILL_GAP_MODES, recommend_courses, run_skill_gap
+from rate_limiter import get_rate_limiter
+
+CSV_FIELDS = ["resume", "jd", "status", "missing_skills", "courses", "elapsed_s", "error"]
+
+
+def pair_id(resume_name, jd_name):
+    return f"{resume_name}::{jd_name}"
+
+
+def load_completed(out_path):
+    """Pair ids already written with status ok; tolerates a torn last line from a crash."""
+    done = set()
+    if not out_path.exists():
+        return done
+    with open(out_path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if record.get("status") == "ok":
+                done.add(pair_id(record["resume"], record["jd"]))
+    return done
+
+
+def truncate_torn_tail(out_path):
+    """Cuts an unterminated last line (a crash mid-write) so the next append starts on a fresh line."""
+    if not out_path.exists():
+        return
+    with open(out_path, "r+b") as f:
+        end = f.seek(0, os.SEEK_END)
+        pos = end
+        while pos > 0:
+            start = max(pos - 65536, 0)
+            f.seek(start)
+            block = f.read(pos - start)
+            if pos == end and block.endswith(b"\n"):
+                return
+            newline = block.rfind(b"\n")
+            if newline >= 0:
+                f.truncate(start + newline + 1)
+                return
+            pos = start
+        f.truncate(0)
+
+
+def load_catalog(path):
+    if path and Path(path).exists():
+        return course_catalog.read_catalog_file(path)
+    return course_catalog.catalog_from_records(course_catalog.DEFAULT_COURSES)
+
+
+def analyze_pair(resume_text, jd_text, model_name, courses_df, mode="full"):
+    with telemetry.trace("batch_pair"):
+        analysis, missing = run_skill_gap(resume_text, jd_text, model_name, mode, courses_df)
+        if analysis.startswith("Error"):
+            raise RuntimeError(analysis)
+        return {
+            "analysis": analysis,
+            "missing_skills": missing,
+            "courses": recommend_courses(missing, courses_df),
+        }
+
+
+class ResultWriter:
+    def __init__(self, out_path, csv_path=None):
+        truncate_torn_tail(Path(out_path))
+        self._out = open(out_path, "a", encoding="utf-8")
+        self._csv_file = None
+        if csv_path:
+            new_file = not Path(csv_path).exists() or Path(csv_path).stat().st_size == 0
+            self._csv_file = open(csv_path, "a", encoding="utf-8", newline="")
+            self._csv = csv.DictWriter(self._csv_file, fieldnames=CSV_FIELDS)
+            if new_file:
+                self._csv.writeheader()
+
+    def write(self, record):
+        self._out.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._out.flush()
+        os.fsync(self._out.fileno())
+        if self._csv_file:
+            courses = record.get("courses") or {}
+            self._csv.writerow({
+                "resume": record["resume"],
+                "jd": record["jd"],
+                "status": record["status"],
+                "missing_skills": "; ".join(record.get("missing_skills") or []),
+                "courses": "; ".join(c["Course Name"] for links in courses.values() for c in links),
+                "elapsed_s": record["elapsed_s"],
+                "error": record.get("error", ""),
+            })
+            self._csv_file.flush()
+
+    def close(self):
+        self._out.close()
+        if self._csv_file:
+            self._csv_file.close()
+
+
+async def run_batch(args):
+    resume_paths = sorted(Path(args.resumes).glob("*.pdf"))
+    jd_paths = sorted(Path(args.jds).glob("*.txt"))
+    out_path = Path(args.out)
+    done = load_completed(out_path)
+
+    pairs = [(r, j) for r in resume_paths for j in jd_paths if pair_id(r.name, j.name) not in done]
+    print(f"{len(resume_paths)} resumes x {len(jd_paths)} JDs: {len(done)} done, {len(pairs)} to run", file=sys.stderr)
+    if not pairs:
+        return 0
+
+    courses_df = load_catalog(args.catalog)
+    extractor = get_pdf_extractor()
+    jd_texts = {p.name: p.read_text(encoding="utf-8", errors="replace") for p in jd_paths}
+    resume_texts = {}
+
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def resume_text(path):
+        # Each resume is extracted once; the extractor also caches by content hash
+        if path.name not in resume_texts:
+            resume_texts[path.name] = asyncio.ensure_future(asyncio.to_thread(lambda: extractor.extract(path).text))
+        return await resume_texts[path.name]
+
+    async def run_pair(resume_path, jd_path):
+        record = {"resume": resume_path.name, "jd": jd_path.name, "model": args.model, "mode": args.mode}
+        start = time.monotonic()
+        async with semaphore:
+            try:
+                text = await resume_text(resume_path)
+                if not text:
+                    raise RuntimeError("no text could be extracted from the PDF")
+                record.update(await asyncio.to_thread(analyze_pair, text, jd_texts[jd_path.name], args.model, courses_df, args.mode))
+                record["status"] = "ok"
+            except Exception as e:
+                record["status"] = "error"
+                record["error"] = str(e)
+        record["elapsed_s"] = round(time.monotonic() - start, 3)
+        return record
+
+    writer = ResultWriter(out_path, args.csv)
+    failures = 0
+    try:
+        tasks = [asyncio.ensure_future(run_pair(r, j)) for r, j in pairs]
+        for i, fut in enumerate(asyncio.as_completed(tasks), 1):
+            record = await fut
+            writer.write(record)
+            failures += record["status"] != "ok"
+            print(f"[{i}/{len(pairs)}] {record['resume']} x {record['jd']}: {record['status']}", file=sys.stderr)
+    finally:
+        writer.close()
+    return 1 if failures else 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the Skill Gap Analyzer over directories of resumes and JDs.")
+    parser.add_argument("--resumes", required=True, help="directory of resume PDFs")
+    parser.add_argument("--jds", required=True, help="directory of job descriptions (.txt)")
+    parser.add_argument("--out", required=True, help="JSONL results file (appended to; used for resuming)")
+    parser.add_argument("--csv", help="optional CSV summary file")
+    parser.add_argument("--catalog", default="data/skillsbuild_courses.csv", help="course catalog CSV")
+    parser.add_argument("--model", default="gemini-2.5-flash")
+    parser.add_argument("--mode", choices=SKILL_GAP_MODES, default="full",
+                        help="full: LLM reads both documents; assisted: local match + LLM verdict; fast: no LLM")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--gemini-rpm", type=float, default=None,
+                        help="max Gemini requests per minute, 0 = unlimited (default: LLM_RATE_LIMITS / built-in)")
+    parser.add_argument("--groq-rpm", type=float, default=None,
+                        help="max Groq requests per minute, 0 = unlimited (default: LLM_RATE_LIMITS / built-in)")
+    args = parser.parse_args(argv)
+
+    load_dotenv(Path(__file__).parent / ".env")
+    google_key = os.getenv("GOOGLE_API_KEY")
+    if not google_key and args.mode != "fast":
+        parser.error("GOOGLE_API_KEY must be set (environment or .env)")
+    if google_key:
+        configure_gemini(google_key)
+    configure_groq(os.getenv("GROQ_API_KEY"))
+    # After load_dotenv: the shared limiter reads LLM_RATE_LIMITS when first used
+    for provider, rpm in (("gemini", args.gemini_rpm), ("groq", args.groq_rpm)):
+        if rpm is not None:
+            get_rate_limiter().set_rpm(provider, rpm)
+
+    return asyncio.run(run_batch(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
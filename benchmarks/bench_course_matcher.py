@@ -0,0 +1,51 @@
+"""
+Benchmark: indexed course matcher vs. the original row-scan recommend_courses.
+
+    python benchmarks/bench_course_matcher.py --rows 1000 10000 50000 --skills 25
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from course_index import CourseIndex  # noqa: E402
+from fixtures import make_catalog, make_skills  # noqa: E402
+
+def legacy_recommend_courses(missing_skills, courses_df):
+    """The pre-index implementation, kept here as the reference."""
+    recs = {}
+    if courses_df is None or courses_df.empty: return recs
+    for skill in missing_skills:
+        skill_lower = skill.lower()
+        matches = courses_df[courses_df['Skill'].str.lower().apply(lambda x: skill_lower in str(x) or str(x) in skill_lower)]
+        if not matches.empty:
+            recs[skill] = matches.drop_duplicates('Course Name')[['Course Name', 'URL']].head(2).to_dict('records')
+    return recs
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000, 10000, 50000])
+    parser.add_argument("--skills", type=int, default=25)
+    args = parser.parse_args()
+
+    skills = make_skills(args.skills)
+    print(f"{'rows':>8} {'legacy_s':>10} {'build_s':>10} {'lookup_s':>10} {'speedup':>9}")
+    for rows in args.rows:
+        df = make_catalog(rows)
+        expected, legacy_s = timed(legacy_recommend_courses, skills, df)
+        index, build_s = timed(CourseIndex, df)
+        got, lookup_s = timed(index.lookup, skills)
+        assert got == expected, f"index results differ from legacy implementation at {rows} rows"
+        print(f"{rows:>8} {legacy_s:>10.4f} {build_s:>10.4f} {lookup_s:>10.4f} {legacy_s / max(lookup_s, 1e-9):>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
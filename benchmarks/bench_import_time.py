@@ -0,0 +1,97 @@
+"""
+Benchmark: cold import time per app mode, with a budget check.
+
+    python benchmarks/bench_import_time.py --runs 5
+    python benchmarks/bench_import_time.py --budget-ms 400   # exit 1 if a mode is over budget
+
+Each measurement is a fresh interpreter importing what app.py loads before the
+first paint of one mode: app.py's top-level imports (read from its source, so
+the list cannot go stale) plus the modules the mode imports lazily. The chatbot
+and the Resume Builder import nothing beyond the top level before first paint,
+so they are measured as one mode. Besides the time, every mode is checked for
+heavy dependencies it should not load (e.g. pandas in the chatbot), which would mean
+an eager import has crept back in. "eager" is the old all-up-front import set,
+kept as the reference.
+"""
+import argparse
+import ast
+import json
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+HEAVY = ["google.generativeai", "groq", "pandas", "PyPDF2", "fpdf", "PIL", "scipy"]
+# Loaded by the Skill Gap Analyzer's catalog loaders before first paint (jd_ranking waits for a click)
+SKILL_GAP_MODULES = ["course_catalog", "course_index", "course_retrieval"]
+
+
+def top_level_imports(path):
+    """Modules imported at module level (not inside functions or branches) by `path`, in order."""
+    modules = []
+    for node in ast.parse(Path(path).read_text(encoding="utf-8")).body:
+        if isinstance(node, ast.Import):
+            modules.extend(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            modules.append(node.module)
+    return list(dict.fromkeys(modules))
+
+
+APP_CORE = top_level_imports(ROOT / "app.py")
+
+# mode -> (modules imported before first paint, heavy modules allowed)
+MODES = {
+    "chatbot_resume_builder": (APP_CORE, []),
+    "skill_gap": (APP_CORE + SKILL_GAP_MODULES, ["pandas", "scipy"]),
+    "eager": (APP_CORE + HEAVY + SKILL_GAP_MODULES, HEAVY),
+}
+
+PROBE = """
+import json, sys, time, warnings
+warnings.filterwarnings("ignore")
+sys.path.insert(0, {root!r})
+start = time.perf_counter()
+for name in {modules!r}:
+    __import__(name)
+elapsed = time.perf_counter() - start
+print(json.dumps({{"seconds": elapsed, "loaded": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+
+def probe(modules):
+    code = PROBE.format(root=str(ROOT), modules=modules, heavy=HEAVY)
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=None, help="fail when a lazy mode's median exceeds this")
+    args = parser.parse_args()
+
+    failures = []
+    print(f"{'mode':<24} {'median_ms':>10} {'min_ms':>8}  heavy modules loaded")
+    for mode, (modules, allowed) in MODES.items():
+        results = [probe(modules) for _ in range(args.runs)]
+        times = [r["seconds"] * 1000 for r in results]
+        loaded = results[-1]["loaded"]
+        median = statistics.median(times)
+        print(f"{mode:<24} {median:>10.1f} {min(times):>8.1f}  {', '.join(loaded) or '-'}")
+        if mode == "eager":
+            continue
+        unexpected = [m for m in loaded if m not in allowed]
+        if unexpected:
+            failures.append(f"{mode}: eagerly imports {', '.join(unexpected)}")
+        if args.budget_ms and median > args.budget_ms:
+            failures.append(f"{mode}: {median:.0f} ms > budget {args.budget_ms:.0f} ms")
+
+    for failure in failures:
+        print(f"FAIL {failure}", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,106 @@
+"""
+Benchmark: PDF rendering engine vs. the original per-line create_pdf, plus batch throughput.
+
+    python benchmarks/bench_pdf_render.py --docs 500 --workers 1 4 8
+"""
+import argparse
+import re
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from fixtures import make_resume_markdown  # noqa: E402
+from pdf_render import render_batch, render_pdf  # noqa: E402
+
+
+def legacy_create_pdf(markdown_text, theme_color="#000000"):
+    """The pre-engine implementation, kept here as the reference."""
+    if theme_color.startswith('#'): theme_color = theme_color.lstrip('#')
+    try: r, g, b = int(theme_color[0:2], 16), int(theme_color[2:4], 16), int(theme_color[4:6], 16)
+    except: r, g, b = 0, 0, 0
+
+    from fpdf import FPDF
+    pdf = FPDF()
+    pdf.add_page()
+    pdf.set_auto_page_break(auto=True, margin=15)
+    pdf.set_font("Arial", size=11)
+
+    for line in markdown_text.split('\n'):
+        pdf.set_text_color(0, 0, 0)
+        pdf.set_font("Arial", size=11)
+
+        if line.startswith('# '):
+            pdf.set_text_color(r, g, b)
+            pdf.set_font("Arial", 'B', 16)
+            pdf.cell(0, 10, line.replace('# ', ''), ln=True)
+        elif line.startswith('## '):
+            pdf.set_text_color(r, g, b)
+            pdf.set_font("Arial", 'B', 14)
+            pdf.cell(0, 10, line.replace('## ', ''), ln=True)
+        elif line.startswith('### '):
+            pdf.set_text_color(r, g, b)
+            pdf.set_font("Arial", 'B', 12)
+            pdf.cell(0, 10, line.replace('### ', ''), ln=True)
+        else:
+            clean_line = line.replace('**', '').replace('* ', '• ')
+            try: clean_line = clean_line.encode('latin-1', 'replace').decode('latin-1')
+            except: clean_line = clean_line.encode('ascii', 'ignore').decode('ascii')
+            pdf.multi_cell(0, 6, clean_line)
+
+    return pdf.output(dest='S').encode('latin-1')
+
+
+def page_text(pdf_bytes):
+    """Text-drawing operators of the (uncompressed or zlib) page streams, for comparing layouts."""
+    import zlib
+    ops = []
+    for stream in re.findall(rb"stream\r?\n(.*?)endstream", pdf_bytes, re.S):
+        try:
+            stream = zlib.decompress(stream)
+        except zlib.error:
+            pass
+        ops += [line for line in stream.split(b"\n") if line.endswith(b"Tj ET Q") or line.endswith(b" Tw")]
+    return ops
+
+
+def docs_per_second(fn, docs):
+    start = time.perf_counter()
+    for md in docs:
+        fn(md, "#4b6cb7")
+    return len(docs) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--docs", type=int, default=500)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4])
+    args = parser.parse_args()
+
+    docs = [make_resume_markdown(sections=3 + i % 5, bullets=4 + i % 6, seed=i) for i in range(args.docs)]
+    for md in docs[:25]:
+        assert page_text(render_pdf(md, "#4b6cb7")) == page_text(legacy_create_pdf(md, "#4b6cb7")), \
+            "engine layout differs from legacy implementation"
+
+    legacy = docs_per_second(legacy_create_pdf, docs)
+    engine = docs_per_second(render_pdf, docs)
+    print(f"{'renderer':>16} {'docs/s':>10} {'speedup':>9}")
+    print(f"{'legacy':>16} {legacy:>10.1f} {1:>8.1f}x")
+    print(f"{'engine':>16} {engine:>10.1f} {engine / legacy:>8.1f}x")
+
+    items = [(f"resume_{i:05d}.md", md) for i, md in enumerate(docs)]
+    with tempfile.TemporaryDirectory() as tmp:
+        for workers in args.workers:
+            for sink in ("dir", "zip"):
+                out = Path(tmp) / f"{sink}_{workers}" if sink == "dir" else Path(tmp) / f"out_{workers}.zip"
+                start = time.perf_counter()
+                summary = render_batch(items, out, "#4b6cb7", workers=workers)
+                rate = summary["rendered"] / (time.perf_counter() - start)
+                assert summary["rendered"] == len(docs), summary["errors"]
+                label = f"batch {sink} x{workers}"
+                print(f"{label:>16} {rate:>10.1f} {rate / legacy:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Local stand-in for Gemini/Groq behind query_llm.
+
+Models named "fake/<anything>" are answered by FakeProvider: recorded
+responses are replayed by prompt hash (record them from a real session with
+LLM_RECORD_PATH=responses.jsonl), anything else gets a canned reply shaped
+like what the app expects. Latency is synthetic and configurable so the rest
+of the pipeline can be measured without API keys.
+"""
+import hashlib
+import json
+import random
+import threading
+import time
+
+import llm
+
+PREFIX = "fake/"
+
+SKILL_GAP_REPLY = json.dumps({
+    "matching_skills": ["Python", "SQL"],
+    "missing_skills": ["Docker", "Kubernetes", "Cloud"],
+    "verdict": "Solid data background; containerization and cloud deployment are the main gaps.",
+})
+
+RESUME_JSON_REPLY = json.dumps({
+    "name": "Jane Doe", "email": "jane@example.com", "phone": "+1 555 0100", "links": "linkedin.com/in/janedoe",
+    "summary": "Data engineer.", "experience": "Example Corp, 2019-2024", "education": "BSc Computer Science",
+    "skills": "Python, SQL", "certifications": "",
+})
+
+RESUME_MARKDOWN_REPLY = "\n".join(
+    ["# Jane Doe", "jane@example.com | +1 555 0100", "## Summary", "Data engineer with 5 years of experience.", "## Experience"]
+    + [f"* **Achievement {i}**: Reduced pipeline latency by {10 + i}% for 40 internal teams." for i in range(12)]
+    + ["## Education", "BSc Computer Science", "## Skills", "Python, SQL, Airflow"]
+)
+
+
+def canned_reply(prompt):
+    if "Compare RESUME and JD" in prompt:
+        return SKILL_GAP_REPLY
+    if "resume form" in prompt:
+        return RESUME_JSON_REPLY
+    if "Create a resume" in prompt:
+        return RESUME_MARKDOWN_REPLY
+    if "running summary" in prompt:
+        return "The user is a data engineer preparing for interviews."
+    if "verdict" in prompt.lower():
+        return "Partial match: strong data skills, needs container experience."
+    return "Focus on quantified achievements and practise the STAR method."
+
+
+class FakeProvider:
+    def __init__(self, latency=0.0, jitter=0.0, chunk_chars=40, chunk_latency=0.0,
+                 error_rate=0.0, recordings=None, seed=0):
+        self.latency = latency
+        self.jitter = jitter
+        self.chunk_chars = chunk_chars
+        self.chunk_latency = chunk_latency
+        self.error_rate = error_rate
+        self.recordings = {}
+        self.calls = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        if recordings:
+            self.load_recordings(recordings)
+
+    def load_recordings(self, path):
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    record = json.loads(line)
+                    self.recordings[record["prompt_sha256"]] = record["response"]
+
+    def respond(self, prompt):
+        key = hashlib.sha256(prompt.encode("utf-8", "replace")).hexdigest()
+        return self.recordings.get(key) or canned_reply(prompt)
+
+    def _delay(self):
+        with self._lock:
+            self.calls += 1
+            fail = self._rng.random() < self.error_rate
+            delay = self.latency + self._rng.uniform(0, self.jitter)
+        time.sleep(delay)
+        if fail:
+            raise RuntimeError("503 fake provider: synthetic failure")
+
+    def _chunks(self, text):
+        for i in range(0, len(text), self.chunk_chars):
+            if i and self.chunk_latency:
+                time.sleep(self.chunk_latency)
+            yield text[i:i + self.chunk_chars]
+
+    def __call__(self, model_name, prompt, image_data=None, stream=False):
+        self._delay()
+        text = self.respond(prompt)
+        return self._chunks(text) if stream else text
+
+
+def install(provider=None):
+    """Registers `provider` (default: zero-latency FakeProvider) for "fake/" models."""
+    provider = provider or FakeProvider()
+    llm.register_provider(PREFIX, provider)
+    return provider
+
+
+def uninstall():
+    llm.unregister_provider(PREFIX)
@@ -0,0 +1,101 @@
+"""
+Synthetic inputs for the benchmarks: resume PDFs, course catalogs, JDs, chat histories and images.
+Everything is generated from a fixed seed so runs are comparable across versions.
+"""
+import io
+import random
+
+import pandas as pd
+from fpdf import FPDF
+from PIL import Image, ImageDraw
+
+WORDS = [
+    "python", "sql", "cloud", "aws", "azure", "docker", "kubernetes", "data", "pipelines",
+    "machine", "learning", "react", "node.js", "security", "leadership", "communication",
+    "analytics", "visualization", "spark", "airflow", "kafka", "nlp", "deep", "testing",
+]
+FILLER = "designed built shipped maintained improved reduced latency for customers across teams".split()
+
+
+def make_catalog(rows, seed=0):
+    rng = random.Random(seed)
+    records = []
+    for i in range(rows):
+        skill = " ".join(rng.sample(WORDS, rng.randint(1, 3))).title()
+        records.append({"Skill": skill, "Course Name": f"Course {i % (rows // 2 + 1)}", "URL": f"https://example.com/{i}"})
+    return pd.DataFrame(records)
+
+
+def make_skills(n, seed=1):
+    rng = random.Random(seed)
+    return [" ".join(rng.sample(WORDS, rng.randint(1, 2))).title() for _ in range(n)]
+
+
+def make_resume_text(paragraphs=6, seed=2):
+    rng = random.Random(seed)
+    lines = ["Jane Doe - Data Engineer", "jane@example.com | +1 555 0100"]
+    for _ in range(paragraphs):
+        lines.append(" ".join(rng.choice(FILLER + WORDS) for _ in range(40)))
+    return "\n".join(lines)
+
+
+def make_job_description(seed=3):
+    rng = random.Random(seed)
+    return "We are hiring. Requirements: " + ", ".join(rng.sample(WORDS, 10)) + ". " + " ".join(rng.choice(FILLER) for _ in range(60))
+
+
+def make_pdf(pages, seed=4):
+    """A resume-like PDF with `pages` pages of text, returned as bytes."""
+    rng = random.Random(seed)
+    pdf = FPDF()
+    pdf.set_auto_page_break(auto=False)
+    for page in range(pages):
+        pdf.add_page()
+        pdf.set_font("Arial", "B", 14)
+        pdf.cell(0, 10, f"Experience (page {page + 1})", ln=True)
+        pdf.set_font("Arial", size=10)
+        for _ in range(30):
+            pdf.cell(0, 8, " ".join(rng.choice(FILLER + WORDS) for _ in range(14)), ln=True)
+    return pdf.output(dest="S").encode("latin-1")
+
+
+def make_resume_markdown(sections=5, bullets=6, seed=5):
+    rng = random.Random(seed)
+    parts = ["# Jane Doe", "jane@example.com | linkedin.com/in/janedoe"]
+    for s in range(sections):
+        parts.append(f"## Section {s + 1}")
+        parts.append("### Senior Data Engineer - Example Corp")
+        for _ in range(bullets):
+            parts.append("* **" + rng.choice(WORDS).title() + "**: " + " ".join(rng.choice(FILLER) for _ in range(16)))
+    return "\n".join(parts)
+
+
+def make_chat_history(turns, seed=6):
+    rng = random.Random(seed)
+    messages = []
+    for i in range(turns):
+        messages.append({"role": "user", "content": f"Question {i}: " + " ".join(rng.choice(FILLER + WORDS) for _ in range(25))})
+        messages.append({"role": "assistant", "content": " ".join(rng.choice(FILLER + WORDS) for _ in range(80))})
+    return messages
+
+
+def make_photo(width=4000, height=3000, seed=7):
+    """A phone-photo-sized JPEG (noisy, so it compresses like a real photo), as bytes."""
+    rng = random.Random(seed)
+    small = Image.new("RGB", (width // 16, height // 16))
+    small.putdata([(rng.randrange(256), rng.randrange(256), rng.randrange(256)) for _ in range(small.width * small.height)])
+    buf = io.BytesIO()
+    small.resize((width, height), Image.BILINEAR).save(buf, format="JPEG", quality=95)
+    return buf.getvalue()
+
+
+def make_screenshot(width=1080, height=8000, seed=8):
+    """A tall PNG of text lines, like a scrolled phone screenshot of a resume, as bytes."""
+    rng = random.Random(seed)
+    img = Image.new("RGB", (width, height), (255, 255, 255))
+    draw = ImageDraw.Draw(img)
+    for y in range(20, height - 20, 24):
+        draw.text((24, y), " ".join(rng.choice(FILLER + WORDS) for _ in range(12)), fill=(30, 30, 30))
+    buf = io.BytesIO()
+    img.save(buf, format="PNG")
+    return buf.getvalue()
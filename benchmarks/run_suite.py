@@ -0,0 +1,218 @@
+"""
+End-to-end benchmark suite. Runs without API keys: LLM calls go to the local
+FakeProvider (see fake_provider.py) with configurable synthetic latency.
+
+    python benchmarks/run_suite.py --out bench.json
+    python benchmarks/run_suite.py --quick --compare bench.json
+
+Each stage reports latency percentiles (seconds) and the peak Python heap
+allocation (tracemalloc, measured on one extra untimed run). The JSON output
+has stable keys so two runs can be diffed, or compared with --compare.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+# Benchmarks measure the work itself, not the response cache
+os.environ.setdefault("LLM_CACHE_DISABLED", "1")
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import course_catalog  # noqa: E402
+import fixtures  # noqa: E402
+from chat_context import ChatContext  # noqa: E402
+from course_index import CourseIndex  # noqa: E402
+from course_retrieval import CourseRetriever  # noqa: E402
+from fake_provider import FakeProvider, install  # noqa: E402
+from image_prep import ImagePreprocessor  # noqa: E402
+from jd_ranking import score_job_descriptions  # noqa: E402
+from llm import LLMStream  # noqa: E402
+from pdf_extract import PDFTextExtractor  # noqa: E402
+from pipeline import (  # noqa: E402
+    build_resume_prompt, create_pdf, parse_resume_to_json, rank_job_descriptions, recommend_courses, run_skill_gap,
+)
+from prompt_compaction import compact_for_model  # noqa: E402
+
+FAKE_MODEL = "fake/gemini-2.5-flash"
+
+
+def percentiles(samples):
+    ordered = sorted(samples)
+
+    def pick(q):
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    return {
+        "n": len(ordered),
+        "mean": statistics.fmean(ordered),
+        "min": ordered[0],
+        "p50": pick(0.50),
+        "p90": pick(0.90),
+        "p95": pick(0.95),
+        "p99": pick(0.99),
+        "max": ordered[-1],
+    }
+
+
+def measure(fn, repeats, warmup=1):
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    result = percentiles(samples)
+    result["peak_mem_bytes"] = peak
+    return result
+
+
+def bench_pdf(stages, page_counts, repeats):
+    # cache_size=0 and one worker: measure parsing itself, in-process and one page at a time
+    extractor = PDFTextExtractor(max_pages=max(page_counts), cache_size=0, max_workers=1)
+    for pages in page_counts:
+        data = fixtures.make_pdf(pages)
+        stages[f"pdf_extract/{pages}p"] = measure(lambda: extractor.extract(data), repeats)
+
+
+def bench_catalog(stages, row_counts, repeats):
+    skills = fixtures.make_skills(20)
+    for rows in row_counts:
+        raw = fixtures.make_catalog(rows)
+        build_repeats = 1 if rows >= 50000 else repeats
+        stages[f"catalog_normalize/{rows}"] = measure(lambda: course_catalog.normalize_catalog(raw), build_repeats, warmup=0)
+        df = course_catalog.normalize_catalog(raw)
+        stages[f"course_index_build/{rows}"] = measure(lambda: CourseIndex(df), build_repeats, warmup=0)
+        stages[f"tfidf_build/{rows}"] = measure(lambda: CourseRetriever.build(df), build_repeats, warmup=0)
+        # warmup builds and caches the index/retriever for this DataFrame
+        stages[f"recommend_courses/{rows}"] = measure(lambda: recommend_courses(skills, df), repeats)
+
+
+def bench_rendering(stages, repeats):
+    markdown = fixtures.make_resume_markdown()
+    stages["create_pdf/resume"] = measure(lambda: create_pdf(markdown, "#4b6cb7"), repeats)
+
+
+def bench_images(stages, repeats):
+    # cache_size=0: measure the processing itself; the cached path is timed separately
+    preprocessor = ImagePreprocessor(cache_size=0)
+    for name, data in (("photo_12mp", fixtures.make_photo()), ("screenshot_tall", fixtures.make_screenshot())):
+        stages[f"image_prepare/{name}"] = measure(lambda: preprocessor.prepare(data), repeats)
+        result = preprocessor.prepare(data)
+        stages[f"image_prepare/{name}"].update(
+            original_bytes=result.original_bytes, processed_bytes=result.processed_bytes, parts=len(result.parts))
+    cached = ImagePreprocessor()
+    stages["image_prepare/cached"] = measure(lambda: cached.prepare(data), repeats)
+
+
+def bench_prompts(stages, repeats):
+    user_data = {"name": "Jane Doe", "experience": fixtures.make_resume_text(), "skills": "Python, SQL"}
+    jd = fixtures.make_job_description()
+    stages["prompt/resume"] = measure(lambda: build_resume_prompt(user_data, jd), repeats)
+    stages["prompt/compact_resume"] = measure(lambda: compact_for_model(user_data["experience"], "resume", FAKE_MODEL), repeats)
+
+    history = fixtures.make_chat_history(50)
+    summarize = lambda p: "summary"  # noqa: E731
+
+    def chat_prompt():
+        ChatContext({}, FAKE_MODEL).build_prompt(history, "How do I negotiate salary?", summarize)
+
+    stages["prompt/chat_50_turns"] = measure(chat_prompt, repeats)
+
+
+def bench_end_to_end(stages, repeats, courses_df):
+    resume = fixtures.make_resume_text()
+    jd = fixtures.make_job_description()
+    for mode in ("full", "assisted", "fast"):
+        stages[f"skill_gap/{mode}"] = measure(lambda: run_skill_gap(resume, jd, FAKE_MODEL, mode, courses_df), repeats)
+    stages["parse_resume_to_json"] = measure(lambda: parse_resume_to_json(resume, FAKE_MODEL), repeats)
+    jds = [fixtures.make_job_description(seed=i) for i in range(50)]
+    stages["jd_rank/score_50"] = measure(lambda: score_job_descriptions(resume, jds, courses_df), repeats)
+    stages["jd_rank/top3_of_20"] = measure(
+        lambda: rank_job_descriptions(resume, jds[:20], FAKE_MODEL, "full", courses_df, top_k=3), repeats)
+
+    ttft = []
+
+    def stream_resume():
+        stream = LLMStream("Create a resume (Markdown).", FAKE_MODEL)
+        for _ in stream:
+            pass
+        ttft.append(stream.first_token_latency)
+
+    stages["stream/resume_total"] = measure(stream_resume, repeats)
+    stages["stream/resume_ttft"] = percentiles(ttft)
+
+
+def compare(current, baseline_path):
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)["stages"]
+    print(f"\n{'stage':<32} {'p50 old':>10} {'p50 new':>10} {'change':>8}")
+    for name, stats in current.items():
+        old = baseline.get(name)
+        if not old:
+            continue
+        change = (stats["p50"] - old["p50"]) / old["p50"] * 100 if old["p50"] else 0.0
+        print(f"{name:<32} {old['p50']:>10.5f} {stats['p50']:>10.5f} {change:>+7.1f}%")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the performance benchmark suite.")
+    parser.add_argument("--out", help="write results as JSON to this file")
+    parser.add_argument("--compare", help="baseline JSON from a previous run")
+    parser.add_argument("--quick", action="store_true", help="small inputs and few repeats")
+    parser.add_argument("--repeats", type=int, default=None)
+    parser.add_argument("--latency", type=float, default=0.05, help="fake provider latency per call (s)")
+    parser.add_argument("--jitter", type=float, default=0.02, help="extra uniform random latency (s)")
+    parser.add_argument("--chunk-latency", type=float, default=0.005, help="delay between streamed chunks (s)")
+    parser.add_argument("--recordings", help="JSONL recorded with LLM_RECORD_PATH, replayed by prompt hash")
+    args = parser.parse_args(argv)
+
+    repeats = args.repeats or (3 if args.quick else 10)
+    page_counts = [1, 5] if args.quick else [1, 5, 20, 50]
+    row_counts = [10, 1000] if args.quick else [10, 1000, 10000, 100000]
+
+    install(FakeProvider(latency=args.latency, jitter=args.jitter, chunk_latency=args.chunk_latency,
+                         recordings=args.recordings))
+
+    stages = {}
+    bench_pdf(stages, page_counts, repeats)
+    bench_catalog(stages, row_counts, repeats)
+    bench_rendering(stages, repeats)
+    bench_images(stages, repeats)
+    bench_prompts(stages, repeats)
+    bench_end_to_end(stages, repeats, course_catalog.catalog_from_records(course_catalog.DEFAULT_COURSES))
+
+    results = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "repeats": repeats,
+            "fake_latency": args.latency,
+            "fake_jitter": args.jitter,
+        },
+        "stages": stages,
+    }
+
+    print(f"{'stage':<32} {'p50':>10} {'p95':>10} {'peak_mem':>12}")
+    for name, stats in stages.items():
+        print(f"{name:<32} {stats['p50']:>10.5f} {stats['p95']:>10.5f} {stats.get('peak_mem_bytes', 0):>12,}")
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+    if args.compare:
+        compare(stages, args.compare)
+
+
+if __name__ == "__main__":
+    main()
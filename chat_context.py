@@ -0,0 +1,141 @@
+"""
+Token-budgeted prompt assembly for the Career Chatbot.
+
+The prompt for each turn is built from:
+  1. the coach instructions,
+  2. a rolling summary of turns that have scrolled out of the window,
+  3. attached documents referenced by recent turns (each stored once, by id),
+  4. the last `keep_turns` turns verbatim,
+  5. the current question.
+
+Older turns are folded into the summary in batches, so the summarizer is not
+called on every turn, and the whole prompt is trimmed to a per-model budget.
+All state lives in a plain dict (st.session_state in the app) so it survives reruns.
+"""
+import hashlib
+
+SYSTEM_PROMPT = "You are an expert AI Career Coach. Keep answers short."
+
+# Prompt budgets in estimated tokens. These are deliberately far below the
+# models' context windows: the goal is flat cost per turn, not filling the window.
+MODEL_TOKEN_BUDGETS = {
+    "gemini-2.5-flash": 6000,
+    "gemini-1.5-flash": 6000,
+}
+DEFAULT_TOKEN_BUDGET = 4000
+
+SUMMARY_PROMPT = """Update the running summary of a career coaching conversation.
+Keep facts about the user (background, goals, constraints) and advice already given.
+Write at most 150 words of plain text.
+
+CURRENT SUMMARY:
+{summary}
+
+NEW MESSAGES:
+{messages}
+"""
+
+
+def estimate_tokens(text):
+    """Rough token count (~4 characters per token) — good enough for budgeting."""
+    return len(text) // 4 + 1 if text else 0
+
+
+def token_budget(model_name):
+    return MODEL_TOKEN_BUDGETS.get(model_name.replace("models/", ""), DEFAULT_TOKEN_BUDGET)
+
+
+def clip_tokens(text, max_tokens):
+    """`text` cut at a word boundary to about `max_tokens`, marked as truncated."""
+    max_chars = max_tokens * 4
+    if len(text) <= max_chars:
+        return text
+    return text[:max_chars].rsplit(" ", 1)[0] + " …[truncated]"
+
+
+def _format_message(msg):
+    line = f"{msg['role'].upper()}: {msg['content']}"
+    for name in msg.get("attachment_names", []):
+        line += f" [attached: {name}]"
+    return line
+
+
+class ChatContext:
+    def __init__(self, state, model_name, keep_turns=4, fold_batch=4, attachment_share=0.5):
+        self.state = state
+        self.state.setdefault("summary", "")
+        self.state.setdefault("summarized_upto", 0)
+        self.state.setdefault("attachments", {})
+        self.budget = token_budget(model_name)
+        self.keep_messages = keep_turns * 2
+        self.fold_batch = fold_batch
+        self.attachment_share = attachment_share
+
+    def add_attachment(self, name, text):
+        """Stores the text once and returns its id; re-attaching the same content is free."""
+        attachment_id = hashlib.sha256(text.encode("utf-8", "replace")).hexdigest()[:12]
+        self.state["attachments"].setdefault(attachment_id, {"name": name, "text": text})
+        return attachment_id
+
+    def _fold_old_turns(self, messages, summarize):
+        window_start = max(len(messages) - self.keep_messages, 0)
+        pending = messages[self.state["summarized_upto"]:window_start]
+        if len(pending) < self.fold_batch:
+            return
+        reply = summarize(SUMMARY_PROMPT.format(
+            summary=self.state["summary"] or "(none)",
+            messages="\n".join(_format_message(m) for m in pending),
+        ))
+        # Keep the old summary if the provider failed; we retry on the next turn
+        if reply and not reply.startswith("Error"):
+            self.state["summary"] = reply.strip()
+            self.state["summarized_upto"] = window_start
+
+    def build_prompt(self, messages, user_prompt, summarize, attachment_ids=()):
+        """
+        `messages` is the history *before* the current turn; `summarize` is a
+        callable prompt -> text (query_llm in the app).
+        """
+        self._fold_old_turns(messages, summarize)
+        recent = list(messages[self.state["summarized_upto"]:])
+
+        # Attachments referenced by the current turn or the recent window, each included once
+        referenced = list(dict.fromkeys(
+            [aid for m in recent for aid in m.get("attachments", [])] + list(attachment_ids)
+        ))
+        attachments = self.state["attachments"]
+        referenced = [aid for aid in referenced if aid in attachments]
+        doc_budget = int(self.budget * self.attachment_share)
+        # Newest documents get budget first: each takes what it needs, as long as every
+        # older one is left at least half an equal share
+        floor = doc_budget // max(2 * len(referenced), 1)
+        remaining = doc_budget
+        doc_blocks = []
+        for i, aid in enumerate(reversed(referenced)):
+            older = len(referenced) - 1 - i
+            share = max(remaining - floor * older, floor)
+            att = attachments[aid]
+            text = clip_tokens(att["text"], share)
+            remaining -= min(estimate_tokens(text), share)
+            doc_blocks.insert(0, f"[DOCUMENT {aid}: {att['name']}]\n{text}")
+
+        header = SYSTEM_PROMPT
+        if self.state["summary"]:
+            header += f"\n\nConversation so far (summary):\n{self.state['summary']}"
+        if doc_blocks:
+            header += "\n\nAttached documents:\n" + "\n\n".join(doc_blocks)
+
+        current = f"USER: {user_prompt}"
+        for aid in attachment_ids:
+            if aid in attachments:
+                current += f" [see DOCUMENT {aid}]"
+
+        # Drop the oldest verbatim turns until the prompt fits the budget
+        lines = [_format_message(m) for m in recent]
+        used = estimate_tokens(header) + estimate_tokens(current)
+        history_tokens = [estimate_tokens(line) for line in lines]
+        while lines and used + sum(history_tokens) > self.budget:
+            lines.pop(0)
+            history_tokens.pop(0)
+
+        return f"{header}\n\nHistory:\n" + "\n".join(lines) + f"\n\n{current}"
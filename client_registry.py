@@ -0,0 +1,148 @@
+"""
+Process-wide provider clients, shared by every Streamlit session.
+
+- Gemini: google.generativeai keeps one transport per process once configured;
+  the registry adds a cache of GenerativeModel handles so a handle is built
+  once per model name instead of on every call.
+- Groq: one client per API key on top of a pooled httpx.Client, so concurrent
+  sessions reuse keep-alive connections instead of opening a new TLS
+  connection per request.
+
+SDKs are imported on first use. All methods are safe to call from several
+threads; stats() reports handle reuse and connection-pool usage.
+"""
+import os
+import threading
+
+
+class ClientRegistry:
+    def __init__(self, max_connections=20, max_keepalive=10, keepalive_expiry=30.0, timeout=60.0):
+        self.max_connections = max_connections
+        self.max_keepalive = max_keepalive
+        self.keepalive_expiry = keepalive_expiry
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._gemini_key = None
+        self._genai = None
+        self._models = {}
+        self._groq_key = None
+        self._groq = None
+        self._http = None
+        self._stats = {"model_handles_created": 0, "model_handle_hits": 0,
+                       "groq_clients_created": 0, "http_requests": 0, "http_responses": 0}
+
+    # --- configuration ---
+
+    def configure_gemini(self, api_key):
+        """Sets the Gemini key; cached model handles are dropped when it changes."""
+        with self._lock:
+            if api_key != self._gemini_key:
+                self._gemini_key = api_key
+                self._genai = None
+                self._models = {}
+
+    def configure_groq(self, api_key):
+        """Sets the Groq key; the client is rebuilt on next use when it changes."""
+        with self._lock:
+            if (api_key or None) != self._groq_key:
+                self._groq_key = api_key or None
+                # In-flight requests keep their reference; the old pool closes once unreferenced
+                self._groq = None
+                self._http = None
+
+    @property
+    def has_groq(self):
+        return self._groq_key is not None
+
+    # --- Gemini ---
+
+    def _gemini_module(self):
+        # Callers hold self._lock
+        if self._genai is None:
+            import google.generativeai as genai
+            genai.configure(api_key=self._gemini_key)
+            self._genai = genai
+        return self._genai
+
+    def gemini(self):
+        """The configured google.generativeai module."""
+        with self._lock:
+            return self._gemini_module()
+
+    def gemini_model(self, model_name):
+        """Cached GenerativeModel handle for `model_name` ("models/" prefix optional)."""
+        name = model_name.replace("models/", "")
+        with self._lock:
+            model = self._models.get(name)
+            if model is not None:
+                self._stats["model_handle_hits"] += 1
+                return model
+            model = self._models[name] = self._gemini_module().GenerativeModel(name)
+            self._stats["model_handles_created"] += 1
+            return model
+
+    # --- Groq ---
+
+    def _count_request(self, request):
+        with self._lock:
+            self._stats["http_requests"] += 1
+
+    def _count_response(self, response):
+        with self._lock:
+            self._stats["http_responses"] += 1
+
+    def groq(self):
+        """The shared Groq client, or None when no key is configured."""
+        with self._lock:
+            if self._groq is None and self._groq_key:
+                import httpx
+                from groq import Groq
+                self._http = httpx.Client(
+                    limits=httpx.Limits(max_connections=self.max_connections,
+                                        max_keepalive_connections=self.max_keepalive,
+                                        keepalive_expiry=self.keepalive_expiry),
+                    timeout=self.timeout,
+                    event_hooks={"request": [self._count_request], "response": [self._count_response]},
+                )
+                self._groq = Groq(api_key=self._groq_key, http_client=self._http)
+                self._stats["groq_clients_created"] += 1
+            return self._groq
+
+    # --- stats ---
+
+    @staticmethod
+    def _pool_stats(http):
+        # httpcore's pool is not public API; report nothing rather than fail if it moves
+        pool = getattr(getattr(http, "_transport", None), "_pool", None)
+        if pool is None:
+            return {"open": 0, "idle": 0, "active": 0}
+        connections = list(pool.connections)
+        idle = sum(1 for c in connections if c.is_idle())
+        return {"open": len(connections), "idle": idle, "active": len(connections) - idle}
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats["gemini_models"] = sorted(self._models)
+            http = self._http
+        stats["groq_pool"] = self._pool_stats(http) if http is not None else None
+        stats["max_connections"] = self.max_connections
+        stats["max_keepalive"] = self.max_keepalive
+        return stats
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_client_registry():
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = ClientRegistry(
+                max_connections=int(os.getenv("LLM_POOL_MAX_CONNECTIONS", "20")),
+                max_keepalive=int(os.getenv("LLM_POOL_MAX_KEEPALIVE", "10")),
+                keepalive_expiry=float(os.getenv("LLM_POOL_KEEPALIVE_SECONDS", "30")),
+                timeout=float(os.getenv("LLM_HTTP_TIMEOUT", "60")),
+            )
+        return _registry
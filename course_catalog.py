@@ -0,0 +1,87 @@
+"""
+Course catalog loading and normalization.
+
+The catalog is read once, its columns are mapped onto the names the app uses
+("Skill", "Course Name", "URL"), repetitive text columns are stored as
+categoricals, and a lowercase `skill_key` is precomputed for matching.
+Caching across sessions is done by the caller (see load_course_catalog in app.py),
+keyed by `file_signature` or `content_digest` so edits invalidate it.
+"""
+import hashlib
+import io
+import os
+
+import pandas as pd
+
+# Built-in fallback catalog, used when no CSV is available
+DEFAULT_COURSES = [
+    {"Skill": "Data preprocessing", "Course Name": "Data Science Foundations", "URL": "https://skillsbuild.org/data-science", "Platform": "IBM SkillsBuild"},
+    {"Skill": "Data pipelines", "Course Name": "ETL and Data Pipelines with Shell Airflow and Kafka", "URL": "https://www.coursera.org/learn/etl-and-data-pipelines-shell-airflow-kafka", "Platform": "Coursera"},
+    {"Skill": "Insights", "Course Name": "Data Visualization with Python", "URL": "https://www.coursera.org/learn/python-for-data-visualization", "Platform": "Coursera"},
+    {"Skill": "Machine Learning", "Course Name": "Machine Learning with Python", "URL": "https://www.coursera.org/learn/machine-learning-with-python", "Platform": "Coursera"},
+    {"Skill": "Cloud", "Course Name": "Introduction to Cloud Computing", "URL": "https://www.coursera.org/learn/introduction-to-cloud", "Platform": "Coursera"},
+    {"Skill": "Python", "Course Name": "Python for Everybody", "URL": "https://www.coursera.org/specializations/python", "Platform": "Coursera"},
+    {"Skill": "SQL", "Course Name": "SQL for Data Science", "URL": "https://www.coursera.org/learn/sql-for-data-science", "Platform": "Coursera"},
+    {"Skill": "Generative AI", "Course Name": "Introduction to Generative AI", "URL": "https://www.cloudskillsboost.google/course_templates/536", "Platform": "Google Cloud"},
+    {"Skill": "AWS", "Course Name": "AWS Fundamentals", "URL": "https://www.coursera.org/specializations/aws-fundamentals", "Platform": "Coursera"},
+    {"Skill": "Azure", "Course Name": "Microsoft Azure Fundamentals AZ-900", "URL": "https://learn.microsoft.com/en-us/credentials/certifications/azure-fundamentals/", "Platform": "Microsoft"},
+    {"Skill": "Docker", "Course Name": "Docker for Developers", "URL": "https://www.udemy.com/topic/docker/", "Platform": "Udemy"},
+    {"Skill": "Kubernetes", "Course Name": "Architecting with Google Kubernetes Engine", "URL": "https://www.coursera.org/specializations/architecting-with-google-kubernetes-engine", "Platform": "Google Cloud"},
+    {"Skill": "HTML", "Course Name": "Introduction to HTML5", "URL": "https://www.coursera.org/learn/html", "Platform": "Coursera"},
+    {"Skill": "CSS", "Course Name": "CSS3", "URL": "https://www.coursera.org/learn/intro-css", "Platform": "Coursera"},
+    {"Skill": "JavaScript", "Course Name": "JavaScript Algorithms and Data Structures", "URL": "https://www.freecodecamp.org/learn/javascript-algorithms-and-data-structures/", "Platform": "freeCodeCamp"},
+    {"Skill": "React", "Course Name": "Meta Front-End Developer Professional Certificate", "URL": "https://www.coursera.org/professional-certificates/meta-front-end-developer", "Platform": "Coursera"},
+    {"Skill": "Node.js", "Course Name": "Developing Cloud Applications with Node.js and React", "URL": "https://www.coursera.org/learn/cloud-applications-nodejs-react", "Platform": "Coursera"},
+    {"Skill": "Communication", "Course Name": "Effective Communication: Writing, Design, and Presentation", "URL": "https://www.coursera.org/specializations/effective-communication", "Platform": "Coursera"},
+    {"Skill": "Leadership", "Course Name": "Strategic Leadership and Management", "URL": "https://www.coursera.org/specializations/strategic-leadership", "Platform": "Coursera"},
+    {"Skill": "Project Management", "Course Name": "Google Project Management Professional Certificate", "URL": "https://www.coursera.org/professional-certificates/google-project-management", "Platform": "Coursera"},
+    {"Skill": "Cybersecurity", "Course Name": "Google Cybersecurity Professional Certificate", "URL": "https://www.coursera.org/professional-certificates/google-cybersecurity", "Platform": "Coursera"}
+]
+
+# Object columns with at most this share of distinct values become categoricals
+CATEGORY_MAX_UNIQUE_RATIO = 0.5
+
+
+def _rename_map(columns):
+    rename_map = {}
+    for c in columns:
+        if "skill" in c.lower(): rename_map[c] = "Skill"
+        if "course" in c.lower(): rename_map[c] = "Course Name"
+        if "url" in c.lower(): rename_map[c] = "URL"
+    return rename_map
+
+
+def normalize_catalog(df):
+    """Returns a compact copy of `df` with canonical column names and a `skill_key` column."""
+    df = df.rename(columns=_rename_map(df.columns))
+    df = df.loc[:, ~df.columns.duplicated()].reset_index(drop=True)
+    if "Skill" in df.columns:
+        df["skill_key"] = df["Skill"].astype("string").str.strip().str.lower()
+    for col in df.columns:
+        series = df[col]
+        if series.dtype == object or pd.api.types.is_string_dtype(series):
+            if len(series) and series.nunique(dropna=True) / len(series) <= CATEGORY_MAX_UNIQUE_RATIO:
+                df[col] = series.astype("category")
+    return df
+
+
+def file_signature(path):
+    """(path, mtime_ns, size) — changes whenever the file is rewritten."""
+    stat = os.stat(path)
+    return str(path), stat.st_mtime_ns, stat.st_size
+
+
+def content_digest(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def read_catalog_file(path):
+    return normalize_catalog(pd.read_csv(path))
+
+
+def read_catalog_bytes(data):
+    return normalize_catalog(pd.read_csv(io.BytesIO(data)))
+
+
+def catalog_from_records(records):
+    return normalize_catalog(pd.DataFrame(records))
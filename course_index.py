@@ -0,0 +1,145 @@
+"""
+Precomputed index over the course catalog for recommend_courses.
+
+The original matcher keeps a row when `skill in catalog_skill` or
+`catalog_skill in skill` (both lowercased). The index answers both directions
+without scanning rows:
+
+- skill in catalog_skill: an n-gram inverted index (1- to 3-grams) over the
+  unique catalog skills narrows the candidates, which are then verified.
+- catalog_skill in skill: every substring of the query whose length matches
+  some catalog skill is looked up in a hash map of the unique catalog skills.
+
+Work per query is bounded by the query length and the candidate set, not by
+the number of catalog rows.
+"""
+import threading
+import weakref
+
+import numpy as np
+
+GRAM_SIZES = (1, 2, 3)
+
+
+def _grams(text, n):
+    return {text[i:i + n] for i in range(len(text) - n + 1)}
+
+
+class CourseIndex:
+    def __init__(self, courses_df):
+        if "skill_key" in courses_df.columns:
+            keys = courses_df["skill_key"]
+        else:
+            keys = courses_df["Skill"].str.lower()
+        valid = keys.notna().to_numpy()
+        positions = np.flatnonzero(valid)
+        keys = keys[valid].astype(str).to_numpy()
+
+        # Group row positions by unique normalized skill
+        uniq, inverse = np.unique(keys, return_inverse=True)
+        order = np.argsort(inverse, kind="stable")
+        bounds = np.searchsorted(inverse[order], np.arange(len(uniq) + 1))
+        self._keys = uniq.tolist()
+        self._rows = [positions[order[bounds[i]:bounds[i + 1]]] for i in range(len(uniq))]
+        self._key_ids = {k: i for i, k in enumerate(self._keys)}
+        self._key_lengths = sorted({len(k) for k in self._keys})
+
+        postings = {}
+        for key_id, key in enumerate(self._keys):
+            for n in GRAM_SIZES:
+                for g in _grams(key, n):
+                    postings.setdefault(g, []).append(key_id)
+        self._postings = {g: frozenset(ids) for g, ids in postings.items()}
+
+        self._courses = courses_df["Course Name"].tolist()
+        self._urls = courses_df["URL"].tolist()
+
+    def __len__(self):
+        return len(self._courses)
+
+    def _keys_containing(self, query):
+        """Ids of catalog skills that contain `query` as a substring."""
+        if not query:
+            return set(range(len(self._keys)))
+        n = min(len(query), GRAM_SIZES[-1])
+        grams = sorted(_grams(query, n), key=lambda g: len(self._postings.get(g, ())))
+        candidates = None
+        for g in grams:
+            ids = self._postings.get(g)
+            if not ids:
+                return set()
+            candidates = set(ids) if candidates is None else candidates & ids
+            if not candidates:
+                return set()
+        if len(query) <= GRAM_SIZES[-1]:
+            return candidates
+        return {i for i in candidates if query in self._keys[i]}
+
+    def _keys_contained_in(self, query):
+        """Ids of catalog skills that are substrings of `query`."""
+        found = set()
+        for m in self._key_lengths:
+            if m > len(query):
+                break
+            for start in range(len(query) - m + 1):
+                key_id = self._key_ids.get(query[start:start + m])
+                if key_id is not None:
+                    found.add(key_id)
+        return found
+
+    def match_rows(self, skill):
+        """Sorted catalog row positions matching `skill` in either direction."""
+        query = skill.lower()
+        key_ids = self._keys_containing(query) | self._keys_contained_in(query)
+        if not key_ids:
+            return np.empty(0, dtype=np.intp)
+        return np.unique(np.concatenate([self._rows[i] for i in key_ids]))
+
+    def lookup(self, skills, limit=2):
+        """
+        Batched equivalent of the original per-skill row scan:
+        {skill: [{"Course Name": ..., "URL": ...}, ...]} for skills with matches.
+        """
+        recs = {}
+        by_query = {}
+        for skill in skills:
+            query = skill.lower()
+            if query not in by_query:
+                by_query[query] = self._courses_for(self.match_rows(skill), limit)
+            if by_query[query]:
+                recs[skill] = by_query[query]
+        return recs
+
+    def _courses_for(self, rows, limit):
+        picked, seen = [], set()
+        for pos in rows:
+            name = self._courses[pos]
+            dedupe_key = name if name == name else "__nan__"
+            if dedupe_key in seen:
+                continue
+            seen.add(dedupe_key)
+            picked.append({"Course Name": name, "URL": self._urls[pos]})
+            if len(picked) == limit:
+                break
+        return picked
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def get_course_index(courses_df):
+    """
+    Returns the index for `courses_df`, building it on first use.
+    Indexes live as long as their DataFrame; mutate the frame and you need a new one.
+    """
+    key = id(courses_df)
+    with _indexes_lock:
+        entry = _indexes.get(key)
+        if entry is not None and entry[0]() is courses_df:
+            return entry[1]
+    index = CourseIndex(courses_df)
+    with _indexes_lock:
+        _indexes[key] = (weakref.ref(courses_df), index)
+        weakref.finalize(courses_df, _indexes.pop, key, None)
+    return index
@@ -0,0 +1,231 @@
+"""
+Offline TF-IDF retrieval over the course catalog.
+
+Each catalog row is turned into a document (skill + course name + URL path
+words) and featurized into word tokens plus character 3-5-grams taken within
+word boundaries, so "cloud" still lands near "Google Cloud Essentials" and
+"nlp" near "Introduction to AI and NLP". The row matrix is built once with
+sublinear TF, smoothed IDF and L2-normalized rows, and can be persisted next
+to the CSV. All missing skills are scored together with one sparse matrix
+multiply followed by a per-row top-k. Character n-grams alone produce false
+friends ("Java" in "JavaScript", "processing" in "Data preprocessing"), so a
+skill only matches rows that share at least one of its words (stopwords aside);
+the n-grams then rank those rows.
+"""
+import hashlib
+import math
+import os
+import threading
+import weakref
+from collections import Counter
+from urllib.parse import urlparse
+
+import numpy as np
+import scipy.sparse as sp
+
+from skill_taxonomy import STOPWORDS, tokenize
+
+CHAR_NGRAMS = (3, 4, 5)
+DEFAULT_MIN_SCORE = 0.3
+DEFAULT_TOP_K = 10
+FORMAT_VERSION = 1
+
+
+def _features(text):
+    feats = Counter()
+    for tok in tokenize(text):
+        feats["w:" + tok] += 1
+        padded = f" {tok} "
+        for n in CHAR_NGRAMS:
+            for i in range(len(padded) - n + 1):
+                feats[padded[i:i + n]] += 1
+    return feats
+
+
+def _url_words(url):
+    if not isinstance(url, str):
+        return ""
+    return urlparse(url).path.replace("-", " ").replace("_", " ").replace("/", " ")
+
+
+def catalog_documents(courses_df):
+    skills = courses_df["Skill"].astype(str).tolist() if "Skill" in courses_df.columns else [""] * len(courses_df)
+    names = courses_df["Course Name"].astype(str).tolist()
+    urls = courses_df["URL"].tolist() if "URL" in courses_df.columns else [""] * len(courses_df)
+    return [f"{s} {n} {_url_words(u)}" for s, n, u in zip(skills, names, urls)]
+
+
+class CourseRetriever:
+    def __init__(self, vocabulary, idf, matrix, courses, urls, digest):
+        self.vocabulary = vocabulary
+        self.idf = idf
+        self.matrix = matrix
+        self._courses = courses
+        self._urls = urls
+        self.digest = digest
+
+    @staticmethod
+    def digest_documents(docs):
+        h = hashlib.sha256()
+        for doc in docs:
+            h.update(doc.encode("utf-8", "replace") + b"\x1f")
+        return h.hexdigest()
+
+    @classmethod
+    def build(cls, courses_df, docs=None):
+        docs = catalog_documents(courses_df) if docs is None else docs
+        doc_feats = [_features(d) for d in docs]
+
+        vocabulary = {}
+        df_counts = Counter()
+        for feats in doc_feats:
+            df_counts.update(feats.keys())
+        for term in sorted(df_counts):
+            vocabulary[term] = len(vocabulary)
+        n_docs = len(docs)
+        idf = np.zeros(len(vocabulary), dtype=np.float32)
+        for term, col in vocabulary.items():
+            idf[col] = math.log((1 + n_docs) / (1 + df_counts[term])) + 1.0
+
+        matrix = cls._vectorize(doc_feats, vocabulary, idf)
+        return cls(vocabulary, idf, matrix, courses_df["Course Name"].tolist(),
+                   courses_df["URL"].tolist(), cls.digest_documents(docs))
+
+    @staticmethod
+    def _vectorize(feature_counts, vocabulary, idf):
+        indptr, indices, data = [0], [], []
+        for feats in feature_counts:
+            for term, tf in feats.items():
+                col = vocabulary.get(term)
+                if col is not None:
+                    indices.append(col)
+                    data.append((1.0 + math.log(tf)) * idf[col])
+            indptr.append(len(indices))
+        matrix = sp.csr_matrix(
+            (np.asarray(data, dtype=np.float32), np.asarray(indices, dtype=np.int32), np.asarray(indptr, dtype=np.int64)),
+            shape=(len(feature_counts), len(vocabulary)),
+        )
+        norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+        norms[norms == 0] = 1.0
+        return sp.csr_matrix(sp.diags(1.0 / norms) @ matrix, dtype=np.float32)
+
+    # --- persistence ---
+
+    def save(self, path):
+        terms = np.array(sorted(self.vocabulary, key=self.vocabulary.get), dtype=str)
+        # Write to a temp file and rename so concurrent readers never see a partial file
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez_compressed(
+                f,
+                version=np.array(FORMAT_VERSION),
+                digest=np.array(self.digest),
+                terms=terms,
+                idf=self.idf,
+                data=self.matrix.data,
+                indices=self.matrix.indices,
+                indptr=self.matrix.indptr,
+                shape=np.array(self.matrix.shape),
+            )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path, courses_df, digest):
+        """Returns the persisted retriever, or None if it is missing or stale."""
+        try:
+            with np.load(path, allow_pickle=False) as f:
+                if int(f["version"]) != FORMAT_VERSION or str(f["digest"]) != digest:
+                    return None
+                vocabulary = {term: i for i, term in enumerate(f["terms"].tolist())}
+                matrix = sp.csr_matrix((f["data"], f["indices"], f["indptr"]), shape=tuple(f["shape"]))
+                idf = f["idf"]
+        except (OSError, KeyError, ValueError):
+            return None
+        return cls(vocabulary, idf, matrix, courses_df["Course Name"].tolist(), courses_df["URL"].tolist(), digest)
+
+    # --- search ---
+
+    def scores(self, queries):
+        """
+        Dense (len(queries) x catalog rows) cosine-similarity matrix. Rows sharing
+        no word with a query score 0 for it.
+        """
+        feats = [_features(text) for text in queries]
+        q = self._vectorize(feats, self.vocabulary, self.idf)
+        scores = (q @ self.matrix.T).toarray()
+        words = [{t: c for t, c in f.items() if t.startswith("w:") and t[2:] not in STOPWORDS} for f in feats]
+        shared = (self._vectorize(words, self.vocabulary, self.idf) @ self.matrix.T).toarray() > 0
+        return scores * shared
+
+    def search(self, queries, top_k=DEFAULT_TOP_K, min_score=DEFAULT_MIN_SCORE):
+        """For each query, [(row, score), ...] best first, at most top_k, all >= min_score."""
+        if not queries or self.matrix.shape[0] == 0:
+            return [[] for _ in queries]
+        scores = self.scores(queries)
+        k = min(top_k, scores.shape[1])
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        results = []
+        for qi, rows in enumerate(top):
+            row_scores = scores[qi, rows]
+            order = np.argsort(-row_scores, kind="stable")
+            results.append([(int(rows[i]), float(row_scores[i])) for i in order if row_scores[i] >= min_score])
+        return results
+
+    def recommend(self, skills, limit=2, top_k=DEFAULT_TOP_K, min_score=DEFAULT_MIN_SCORE):
+        """Same shape as recommend_courses: {skill: [{"Course Name", "URL"}, ...]}."""
+        recs = {}
+        for skill, hits in zip(skills, self.search(list(skills), top_k, min_score)):
+            picked, seen = [], set()
+            for row, _ in hits:
+                name = self._courses[row]
+                if name in seen:
+                    continue
+                seen.add(name)
+                picked.append({"Course Name": name, "URL": self._urls[row]})
+                if len(picked) == limit:
+                    break
+            if picked:
+                recs[skill] = picked
+        return recs
+
+
+_retrievers = {}
+_retrievers_lock = threading.Lock()
+
+
+def get_course_retriever(courses_df, persist_path=None):
+    """
+    Retriever for `courses_df`, built once per DataFrame. With `persist_path`
+    the matrix is loaded from / saved to that .npz so restarts skip the build;
+    a digest of the catalog text detects stale files.
+    """
+    key = id(courses_df)
+    with _retrievers_lock:
+        entry = _retrievers.get(key)
+        if entry is not None and entry[0]() is courses_df:
+            return entry[1]
+
+    docs = catalog_documents(courses_df)
+    retriever = None
+    if persist_path:
+        retriever = CourseRetriever.load(persist_path, courses_df, CourseRetriever.digest_documents(docs))
+    if retriever is None:
+        retriever = CourseRetriever.build(courses_df, docs)
+        if persist_path:
+            try:
+                retriever.save(persist_path)
+            except OSError:
+                pass
+
+    with _retrievers_lock:
+        _retrievers[key] = (weakref.ref(courses_df), retriever)
+        weakref.finalize(courses_df, _retrievers.pop, key, None)
+    return retriever
+
+
+def persist_path_for(csv_path):
+    """data/skillsbuild_courses.csv -> data/skillsbuild_courses.tfidf.npz"""
+    base = str(csv_path)
+    if base.lower().endswith(".csv"):
+        base = base[:-4]
+    return base + ".tfidf.npz"
@@ -0,0 +1,205 @@
+"""
+Preprocessing of images attached in the Career Chatbot.
+
+- Images are downscaled so the longer side is at most `max_dim` and re-encoded
+  as JPEG at `quality` (PNG sources, i.e. screenshots, keep PNG when that is
+  smaller); the original is sent instead when it is already small enough and
+  no larger than the re-encoded version.
+- EXIF orientation is applied first, so phone photos are not sent sideways.
+- Very tall screenshots (height > `split_ratio` x width) are cut into
+  page-shaped slices with a small overlap. Downscaling the whole strip would
+  shrink its width until the text is unreadable; slices keep the width.
+- Results are cached in memory by the SHA-256 of the upload plus the settings,
+  so the same attachment sent on every turn is processed once.
+
+Processing time and original/processed bytes are recorded in the traces and
+metrics, and summed in stats() for the diagnostics panel.
+"""
+import hashlib
+import io
+import math
+import os
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+import telemetry
+from pdf_extract import read_bytes
+
+PreparedImage = namedtuple("PreparedImage", [
+    "parts", "mime_type", "width", "height", "original_bytes", "processed_bytes", "seconds", "cached",
+])
+
+# Formats that may be passed through untouched when they are already small enough
+PASSTHROUGH_FORMATS = {"JPEG": "image/jpeg", "PNG": "image/png", "WEBP": "image/webp"}
+# Slices of a tall screenshot are about this tall relative to their width (A4 is 1.41)
+SLICE_ASPECT = 1.5
+SLICE_OVERLAP = 0.05
+
+
+def as_gemini_parts(prepared):
+    """Inline-data parts for query_llm / LLMStream `image_data`."""
+    return [{"mime_type": prepared.mime_type, "data": part} for part in prepared.parts]
+
+
+def _flatten(img):
+    """`img` as RGB (or L); transparency is composited onto white (JPEG has no alpha)."""
+    from PIL import Image
+
+    if img.mode in ("RGB", "L"):
+        return img
+    img = img.convert("RGBA")
+    background = Image.new("RGB", img.size, (255, 255, 255))
+    background.paste(img, mask=img.getchannel("A"))
+    return background
+
+
+def _slices(img, split_ratio, max_parts, max_dim):
+    """Boxes (left, top, right, bottom) covering `img`; one box unless it is a tall strip."""
+    width, height = img.size
+    if not split_ratio or height <= width * split_ratio:
+        return [(0, 0, width, height)]
+    # Slices no taller than max_dim are sent at full resolution, without resampling.
+    # Past max_parts, slices grow so that max_parts overlapping slices still reach the bottom.
+    covering = math.ceil(height / (max_parts - (max_parts - 1) * SLICE_OVERLAP))
+    slice_h = max(min(int(width * SLICE_ASPECT), max(max_dim, width)), covering)
+    step = max(int(slice_h * (1 - SLICE_OVERLAP)), 1)
+    boxes = []
+    top = 0
+    while True:
+        bottom = min(top + slice_h, height)
+        if len(boxes) == max_parts - 1:
+            # Rounding in `step` must never leave the bottom rows out
+            top, bottom = max(height - slice_h, 0), height
+        boxes.append((0, top, width, bottom))
+        if bottom >= height:
+            break
+        top += step
+    return boxes
+
+
+class ImagePreprocessor:
+    def __init__(self, max_dim=1600, quality=85, split_ratio=2.5, max_parts=6, cache_size=32):
+        self.max_dim = max_dim
+        self.quality = quality
+        self.split_ratio = split_ratio
+        self.max_parts = max_parts
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"processed": 0, "cache_hits": 0, "original_bytes": 0, "processed_bytes": 0, "seconds": 0.0}
+
+    def prepare(self, source):
+        """PreparedImage for raw bytes, a path, or an uploaded file."""
+        with telemetry.span("image_prepare") as attrs:
+            result = self._prepare(source)
+            attrs.update(original_bytes=result.original_bytes, processed_bytes=result.processed_bytes,
+                         parts=len(result.parts), size=f"{result.width}x{result.height}", cached=result.cached)
+            return result
+
+    def _prepare(self, source):
+        data = read_bytes(source)
+        key = (hashlib.sha256(data).hexdigest(), self.max_dim, self.quality, self.split_ratio, self.max_parts)
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                self._stats["cache_hits"] += 1
+                return self._cache[key]._replace(cached=True)
+
+        start = time.perf_counter()
+        parts, mime_type, size = self._process(data)
+        result = PreparedImage(
+            parts=parts,
+            mime_type=mime_type,
+            width=size[0],
+            height=size[1],
+            original_bytes=len(data),
+            processed_bytes=sum(len(p) for p in parts),
+            seconds=time.perf_counter() - start,
+            cached=False,
+        )
+        telemetry.observe("career_image_prepare_seconds", result.seconds)
+        telemetry.inc("career_image_bytes_total", result.original_bytes, stage="original")
+        telemetry.inc("career_image_bytes_total", result.processed_bytes, stage="processed")
+        with self._lock:
+            self._stats["processed"] += 1
+            self._stats["original_bytes"] += result.original_bytes
+            self._stats["processed_bytes"] += result.processed_bytes
+            self._stats["seconds"] += result.seconds
+            if self.cache_size:
+                self._cache[key] = result
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return result
+
+    def _process(self, data):
+        """([encoded part bytes], mime type, (width, height) of the upright image)."""
+        # Imported here so sessions that never attach an image do not pay for it
+        from PIL import Image, ImageOps
+
+        img = Image.open(io.BytesIO(data))
+        source_format = img.format
+        img = ImageOps.exif_transpose(img)
+        boxes = _slices(img, self.split_ratio, self.max_parts, self.max_dim)
+        img = _flatten(img)
+        parts = []
+        for box in boxes:
+            part = img.crop(box) if len(boxes) > 1 else img.copy()
+            part.thumbnail((self.max_dim, self.max_dim), Image.LANCZOS)
+            parts.append(part)
+
+        fmt = "JPEG"
+        encoded = [self._encode(parts[0], fmt)]
+        if source_format == "PNG":
+            # Text and flat colors compress better as PNG; the first slice decides for all
+            png = self._encode(parts[0], "PNG")
+            if len(png) < len(encoded[0]):
+                fmt, encoded = "PNG", [png]
+        encoded += [self._encode(part, fmt) for part in parts[1:]]
+
+        unchanged = len(boxes) == 1 and max(img.size) <= self.max_dim
+        if unchanged and source_format in PASSTHROUGH_FORMATS and len(data) <= len(encoded[0]):
+            return [data], PASSTHROUGH_FORMATS[source_format], img.size
+        return encoded, PASSTHROUGH_FORMATS[fmt], img.size
+
+    def _encode(self, img, fmt):
+        buf = io.BytesIO()
+        if fmt == "PNG":
+            img.save(buf, format="PNG")
+        else:
+            img.save(buf, format="JPEG", quality=self.quality, optimize=True)
+        return buf.getvalue()
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats, cached_images=len(self._cache))
+        stats["seconds"] = round(stats["seconds"], 3)
+        stats["saved_bytes"] = stats["original_bytes"] - stats["processed_bytes"]
+        return stats
+
+    def clear_cache(self):
+        with self._lock:
+            self._cache.clear()
+
+
+_preprocessor = None
+_preprocessor_lock = threading.Lock()
+
+
+def get_image_preprocessor():
+    """
+    Process-wide preprocessor, configured from the environment:
+    IMAGE_MAX_DIM, IMAGE_QUALITY, IMAGE_SPLIT_RATIO (0 disables splitting),
+    IMAGE_MAX_PARTS, IMAGE_CACHE_SIZE.
+    """
+    global _preprocessor
+    with _preprocessor_lock:
+        if _preprocessor is None:
+            _preprocessor = ImagePreprocessor(
+                max_dim=int(os.getenv("IMAGE_MAX_DIM", "1600")),
+                quality=int(os.getenv("IMAGE_QUALITY", "85")),
+                split_ratio=float(os.getenv("IMAGE_SPLIT_RATIO", "2.5")),
+                max_parts=int(os.getenv("IMAGE_MAX_PARTS", "6")),
+                cache_size=int(os.getenv("IMAGE_CACHE_SIZE", "32")),
+            )
+        return _preprocessor
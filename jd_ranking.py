@@ -0,0 +1,87 @@
+"""
+Local ranking of several job descriptions against one resume.
+
+Every JD gets two cheap scores, computed for all JDs at once:
+  - skill coverage: share of the catalog skills the JD asks for that the resume
+    has (one taxonomy presence matrix, one boolean matrix product);
+  - term similarity: cosine between sublinear TF-IDF word vectors of the JD and
+    the resume, with IDF taken over the JDs so terms every posting shares
+    ("team", "experience") carry little weight.
+The blend orders the JDs so only the best few need a full LLM analysis.
+"""
+import math
+import re
+from collections import Counter
+
+import numpy as np
+import scipy.sparse as sp
+
+from skill_taxonomy import STOPWORDS, get_skill_taxonomy, tokenize
+
+SKILL_WEIGHT = 0.6
+TERM_WEIGHT = 0.4
+# A line of three or more -, = or * separates pasted job descriptions
+SEPARATOR_RE = re.compile(r"^\s*(?:-{3,}|={3,}|\*{3,})\s*$", re.MULTILINE)
+TITLE_CHARS = 60
+
+
+def split_job_descriptions(text):
+    """Pasted text -> list of non-empty JDs."""
+    return [part.strip() for part in SEPARATOR_RE.split(text or "") if part.strip()]
+
+
+def jd_title(job_desc):
+    """First non-empty line of the JD, shortened for tables."""
+    line = next((l.strip("#*:- \t") for l in job_desc.splitlines() if l.strip("#*:- \t")), "Untitled")
+    return line if len(line) <= TITLE_CHARS else line[:TITLE_CHARS - 1].rstrip() + "…"
+
+
+def _term_vectors(texts, idf_docs):
+    """L2-normalized sublinear TF-IDF rows for `texts`; IDF comes from the first `idf_docs` texts."""
+    counts = [Counter(t for t in tokenize(text) if t not in STOPWORDS and len(t) > 1) for text in texts]
+    vocabulary = {term: i for i, term in enumerate(sorted(set().union(*counts)))}
+    df = Counter(term for c in counts[:idf_docs] for term in c)
+    idf = np.array([math.log((1 + idf_docs) / (1 + df[term])) + 1.0 for term in vocabulary], dtype=np.float32)
+
+    indptr, indices, data = [0], [], []
+    for c in counts:
+        for term, tf in c.items():
+            indices.append(vocabulary[term])
+            data.append(1.0 + math.log(tf))
+        indptr.append(len(indices))
+    matrix = sp.csr_matrix(
+        (np.asarray(data, dtype=np.float32), np.asarray(indices, dtype=np.int32), np.asarray(indptr, dtype=np.int64)),
+        shape=(len(texts), len(vocabulary)),
+    ) @ sp.diags(idf)
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    norms[norms == 0] = 1.0
+    return sp.csr_matrix(sp.diags(1.0 / norms) @ matrix)
+
+
+def score_job_descriptions(resume_text, job_descs, courses_df=None):
+    """
+    One dict per JD, best first: index (position in `job_descs`), title, score,
+    skill_coverage, term_similarity and the local skill screen (matched/missing).
+    """
+    if not job_descs:
+        return []
+    screens, in_jds, in_resume = get_skill_taxonomy(courses_df).compare_many(resume_text, job_descs)
+    required = in_jds.sum(axis=1)
+    matched = (in_jds & in_resume).sum(axis=1)
+    coverage = np.divide(matched, required, out=np.zeros(len(job_descs)), where=required > 0)
+
+    vectors = _term_vectors(list(job_descs) + [resume_text], idf_docs=len(job_descs))
+    similarity = (vectors[:-1] @ vectors[-1].T).toarray().ravel()
+
+    # JDs without any catalog skill are ranked on their terms alone
+    scores = np.where(required > 0, SKILL_WEIGHT * coverage + TERM_WEIGHT * similarity, similarity)
+    order = np.argsort(-scores, kind="stable")
+    return [{
+        "index": int(i),
+        "title": jd_title(job_descs[i]),
+        "score": round(float(scores[i]), 4),
+        "skill_coverage": round(float(coverage[i]), 4),
+        "term_similarity": round(float(similarity[i]), 4),
+        "matched": screens[i]["matched"],
+        "missing": screens[i]["missing"],
+    } for i in order]
@@ -0,0 +1,234 @@
+"""
+Background jobs for LLM work, shared by every Streamlit session.
+
+Long steps (skill-gap analysis, resume generation, resume parsing) run on a
+bounded thread pool so the script thread only submits and polls. The app keeps
+just the job id in st.session_state; a rerun caused by any widget finds the job
+still running (or finished) instead of discarding it.
+
+Single flight: a job submitted with a `key` while an identical one is still in
+flight gets the existing job back, and SingleFlight does the same for any
+callable (query_llm uses it so identical prompts share one provider call).
+
+Finished jobs are kept until their session picks the result up, bounded both by
+count and by the total size of their results (JOB_RESULTS_MB). Past either,
+results that were already collected go first, then the oldest (whose page shows
+"expired"); the job that just finished is always kept for its page.
+"""
+import contextvars
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import telemetry
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+
+_current_job = contextvars.ContextVar("current_job", default=None)
+
+
+def job_key(*parts):
+    """Stable key for single-flight dedup from JSON-able parts (others use their repr)."""
+    blob = json.dumps(parts, sort_keys=True, default=repr, ensure_ascii=False)
+    return hashlib.sha256(blob.encode("utf-8", "replace")).hexdigest()
+
+
+def result_size(value):
+    """Approximate memory held by a job result: strings and containers of them, recursively."""
+    if isinstance(value, (str, bytes)):
+        return sys.getsizeof(value)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(result_size(k) + result_size(v) for k, v in value.items())
+    if isinstance(value, (list, tuple, set)):
+        return sys.getsizeof(value) + sum(result_size(v) for v in value)
+    return sys.getsizeof(value)
+
+
+def report_progress(value):
+    """Called from inside a job to publish partial output (e.g. streamed text); no-op elsewhere."""
+    job = _current_job.get()
+    if job is not None:
+        job.progress = value
+
+
+class SingleFlight:
+    """Concurrent calls with the same key share one execution of `fn`."""
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, fn):
+        """Returns (result, shared); shared is True for callers that waited on another's call."""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = {"event": threading.Event(), "result": None, "error": None}
+        if not leader:
+            call["event"].wait()
+            if call["error"] is not None:
+                raise call["error"]
+            return call["result"], True
+        try:
+            call["result"] = fn()
+        except BaseException as e:
+            call["error"] = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call["event"].set()
+        return call["result"], False
+
+
+class Job:
+    def __init__(self, name, key=None):
+        self.id = uuid.uuid4().hex[:12]
+        self.name = name
+        self.key = key
+        self.status = QUEUED
+        self.result = None
+        self.error = None
+        self.progress = None
+        self.size = 0
+        # Set once a caller has fetched the finished job; those results are evicted first
+        self.collected = False
+        self.subscribers = 1
+        self.submitted = time.monotonic()
+        self.started = None
+        self.finished = None
+        self._done = threading.Event()
+
+    @property
+    def done(self):
+        return self.status in (DONE, FAILED)
+
+    @property
+    def elapsed(self):
+        end = self.finished or time.monotonic()
+        return end - (self.started or self.submitted)
+
+    def wait(self, timeout=None):
+        """Blocks until the job finishes; returns True if it did within `timeout`."""
+        return self._done.wait(timeout)
+
+
+class JobExecutor:
+    def __init__(self, max_workers=4, max_finished=256, max_finished_bytes=64 * 1024 * 1024):
+        self.max_workers = max_workers
+        self.max_finished = max_finished
+        self.max_finished_bytes = max_finished_bytes
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+        # Sub-calls get their own pool so a job waiting on them can never starve the job pool
+        self._calls = ThreadPoolExecutor(max_workers=max_workers * 2, thread_name_prefix="job-call")
+        self._jobs = OrderedDict()
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self._coalesced = 0
+        self._finished_bytes = 0
+
+    def submit(self, fn, *args, name=None, key=None, **kwargs):
+        """
+        Runs fn(*args, **kwargs) in the background and returns its Job. With `key`,
+        an identical job still in flight is returned instead of starting another.
+        """
+        with self._lock:
+            if key is not None:
+                running = self._inflight.get(key)
+                if running is not None:
+                    running.subscribers += 1
+                    self._coalesced += 1
+                    return running
+            job = Job(name or getattr(fn, "__name__", "job"), key)
+            self._jobs[job.id] = job
+            if key is not None:
+                self._inflight[key] = job
+        # The job sees the submitter's context (e.g. its rate-limit session)
+        self._pool.submit(contextvars.copy_context().run, self._run, job, fn, args, kwargs)
+        return job
+
+    def _run(self, job, fn, args, kwargs):
+        token = _current_job.set(job)
+        job.started = time.monotonic()
+        job.status = RUNNING
+        try:
+            with telemetry.trace(job.name, job_id=job.id):
+                job.result = fn(*args, **kwargs)
+            job.status = DONE
+        except Exception as e:
+            job.error = f"{type(e).__name__}: {e}"
+            job.status = FAILED
+        finally:
+            _current_job.reset(token)
+            job.finished = time.monotonic()
+            # The partial output is only shown while the job runs; the result supersedes it
+            job.progress = None
+            job.size = result_size(job.result)
+            with self._lock:
+                if job.key is not None and self._inflight.get(job.key) is job:
+                    del self._inflight[job.key]
+                self._finished_bytes += job.size
+                self._evict(keep=job)
+            job._done.set()
+
+    def _evict(self, keep=None):
+        # Callers hold self._lock. Only finished jobs are dropped: collected results first,
+        # then the oldest. `keep` (the job that just finished) stays so its page can collect it.
+        finished = [job for job in self._jobs.values() if job.done]
+        excess = max(0, len(finished) - self.max_finished)
+        for job in sorted((job for job in finished if job is not keep), key=lambda job: not job.collected):
+            if not excess and self._finished_bytes <= self.max_finished_bytes:
+                break
+            del self._jobs[job.id]
+            self._finished_bytes -= job.size
+            excess = max(0, excess - 1)
+
+    def get(self, job_id):
+        """The job, or None if the id is unknown or its result has been evicted."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None and job.done:
+                job.collected = True
+            return job
+
+    def gather(self, *calls):
+        """
+        Runs independent zero-argument callables concurrently and returns their
+        results in order; the first exception is re-raised. Safe to use inside a
+        job, and telemetry spans still land in the caller's trace.
+        """
+        futures = [self._calls.submit(contextvars.copy_context().run, call) for call in calls]
+        return [f.result() for f in futures]
+
+    def stats(self):
+        with self._lock:
+            jobs = list(self._jobs.values())
+            coalesced = self._coalesced
+            finished_bytes = self._finished_bytes
+        counts = {QUEUED: 0, RUNNING: 0, DONE: 0, FAILED: 0}
+        for job in jobs:
+            counts[job.status] += 1
+        return {"workers": self.max_workers, "coalesced": coalesced, "result_bytes": finished_bytes, **counts}
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_job_executor():
+    """Process-wide executor, configured from the environment: JOB_WORKERS, JOB_RESULTS_MB."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = JobExecutor(
+                max_workers=int(os.getenv("JOB_WORKERS", "4")),
+                max_finished_bytes=int(float(os.getenv("JOB_RESULTS_MB", "64")) * 1024 * 1024),
+            )
+        return _executor
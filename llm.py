@@ -0,0 +1,336 @@
+"""
+LLM access shared by the Streamlit app and the headless tools.
+
+Clients are configured once per process with configure_gemini / configure_groq;
+everything else (fallback routing, caching, streaming) goes through query_llm
+and LLMStream. Clients and model handles live in the process-wide
+client_registry, which imports the provider SDKs on first use and shares
+pooled connections across sessions. Every provider call is admitted by the
+process-wide rate_limiter, which queues calls fairly across sessions and retries
+429/5xx replies with backoff.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+
+import telemetry
+from chat_context import estimate_tokens
+from client_registry import get_client_registry
+from jobs import SingleFlight
+from llm_cache import get_response_cache
+from provider_router import get_router
+from rate_limiter import OUTPUT_TOKEN_RESERVE, get_rate_limiter
+
+# Extra providers keyed by model-name prefix, e.g. "fake/" for the benchmark stand-in.
+# Each is a callable (model_name, prompt, image_data, stream) -> text | chunk iterator.
+_providers = {}
+_record_lock = threading.Lock()
+# Identical prompts already in flight (e.g. from two sessions) share one provider call
+_inflight = SingleFlight()
+
+
+def configure_gemini(api_key):
+    """Sets the Gemini key; google.generativeai is imported on the first Gemini call."""
+    get_client_registry().configure_gemini(api_key)
+
+
+def configure_groq(api_key):
+    """Sets the key for groq/ models and the text-only fallback; the client is created on first use."""
+    get_client_registry().configure_groq(api_key)
+
+
+GEMINI_FALLBACK_MODEL = "gemini-1.5-flash"
+DEFAULT_GROQ_MODEL = "groq/llama-3.3-70b-versatile"
+
+
+def register_provider(prefix, invoke):
+    """Routes models named `<prefix>...` to `invoke` instead of Gemini/Groq."""
+    _providers[prefix] = invoke
+
+
+def unregister_provider(prefix):
+    _providers.pop(prefix, None)
+
+
+def _custom_provider(model_name):
+    for prefix, invoke in _providers.items():
+        if model_name.startswith(prefix):
+            return invoke
+    return None
+
+
+def provider_name(model_name):
+    """"gemini", "groq", or the registered prefix (without "/") for custom providers."""
+    for prefix in _providers:
+        if model_name.startswith(prefix):
+            return prefix.rstrip("/")
+    return "groq" if model_name.startswith("groq/") else "gemini"
+
+
+def _finish_span(attrs, model_name, text, served=None, cache_hit=False):
+    """Fills the llm span attributes and the matching counters."""
+    used = served[0] if served else model_name
+    attrs["cache_hit"] = cache_hit
+    attrs["served_by"] = "cache" if cache_hit else used
+    attrs["provider"] = "cache" if cache_hit else provider_name(used)
+    attrs["fallback_taken"] = not cache_hit and used != model_name
+    if text is not None:
+        attrs["response_chars"] = len(text)
+        attrs["response_tokens_est"] = estimate_tokens(text)
+        telemetry.inc("career_llm_tokens_estimated_total", attrs["response_tokens_est"], direction="response")
+    telemetry.inc("career_llm_tokens_estimated_total", attrs["prompt_tokens_est"], direction="prompt")
+    telemetry.inc("career_llm_calls_total", provider=attrs["provider"], cache_hit=cache_hit,
+                  fallback=attrs["fallback_taken"], status="error" if "error" in attrs else "ok")
+
+
+def _llm_span_attrs(model_name, prompt, image_data, stream=False):
+    return {
+        "model": model_name,
+        "stream": stream,
+        "image": image_data is not None,
+        "prompt_chars": len(prompt),
+        "prompt_tokens_est": estimate_tokens(prompt),
+    }
+
+
+def record_response(model_name, prompt, text):
+    """
+    Appends a fresh completion to LLM_RECORD_PATH (JSONL) when that is set, so
+    real sessions can later be replayed offline by the fake provider.
+    """
+    path = os.getenv("LLM_RECORD_PATH")
+    if not path or text is None:
+        return
+    line = json.dumps({
+        "model": model_name,
+        "prompt_sha256": hashlib.sha256(prompt.encode("utf-8", "replace")).hexdigest(),
+        "response": text,
+    }, ensure_ascii=False)
+    with _record_lock, open(path, "a", encoding="utf-8") as f:
+        f.write(line + "\n")
+
+
+def _gemini_chunks(response):
+    for chunk in response:
+        try:
+            text = chunk.text
+        except ValueError:
+            # Chunks without text parts (e.g. the final finish-reason chunk)
+            continue
+        if text:
+            yield text
+
+
+def _invoke_model(model_name, prompt, image_data=None, stream=False, json_schema=None):
+    """
+    One call to one model, no fallback. Returns the reply text, or an iterator
+    of text chunks when stream=True. Waits for rate-limit admission first.
+    With `json_schema` the provider's JSON mode is switched on.
+    """
+    tokens = estimate_tokens(prompt) + OUTPUT_TOKEN_RESERVE
+    return get_rate_limiter().call(
+        provider_name(model_name), model_name.replace("models/", ""), tokens,
+        lambda: _call_provider(model_name, prompt, image_data, stream, json_schema),
+    )
+
+
+def _call_provider(model_name, prompt, image_data, stream, json_schema=None):
+    custom = _custom_provider(model_name)
+    if custom:
+        return custom(model_name, prompt, image_data, stream)
+
+    # GROQ LOGIC
+    if model_name.startswith("groq/"):
+        client = get_client_registry().groq()
+        if not client:
+            raise RuntimeError("GROQ_API_KEY not found in secrets.")
+        # Groq's JSON mode guarantees valid JSON but not the schema; the prompt describes the fields
+        extra = {"response_format": {"type": "json_object"}} if json_schema else {}
+        completion = client.chat.completions.create(
+            messages=[{"role": "user", "content": prompt}],
+            model=model_name.replace("groq/", ""),
+            stream=stream,
+            **extra,
+        )
+        if stream:
+            return (c.choices[0].delta.content for c in completion if c.choices and c.choices[0].delta.content)
+        return completion.choices[0].message.content
+
+    # GEMINI LOGIC (Default)
+    model = get_client_registry().gemini_model(model_name)
+    # image_data: a PIL image, or a list of inline-data parts (see image_prep.as_gemini_parts)
+    if isinstance(image_data, list):
+        contents = [prompt, *image_data]
+    else:
+        contents = [prompt, image_data] if image_data else prompt
+    config = {"response_mime_type": "application/json", "response_schema": json_schema} if json_schema else None
+    response = model.generate_content(contents, stream=stream, generation_config=config)
+    return _gemini_chunks(response) if stream else response.text
+
+
+def model_candidates(model_name, image_data=None):
+    """Primary model first, then gemini-1.5-flash, then Groq (text-only, when configured)."""
+    if _custom_provider(model_name):
+        return [model_name]
+    candidates = [model_name]
+    if model_name.replace("models/", "") != GEMINI_FALLBACK_MODEL:
+        candidates.append(GEMINI_FALLBACK_MODEL)
+    # Read lazily: .env is loaded after this module is imported
+    groq_model = os.getenv("GROQ_MODEL") or DEFAULT_GROQ_MODEL
+    if get_client_registry().has_groq and image_data is None and groq_model not in candidates:
+        candidates.append(groq_model)
+    return candidates
+
+
+def _guard_stream(chunks, model_name):
+    """
+    Pulls the first chunk inside the router attempt, so a model that fails before
+    producing anything falls through to the next candidate. A failure after that
+    is recorded against the model and re-raised: its text is already out.
+    """
+    chunks = iter(chunks)
+    first = next(chunks, None)
+
+    def rest():
+        if first is not None:
+            yield first
+        try:
+            yield from chunks
+        except Exception as e:
+            get_router().record_failure(model_name, e)
+            raise
+
+    return rest()
+
+
+def generate_with_fallback(model_name, prompt, image_data=None, stream=False, hedge=False, served=None,
+                           json_schema=None):
+    """
+    Generates with the primary model and falls back through model_candidates
+    on 404, 429, 5xx and timeouts (see provider_router.should_fall_back).
+    The router remembers model health, so a model that keeps failing (e.g. 404)
+    is skipped until its cooldown expires instead of being retried every call.
+    A stream falls back only until its first chunk has arrived.
+    With hedge=True a second provider is raced once the first runs past its p95 latency.
+    Pass a list as `served` to have the name of the model that answered appended to it.
+    """
+    def invoke(m):
+        result = _invoke_model(m, prompt, image_data, stream, json_schema)
+        if stream:
+            result = _guard_stream(result, m)
+        if served is not None:
+            served.append(m)
+        return result
+
+    return get_router().call(
+        model_candidates(model_name, image_data),
+        invoke,
+        hedge=hedge and not stream,
+        record_latency=not stream,
+    )
+
+
+def query_llm(prompt, model_name, image_data=None, use_cache=True, hedge=False, json_schema=None):
+    """
+    Unified function to query either Gemini or Groq.
+    Successful responses are cached on disk; pass use_cache=False to force a fresh call.
+    Concurrent identical requests are coalesced into one provider call.
+    `json_schema` turns on the provider's JSON mode (see structured_output).
+    """
+    with telemetry.span("llm", **_llm_span_attrs(model_name, prompt, image_data)) as attrs:
+        response_cache = get_response_cache()
+        cache_key = None
+        if use_cache and response_cache.enabled:
+            cache_key = response_cache.make_key(model_name, prompt, image_data)
+            cached = response_cache.get(cache_key)
+            if cached is not None:
+                _finish_span(attrs, model_name, cached, cache_hit=True)
+                return cached
+
+        served = []
+        flight_key = cache_key or response_cache.make_key(model_name, prompt, image_data)
+        try:
+            text, shared = _inflight.do(
+                flight_key, lambda: generate_with_fallback(model_name, prompt, image_data, hedge=hedge, served=served,
+                                                           json_schema=json_schema))
+        except Exception as e:
+            attrs["error"] = str(e)
+            _finish_span(attrs, model_name, None)
+            return f"Error generating content: {str(e)}"
+        attrs["coalesced"] = shared
+        _finish_span(attrs, model_name, text, served)
+
+    if shared:
+        # The call that actually ran has already cached and recorded the reply
+        return text
+    # Errors are returned above, so only real completions reach the cache
+    if cache_key:
+        response_cache.set(cache_key, text, model_name)
+    record_response(model_name, prompt, text)
+    return text
+
+
+class LLMStream:
+    """
+    Streaming counterpart of query_llm. Iterate it (e.g. with st.write_stream)
+    to receive chunks as the provider produces them; afterwards `text` holds
+    the complete reply and `first_token_latency` the time-to-first-token in seconds.
+    """
+
+    def __init__(self, prompt, model_name, image_data=None, use_cache=True, json_schema=None):
+        self.prompt = prompt
+        self.model_name = model_name
+        self.image_data = image_data
+        self.use_cache = use_cache
+        self.json_schema = json_schema
+        self.text = ""
+        self.first_token_latency = None
+        self.cached = False
+
+    def __iter__(self):
+        with telemetry.span("llm", **_llm_span_attrs(self.model_name, self.prompt, self.image_data, stream=True)) as attrs:
+            yield from self._generate(attrs)
+            attrs["first_token_s"] = round(self.first_token_latency or 0.0, 6)
+
+    def _generate(self, attrs):
+        start = time.perf_counter()
+        response_cache = get_response_cache()
+        cache_key = None
+        if self.use_cache and response_cache.enabled:
+            cache_key = response_cache.make_key(self.model_name, self.prompt, self.image_data)
+            cached = response_cache.get(cache_key)
+            if cached is not None:
+                self.cached = True
+                self.first_token_latency = time.perf_counter() - start
+                self.text = cached
+                _finish_span(attrs, self.model_name, cached, cache_hit=True)
+                yield cached
+                return
+
+        parts = []
+        served = []
+        try:
+            for chunk in generate_with_fallback(self.model_name, self.prompt, self.image_data, stream=True, served=served,
+                                                json_schema=self.json_schema):
+                if self.first_token_latency is None:
+                    self.first_token_latency = time.perf_counter() - start
+                parts.append(chunk)
+                yield chunk
+        except Exception as e:
+            error = f"Error generating content: {str(e)}"
+            attrs["error"] = str(e)
+            # Keep whatever already streamed, then surface the error like query_llm does
+            error_chunk = f"\n\n{error}" if parts else error
+            parts.append(error_chunk)
+            self.text = "".join(parts)
+            _finish_span(attrs, self.model_name, self.text, served)
+            yield error_chunk
+            return
+
+        self.text = "".join(parts)
+        _finish_span(attrs, self.model_name, self.text, served)
+        if cache_key:
+            response_cache.set(cache_key, self.text, self.model_name)
+        record_response(self.model_name, self.prompt, self.text)
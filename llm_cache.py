@@ -0,0 +1,190 @@
+"""
+Disk-backed, content-addressed cache for LLM responses.
+
+Entries are keyed on (model name, prompt hash, attached image hash) and stored
+in a small SQLite file so they survive Streamlit reruns and restarts.
+Eviction is LRU by last access, bounded by total size and a TTL.
+"""
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+DEFAULT_CACHE_DIR = Path(__file__).parent / ".cache" / "llm"
+
+
+def _env_flag(name, default=False):
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+def hash_image(image_data):
+    """Stable hash for an attached image (PIL Image, raw bytes, inline-data parts or None)."""
+    if image_data is None:
+        return ""
+    h = hashlib.sha256()
+    if isinstance(image_data, list):
+        for part in image_data:
+            h.update(hash_image(part).encode())
+    elif isinstance(image_data, dict):
+        h.update(str(image_data.get("mime_type", "")).encode())
+        h.update(bytes(image_data.get("data", b"")))
+    elif isinstance(image_data, (bytes, bytearray, memoryview)):
+        h.update(bytes(image_data))
+    elif hasattr(image_data, "tobytes"):
+        # PIL images: include mode/size so identical pixel buffers of different shapes differ
+        h.update(f"{getattr(image_data, 'mode', '')}:{getattr(image_data, 'size', '')}".encode())
+        h.update(image_data.tobytes())
+    else:
+        h.update(repr(image_data).encode("utf-8", "replace"))
+    return h.hexdigest()
+
+
+class ResponseCache:
+    """LRU + TTL cache of LLM completions persisted in SQLite."""
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_bytes=64 * 1024 * 1024,
+                 ttl_seconds=24 * 3600, enabled=True):
+        self.cache_dir = Path(cache_dir)
+        self.db_path = self.cache_dir / "responses.sqlite3"
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        if self.enabled:
+            self._init_db()
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path, timeout=10)
+
+    def _init_db(self):
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            with self._connect() as conn:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute("""
+                    CREATE TABLE IF NOT EXISTS responses (
+                        key TEXT PRIMARY KEY,
+                        model TEXT,
+                        value TEXT NOT NULL,
+                        size INTEGER NOT NULL,
+                        created REAL NOT NULL,
+                        accessed REAL NOT NULL
+                    )
+                """)
+                conn.execute("CREATE INDEX IF NOT EXISTS idx_accessed ON responses (accessed)")
+        except (sqlite3.Error, OSError):
+            # An unwritable cache dir should never break the app; just run uncached.
+            self.enabled = False
+
+    @staticmethod
+    def make_key(model_name, prompt, image_data=None):
+        prompt_hash = hashlib.sha256(prompt.encode("utf-8", "replace")).hexdigest()
+        raw = f"{model_name}\x00{prompt_hash}\x00{hash_image(image_data)}"
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    def get(self, key):
+        if not self.enabled:
+            return None
+        now = time.time()
+        try:
+            with self._lock, self._connect() as conn:
+                row = conn.execute("SELECT value, created FROM responses WHERE key = ?", (key,)).fetchone()
+                if row and self.ttl_seconds and now - row[1] > self.ttl_seconds:
+                    conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    self.evictions += 1
+                    row = None
+                if row is None:
+                    self.misses += 1
+                    return None
+                conn.execute("UPDATE responses SET accessed = ? WHERE key = ?", (now, key))
+                self.hits += 1
+                return row[0]
+        except sqlite3.Error:
+            self.misses += 1
+            return None
+
+    def set(self, key, value, model_name=""):
+        if not self.enabled or value is None:
+            return
+        now = time.time()
+        size = len(value.encode("utf-8", "replace"))
+        if size > self.max_bytes:
+            return
+        try:
+            with self._lock, self._connect() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO responses (key, model, value, size, created, accessed) VALUES (?, ?, ?, ?, ?, ?)",
+                    (key, model_name, value, size, now, now),
+                )
+                self._evict(conn, now)
+        except sqlite3.Error:
+            pass
+
+    def _evict(self, conn, now):
+        if self.ttl_seconds:
+            cur = conn.execute("DELETE FROM responses WHERE created < ?", (now - self.ttl_seconds,))
+            self.evictions += max(cur.rowcount, 0)
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        # Drop least recently used entries until we are back under the size budget
+        for key, size in conn.execute("SELECT key, size FROM responses ORDER BY accessed ASC").fetchall():
+            conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            self.evictions += 1
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    def clear(self):
+        if not self.enabled:
+            return
+        with self._lock, self._connect() as conn:
+            conn.execute("DELETE FROM responses")
+
+    def stats(self):
+        entries, total = 0, 0
+        if self.enabled:
+            try:
+                with self._connect() as conn:
+                    entries, total = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+            except sqlite3.Error:
+                pass
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "entries": entries,
+            "bytes": total,
+        }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_response_cache():
+    """
+    Process-wide cache instance, configured from the environment:
+    LLM_CACHE_DISABLED, LLM_CACHE_DIR, LLM_CACHE_MAX_MB, LLM_CACHE_TTL_HOURS.
+    """
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ResponseCache(
+                cache_dir=os.getenv("LLM_CACHE_DIR") or DEFAULT_CACHE_DIR,
+                max_bytes=int(float(os.getenv("LLM_CACHE_MAX_MB", "64")) * 1024 * 1024),
+                ttl_seconds=float(os.getenv("LLM_CACHE_TTL_HOURS", "24")) * 3600,
+                enabled=not _env_flag("LLM_CACHE_DISABLED"),
+            )
+        return _cache
@@ -0,0 +1,284 @@
+"""
+PDF text extraction engine.
+
+- Results are cached in memory by the SHA-256 of the file bytes, so re-running an
+  analysis on the same upload does not re-parse it.
+- Every page is extracted exactly once. A failed page contributes no text.
+- Short documents (a typical CV) are read in-process, page by page, against a
+  budget of `page_timeout` per page checked between pages: no inter-process
+  transfer, no second parse.
+- Documents of at least `parallel_min_pages` pages fan out over a long-lived
+  pool of worker processes shared by all sessions. Each page's clock starts
+  when a worker picks it up, not while it waits behind other documents; a page
+  over its limit has just its own worker killed (the pool replaces it), so the
+  pages other sessions have in flight are unaffected.
+- Each worker parses a document once and keeps the parsed reader (by content
+  hash) for the other pages of that document it is handed.
+- A page-count limit keeps a huge PDF from tying up the pool.
+"""
+import hashlib
+import io
+import multiprocessing
+import os
+import signal
+import tempfile
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from itertools import count
+
+import telemetry
+
+PDFExtraction = namedtuple("PDFExtraction", ["text", "pages", "pages_read", "skipped_pages", "truncated", "cached"])
+
+# Seconds to wait for a new pool's workers to come up (not billed to any page)
+POOL_START_TIMEOUT = 60.0
+# Parsed documents each worker keeps
+WORKER_READER_CACHE = 4
+# How often a waiting extraction checks its pages' clocks
+POLL_INTERVAL = 0.05
+KILL_SIGNAL = getattr(signal, "SIGKILL", signal.SIGTERM)
+
+# --- WORKER PROCESS STATE ---
+_worker_readers = OrderedDict()
+_started_queue = None
+
+
+def _init_worker(started_queue):
+    global _started_queue
+    _started_queue = started_queue
+
+
+def _worker_ready():
+    return os.getpid()
+
+
+def _extract_page(token, digest, path, index):
+    # Tells the parent this page's clock starts now, and in which process
+    _started_queue.put((token, os.getpid(), time.time()))
+    reader = _worker_readers.get(digest)
+    if reader is None:
+        import PyPDF2
+        with open(path, "rb") as f:
+            reader = PyPDF2.PdfReader(io.BytesIO(f.read()))
+        _worker_readers[digest] = reader
+        while len(_worker_readers) > WORKER_READER_CACHE:
+            _worker_readers.popitem(last=False)
+    else:
+        _worker_readers.move_to_end(digest)
+    return reader.pages[index].extract_text() or ""
+
+
+def _page_text(result):
+    """Text of a finished page; "" if it raised."""
+    try:
+        return result.get(timeout=0)
+    except Exception:
+        return ""
+
+
+def read_bytes(source):
+    """Accepts raw bytes, a path, or a file-like object (e.g. Streamlit's UploadedFile)."""
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return bytes(source)
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, "rb") as f:
+            return f.read()
+    if hasattr(source, "getvalue"):
+        return source.getvalue()
+    pos = source.tell() if hasattr(source, "tell") else None
+    data = source.read()
+    if pos is not None and hasattr(source, "seek"):
+        source.seek(pos)
+    return data
+
+
+def _pool_context():
+    # forkserver/spawn avoid forking a multi-threaded Streamlit server process
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+
+
+class PDFTextExtractor:
+    def __init__(self, max_pages=50, page_timeout=10.0, parallel_min_pages=8, max_workers=None, cache_size=32):
+        self.max_pages = max_pages
+        self.page_timeout = page_timeout
+        self.parallel_min_pages = parallel_min_pages
+        self.max_workers = max_workers or min(4, os.cpu_count() or 1)
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self._pool = None
+        self._pool_lock = threading.Lock()
+        self._started_queue = None
+        # token -> (worker pid, start time) and worker pid -> token it is working on
+        self._started = {}
+        self._worker_tokens = {}
+        self._tokens = count()
+
+    def extract(self, source):
+        with telemetry.span("pdf_extract") as attrs:
+            result = self._extract(source)
+            attrs.update(pages=result.pages, pages_read=result.pages_read, skipped_pages=len(result.skipped_pages),
+                         cached=result.cached, text_chars=len(result.text))
+            return result
+
+    def _extract(self, source):
+        data = read_bytes(source)
+        digest = hashlib.sha256(data).hexdigest()
+        key = (digest, self.max_pages)
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                return self._cache[key]._replace(cached=True)
+
+        # Imported here so tools that never read a PDF do not pay for it
+        import PyPDF2
+        reader = PyPDF2.PdfReader(io.BytesIO(data))
+        total = len(reader.pages)
+        n = min(total, self.max_pages) if self.max_pages else total
+
+        if n >= self.parallel_min_pages and self.max_workers > 1:
+            # Workers open the document from disk instead of receiving its bytes with every page
+            fd, path = tempfile.mkstemp(suffix=".pdf")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(data)
+                texts = self._extract_parallel(digest, path, n)
+            finally:
+                os.unlink(path)
+        else:
+            texts = self._extract_serial(reader, n)
+
+        skipped = [i for i, t in enumerate(texts) if t is None]
+        result = PDFExtraction(
+            # A form feed between pages lets compaction find running headers and footers
+            text="\n\f\n".join(t for t in texts if t),
+            pages=total,
+            pages_read=n - len(skipped),
+            skipped_pages=skipped,
+            truncated=n < total,
+            cached=False,
+        )
+        # Partial results (timeouts) are not cached so a later retry can do better
+        if not skipped:
+            with self._lock:
+                self._cache[key] = result
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return result
+
+    def _extract_serial(self, reader, n):
+        # In-process extraction cannot be pre-empted, so the limit is enforced
+        # between pages, against page_timeout for every page read so far.
+        start = time.monotonic()
+        texts = [None] * n
+        for i in range(n):
+            if i and time.monotonic() - start > self.page_timeout * i:
+                break
+            try:
+                texts[i] = reader.pages[i].extract_text() or ""
+            except Exception:
+                texts[i] = ""
+        return texts
+
+    # --- worker pool ---
+
+    def _get_pool(self):
+        with self._pool_lock:
+            if self._pool is None:
+                ctx = _pool_context()
+                self._started_queue = ctx.SimpleQueue()
+                pool = ctx.Pool(self.max_workers, initializer=_init_worker, initargs=(self._started_queue,))
+                # Workers import on start-up (forkserver/spawn); wait here so that is not billed to a page
+                pool.apply_async(_worker_ready).get(timeout=POOL_START_TIMEOUT)
+                self._pool = pool
+            return self._pool
+
+    def _drain_started(self):
+        """Records the pages workers have picked up since the last call."""
+        with self._pool_lock:
+            queue = self._started_queue
+            while queue is not None and not queue.empty():
+                token, pid, started = queue.get()
+                self._started[token] = (pid, started)
+                self._worker_tokens[pid] = token
+
+    def _kill_page(self, token):
+        """Kills the worker running page `token`; the pool starts a replacement."""
+        with self._pool_lock:
+            pid = self._started[token][0]
+            # A worker that has moved on to another page has already finished this one
+            if self._worker_tokens.get(pid) != token:
+                return False
+            del self._worker_tokens[pid]
+            try:
+                os.kill(pid, KILL_SIGNAL)
+            except OSError:
+                pass
+            return True
+
+    def _extract_parallel(self, digest, path, n):
+        pool = self._get_pool()
+        waiting = {}
+        for i in range(n):
+            token = next(self._tokens)
+            waiting[i] = (token, pool.apply_async(_extract_page, (token, digest, path, i)))
+        tokens = [token for token, _ in waiting.values()]
+        texts = [None] * n
+        try:
+            while waiting:
+                self._drain_started()
+                now = time.time()
+                for i, (token, result) in list(waiting.items()):
+                    if result.ready():
+                        texts[i] = _page_text(result)
+                        del waiting[i]
+                    elif token in self._started and now - self._started[token][1] > self.page_timeout:
+                        # Skipped unless it finished while we looked
+                        if not self._kill_page(token) and result.wait(POOL_START_TIMEOUT):
+                            texts[i] = _page_text(result)
+                        del waiting[i]
+                if waiting:
+                    next(iter(waiting.values()))[1].wait(POLL_INTERVAL)
+        finally:
+            with self._pool_lock:
+                for token in tokens:
+                    self._started.pop(token, None)
+        return texts
+
+    def clear_cache(self):
+        with self._lock:
+            self._cache.clear()
+
+    def close(self):
+        """Stops the worker pool; it is restarted on the next extraction."""
+        with self._pool_lock:
+            pool, self._pool = self._pool, None
+            self._started_queue = None
+            self._started.clear()
+            self._worker_tokens.clear()
+        if pool is not None:
+            pool.terminate()
+            pool.join()
+
+
+_extractor = None
+_extractor_lock = threading.Lock()
+
+
+def get_pdf_extractor():
+    """
+    Process-wide extractor, configured from the environment:
+    PDF_MAX_PAGES, PDF_PAGE_TIMEOUT, PDF_PARALLEL_MIN_PAGES, PDF_WORKERS.
+    """
+    global _extractor
+    with _extractor_lock:
+        if _extractor is None:
+            _extractor = PDFTextExtractor(
+                max_pages=int(os.getenv("PDF_MAX_PAGES", "50")),
+                page_timeout=float(os.getenv("PDF_PAGE_TIMEOUT", "10")),
+                parallel_min_pages=int(os.getenv("PDF_PARALLEL_MIN_PAGES", "8")),
+                max_workers=int(os.getenv("PDF_WORKERS", "0")) or None,
+            )
+        return _extractor
@@ -0,0 +1,251 @@
+"""
+PDF rendering engine behind create_pdf, plus batch export.
+
+- Markdown is parsed once into a block list (h1/h2/h3/body); the latin-1
+  clean-up runs once over the whole document, not per line.
+- Font and color are only switched when the block style changes, and runs of
+  body lines go into one multi_cell call.
+- multi_cell itself is where fpdf spent most of the time: it measures the text
+  one character per loop iteration. FastFPDF finds the same line breaks from a
+  prefix sum of character widths and a bisect per line, and emits the same
+  cells and word spacing, so the PDF is byte-for-byte what fpdf would produce.
+- Themes (heading color + per-block styles) are cached by theme_color.
+- render_batch renders many resumes across a process pool and streams each PDF
+  to a directory or a zip file as soon as it is ready.
+
+    python pdf_render.py --input resumes_md/ --out resumes.zip --theme "#4b6cb7"
+"""
+import argparse
+import bisect
+import functools
+import itertools
+import multiprocessing
+import os
+import sys
+import zipfile
+from collections import namedtuple
+from pathlib import Path
+
+Block = namedtuple("Block", ["kind", "text"])
+Style = namedtuple("Style", ["font_style", "size", "color", "line_height"])
+Theme = namedtuple("Theme", ["color", "styles"])
+
+HEADING_PREFIXES = (("### ", "h3"), ("## ", "h2"), ("# ", "h1"))
+BLACK = (0, 0, 0)
+
+
+def _to_latin1(text):
+    try:
+        return text.encode("latin-1", "replace").decode("latin-1")
+    except Exception:
+        return text.encode("ascii", "ignore").decode("ascii")
+
+
+def parse_markdown(markdown_text):
+    """Block list for the resume Markdown; consecutive body lines are merged into one block."""
+    blocks = []
+    body = []
+    for line in _to_latin1(markdown_text).split("\n"):
+        for prefix, kind in HEADING_PREFIXES:
+            if line.startswith(prefix):
+                if body:
+                    blocks.append(Block("body", "\n".join(body)))
+                    body = []
+                blocks.append(Block(kind, line[len(prefix):]))
+                break
+        else:
+            body.append(line.replace("**", "").replace("* ", "• "))
+    if body:
+        blocks.append(Block("body", "\n".join(body)))
+    return blocks
+
+
+@functools.lru_cache(maxsize=64)
+def get_theme(theme_color="#000000"):
+    color = theme_color.lstrip("#")
+    try:
+        rgb = (int(color[0:2], 16), int(color[2:4], 16), int(color[4:6], 16))
+    except ValueError:
+        rgb = BLACK
+    return Theme(rgb, {
+        "h1": Style("B", 16, rgb, 10),
+        "h2": Style("B", 14, rgb, 10),
+        "h3": Style("B", 12, rgb, 10),
+        "body": Style("", 11, BLACK, 6),
+    })
+
+
+def wrap_paragraph(text, char_widths, wmax):
+    """
+    Lines of one paragraph as fpdf's multi_cell breaks them: (line, spaces, width)
+    for a line broken at a space (spaces and width up to, not including, that
+    space, for word spacing), or (line, None, None) for a forced break or the
+    last line. Widths are in font units (1/1000 of the font size).
+    """
+    prefix = [0, *itertools.accumulate(map(char_widths.get, text, itertools.repeat(0)))]
+    lines = []
+    start, end = 0, len(text)
+    while True:
+        # First character that no longer fits on the line started at `start`
+        i = bisect.bisect_right(prefix, prefix[start] + wmax, start + 1) - 1
+        while i < end and prefix[i + 1] - prefix[start] <= wmax:
+            i += 1
+        while i > start and prefix[i] - prefix[start] > wmax:
+            i -= 1
+        if i >= end:
+            lines.append((text[start:], None, None))
+            return lines
+        sep = text.rfind(" ", start, i + 1)
+        if sep == -1:
+            stop = i + 1 if i == start else i
+            lines.append((text[start:stop], None, None))
+            start = stop
+        else:
+            lines.append((text[start:sep], text.count(" ", start, sep + 1), prefix[sep] - prefix[start]))
+            start = sep + 1
+
+
+@functools.lru_cache(maxsize=1)
+def _pdf_class():
+    from fpdf import FPDF
+    from fpdf.php import sprintf
+
+    class FastFPDF(FPDF):
+        def multi_cell(self, w, h, txt="", border=0, align="J", fill=0, split_only=False):
+            # Borders, split_only and TTF (unicode) fonts keep fpdf's own implementation
+            if border or split_only or self.unifontsubset or not self.page:
+                return super().multi_cell(w, h, txt, border, align, fill, split_only)
+            if w == 0:
+                w = self.w - self.r_margin - self.x
+            wmax = (w - 2 * self.c_margin) * 1000.0 / self.font_size
+            s = txt.replace("\r", "")
+            if s.endswith("\n"):
+                s = s[:-1]
+            for paragraph in s.split("\n"):
+                for line, spaces, width in wrap_paragraph(paragraph, self.current_font["cw"], wmax):
+                    if spaces is None:
+                        if self.ws > 0:
+                            self.ws = 0
+                            self._out("0 Tw")
+                    elif align == "J":
+                        self.ws = (wmax - width) / 1000.0 * self.font_size / (spaces - 1) if spaces > 1 else 0
+                        self._out(sprintf("%.3f Tw", self.ws * self.k))
+                    self.cell(w, h, line, 0, 2, align, fill)
+            self.x = self.l_margin
+            return []
+
+    return FastFPDF
+
+
+def render_pdf(markdown_text, theme_color="#000000"):
+    """PDF bytes for one resume."""
+    theme = get_theme(theme_color)
+    pdf = _pdf_class()()
+    pdf.add_page()
+    pdf.set_auto_page_break(auto=True, margin=15)
+    current = None
+    for kind, text in parse_markdown(markdown_text):
+        style = theme.styles[kind]
+        if style is not current:
+            pdf.set_font("Arial", style.font_style, style.size)
+            pdf.set_text_color(*style.color)
+            current = style
+        if kind == "body":
+            # The bullet substitution above can reintroduce non-latin-1 characters
+            text = _to_latin1(text)
+            # multi_cell drops one trailing newline; keep the blank line a per-line render would emit
+            if text.endswith("\n"):
+                text += "\n"
+            pdf.multi_cell(0, style.line_height, text)
+        else:
+            pdf.cell(0, style.line_height, text, ln=True)
+    return pdf.output(dest="S").encode("latin-1")
+
+
+# --- BATCH RENDERING ---
+
+def _pool_context():
+    # forkserver/spawn avoid forking a multi-threaded Streamlit server process
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+
+
+def _render_item(item):
+    name, markdown_text, theme_color = item
+    try:
+        return name, render_pdf(markdown_text, theme_color), None
+    except Exception as e:
+        return name, None, f"{type(e).__name__}: {e}"
+
+
+class _DirSink:
+    def __init__(self, path):
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+
+    def write(self, name, data):
+        (self.path / name).write_bytes(data)
+
+    def close(self):
+        pass
+
+
+class _ZipSink:
+    def __init__(self, path):
+        # PDFs are already compressed; storing them keeps the writer from becoming the bottleneck
+        self.zip = zipfile.ZipFile(path, "w", compression=zipfile.ZIP_STORED)
+
+    def write(self, name, data):
+        self.zip.writestr(name, data)
+
+    def close(self):
+        self.zip.close()
+
+
+def render_batch(items, out, theme_color="#000000", workers=None, chunksize=8):
+    """
+    Renders (name, markdown) pairs to `out` (a directory, or a .zip file) and
+    returns {"rendered", "bytes", "errors": {name: message}}. PDFs are written
+    as workers finish them, so memory stays flat for large batches.
+    """
+    sink = _ZipSink(out) if str(out).lower().endswith(".zip") else _DirSink(out)
+    workers = workers or os.cpu_count() or 1
+    jobs = ((f"{Path(name).stem}.pdf", md, theme_color) for name, md in items)
+    summary = {"rendered": 0, "bytes": 0, "errors": {}}
+    pool = _pool_context().Pool(workers) if workers > 1 else None
+    try:
+        results = pool.imap_unordered(_render_item, jobs, chunksize) if pool else map(_render_item, jobs)
+        for name, data, error in results:
+            if error:
+                summary["errors"][name] = error
+                continue
+            sink.write(name, data)
+            summary["rendered"] += 1
+            summary["bytes"] += len(data)
+    finally:
+        sink.close()
+        if pool is not None:
+            pool.terminate()
+            pool.join()
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render Markdown resumes to PDF in bulk.")
+    parser.add_argument("--input", required=True, help="directory of .md resumes")
+    parser.add_argument("--out", required=True, help="output directory, or a .zip file")
+    parser.add_argument("--theme", default="#4b6cb7", help="heading color")
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    paths = sorted(Path(args.input).glob("*.md"))
+    items = ((p.name, p.read_text(encoding="utf-8", errors="replace")) for p in paths)
+    summary = render_batch(items, args.out, args.theme, args.workers)
+    for name, error in summary["errors"].items():
+        print(f"{name}: {error}", file=sys.stderr)
+    print(f"rendered {summary['rendered']} of {len(paths)} resumes ({summary['bytes']:,} bytes) to {args.out}", file=sys.stderr)
+    return 1 if summary["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,295 @@
+"""
+Resume analysis and generation pipeline (no Streamlit dependency).
+
+Used by app.py and by batch_analyze.py for headless runs. fpdf and the
+catalog modules (pandas, numpy, scipy) are imported inside the steps that
+use them, so e.g. the chatbot never loads them.
+"""
+import json
+import threading
+
+import telemetry
+from jobs import get_job_executor, job_key
+from llm import LLMStream, query_llm
+from llm_cache import get_response_cache
+from pdf_render import render_pdf
+from prompt_compaction import compact_for_model
+from structured_output import generate_structured
+
+RESUME_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "name": {"type": "string"},
+        "email": {"type": "string"},
+        "phone": {"type": "string"},
+        "links": {"type": "string", "description": "LinkedIn / GitHub / portfolio URLs"},
+        "summary": {"type": "string"},
+        "experience": {"type": "string", "description": "roles, employers, dates and achievements, as text"},
+        "education": {"type": "string"},
+        "skills": {"type": "string", "description": "comma-separated"},
+        "certifications": {"type": "string"},
+    },
+    # Contact details and certifications may legitimately be absent; only these are re-asked
+    "required": ["name", "experience", "education", "skills"],
+}
+
+SKILL_GAP_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "matching_skills": {"type": "array", "items": {"type": "string"},
+                            "description": "skills the JD asks for that the resume shows"},
+        "missing_skills": {"type": "array", "items": {"type": "string"},
+                           "description": "skills the JD asks for that the resume lacks, short names"},
+        "verdict": {"type": "string", "description": "2-3 sentences on fit and the most important gap"},
+    },
+    "required": ["matching_skills", "missing_skills", "verdict"],
+}
+
+
+def parse_resume_to_json(text, model_name, on_partial=None):
+    """
+    Resume form fields (RESUME_SCHEMA keys, "" when absent), or None if the model
+    returned nothing usable. `on_partial(dict)` sees the fields as they stream in.
+    """
+    # The resume is the whole prompt here, so it may use most of the budget
+    text = compact_for_model(text, "resume", model_name, share=0.9).text
+    prompt = f"""
+    Extract the candidate's details from the resume for a resume form.
+    RESUME TEXT: {text}
+    """
+    result = generate_structured(prompt, model_name, RESUME_SCHEMA, on_partial=on_partial)
+    if not result.data:
+        return None
+    return {key: result.data.get(key, "") for key in RESUME_SCHEMA["properties"]}
+
+
+def create_pdf(markdown_text, theme_color="#000000"):
+    return render_pdf(markdown_text, theme_color)
+
+
+def analyze_skill_gap(resume_text, job_desc, model_name):
+    """Full-mode comparison as a StructuredResult with SKILL_GAP_SCHEMA data."""
+    resume_text = compact_for_model(resume_text, "resume", model_name).text
+    job_desc = compact_for_model(job_desc, "jd", model_name).text
+    prompt = f"""
+    Compare RESUME and JD.
+    JD: {job_desc}
+    RESUME: {resume_text}
+    """
+    return generate_structured(prompt, model_name, SKILL_GAP_SCHEMA, hedge=True)
+
+
+SKILL_GAP_MODES = ("full", "assisted", "fast")
+
+
+def _bullets(items):
+    return "\n".join(f"- {item}" for item in items) if items else "- None"
+
+
+def local_verdict(screen):
+    """Coverage-based verdict used by fast mode (and as a fallback in assisted mode)."""
+    required = len(screen["matched"]) + len(screen["missing"])
+    if not required:
+        return "No catalog skills were detected in the job description; review it manually."
+    coverage = len(screen["matched"]) / required
+    level = "Strong match" if coverage >= 0.75 else "Partial match" if coverage >= 0.5 else "Weak match"
+    return f"{level}: {len(screen['matched'])} of {required} detected skills are on the resume ({coverage:.0%})."
+
+
+def format_skill_gap_report(screen, verdict):
+    return (
+        f"### 1. Matching Skills\n{_bullets(screen['matched'])}\n\n"
+        f"### 2. Missing Skills\n{_bullets(screen['missing'])}\n\n"
+        f"### 3. Verdict\n{verdict}"
+    )
+
+
+def skill_gap_verdict(screen, model_name):
+    """Assisted mode: the LLM only sees the precomputed skill lists, not the full documents."""
+    prompt = f"""
+    A candidate was screened against a job description.
+    Skills the job needs that the candidate HAS: {", ".join(screen["matched"]) or "none"}
+    Skills the job needs that the candidate LACKS: {", ".join(screen["missing"]) or "none"}
+    Other skills the candidate has: {", ".join(screen["resume_only"]) or "none"}
+    Write a 2-3 sentence verdict on fit and the most important gap to close.
+    """
+    return query_llm(prompt, model_name)
+
+
+def run_skill_gap(resume_text, job_desc, model_name, mode="full", courses_df=None):
+    """
+    Returns (report_markdown, missing_skills).
+    - full: the LLM compares the raw documents and returns SKILL_GAP_SCHEMA JSON.
+    - assisted: skills are matched locally; the LLM only writes the verdict.
+    - fast: everything is local, no LLM call.
+    """
+    telemetry.annotate(mode=mode, model=model_name)
+    if mode == "full":
+        result = analyze_skill_gap(resume_text, job_desc, model_name)
+        if result.error:
+            return result.error, []
+        screen = {"matched": result.data.get("matching_skills", []), "missing": result.data.get("missing_skills", [])}
+        return format_skill_gap_report(screen, result.data.get("verdict") or local_verdict(screen)), screen["missing"]
+
+    from skill_taxonomy import get_skill_taxonomy
+    with telemetry.span("skill_screen") as attrs:
+        screen = get_skill_taxonomy(courses_df).compare(resume_text, job_desc)
+        attrs.update(matched=len(screen["matched"]), missing=len(screen["missing"]))
+    verdict = local_verdict(screen)
+    if mode == "assisted":
+        reply = skill_gap_verdict(screen, model_name)
+        if not reply.startswith("Error"):
+            verdict = reply.strip()
+    return format_skill_gap_report(screen, verdict), screen["missing"]
+
+
+def rank_job_descriptions(resume_text, job_descs, model_name, mode="full", courses_df=None, top_k=3):
+    """
+    Ranks several JDs for one resume, best first. Every JD is scored locally
+    (jd_ranking); only the best `top_k` run through run_skill_gap, concurrently,
+    and gain an "analysis" (or "error"). Each row's "missing" comes from that
+    report when there is one and from the local screen otherwise; "courses" is
+    recommend_courses for it.
+    """
+    from jd_ranking import score_job_descriptions
+    with telemetry.span("jd_rank", jds=len(job_descs), top_k=top_k):
+        ranked = score_job_descriptions(resume_text, job_descs, courses_df)
+    top = ranked[:top_k]
+    reports = get_job_executor().gather(*[
+        lambda row=row: run_skill_gap(resume_text, job_descs[row["index"]], model_name, mode, courses_df)
+        for row in top
+    ])
+    for row, (analysis, missing) in zip(top, reports):
+        if analysis.startswith("Error"):
+            row["error"] = analysis
+        else:
+            row["analysis"] = analysis
+            row["missing"] = missing
+
+    # One catalog lookup for the union of every row's missing skills
+    all_missing = list(dict.fromkeys(skill for row in ranked for skill in row["missing"]))
+    recs = recommend_courses(all_missing, courses_df) if all_missing and courses_df is not None else {}
+    for row in ranked:
+        row["courses"] = {skill: recs[skill] for skill in row["missing"] if skill in recs}
+    return ranked
+
+
+def build_resume_prompt(user_data, job_desc):
+    return f"""
+    Create a resume (Markdown).
+    Details: {json.dumps(user_data)}
+    Target JD: {job_desc}
+    """
+
+
+def generate_resume(user_data, job_desc, model_name):
+    return query_llm(build_resume_prompt(user_data, job_desc), model_name)
+
+
+def stream_resume(user_data, job_desc, model_name):
+    return LLMStream(build_resume_prompt(user_data, job_desc), model_name)
+
+
+# Section -> (heading, user_data fields it is written from). A section is only
+# regenerated when one of its fields or the target JD changes.
+RESUME_SECTIONS = {
+    "summary": ("Professional Summary", ("summary", "experience", "skills")),
+    "experience": ("Experience", ("experience",)),
+    "education": ("Education", ("education",)),
+    "skills": ("Skills", ("skills",)),
+    "certifications": ("Certifications", ("certifications",)),
+}
+
+
+def build_section_prompt(section, user_data, job_desc):
+    title, fields = RESUME_SECTIONS[section]
+    return f"""
+    Write the "{title}" section of a resume in Markdown, starting with "## {title}".
+    Tailor it to the target job. Output only this section.
+    Details: {json.dumps({f: user_data.get(f, "") for f in fields})}
+    Target JD: {job_desc}
+    """
+
+
+def section_key(section, user_data, job_desc, model_name):
+    _, fields = RESUME_SECTIONS[section]
+    return job_key("resume_section", section, [user_data.get(f, "") for f in fields], job_desc, model_name)
+
+
+def resume_header(user_data):
+    contact = " | ".join(v for v in (user_data.get(k, "") for k in ("email", "phone", "links")) if v)
+    return f"# {user_data.get('name', '')}\n{contact}".strip()
+
+
+def assemble_resume(user_data, sections):
+    """Header plus the finished sections, in RESUME_SECTIONS order."""
+    parts = [resume_header(user_data)] + [sections[s] for s in RESUME_SECTIONS if sections.get(s)]
+    return "\n\n".join(parts)
+
+
+def generate_resume_sections(user_data, job_desc, model_name, on_progress=None):
+    """
+    Section-wise counterpart of generate_resume. Sections are generated in
+    parallel and cached by a hash of their inputs plus the JD, so after an edit
+    only the affected sections call the model. `on_progress` receives the
+    partially assembled resume each time a section finishes.
+    """
+    job_desc = compact_for_model(job_desc, "jd", model_name).text if job_desc else ""
+    cache = get_response_cache()
+    sections, lock = {}, threading.Lock()
+    pending = []
+    for section, (title, fields) in RESUME_SECTIONS.items():
+        if not any(str(user_data.get(f, "")).strip() for f in fields):
+            continue
+        cached = cache.get(section_key(section, user_data, job_desc, model_name))
+        if cached is not None:
+            sections[section] = cached
+        else:
+            pending.append(section)
+
+    def generate(section):
+        reply = query_llm(build_section_prompt(section, user_data, job_desc), model_name, use_cache=False)
+        if reply.startswith("Error"):
+            # Fall back to the user's own text for this section; not cached, so it is retried next time
+            title, fields = RESUME_SECTIONS[section]
+            reply = f"## {title}\n" + "\n".join(str(user_data.get(f, "")) for f in fields[:1])
+        else:
+            reply = reply.strip()
+            if not reply.startswith("#"):
+                reply = f"## {RESUME_SECTIONS[section][0]}\n{reply}"
+            cache.set(section_key(section, user_data, job_desc, model_name), reply, model_name)
+        with lock:
+            sections[section] = reply
+            partial = assemble_resume(user_data, sections)
+        if on_progress:
+            on_progress(partial)
+
+    telemetry.annotate(sections_cached=len(sections), sections_generated=len(pending))
+    if on_progress and sections:
+        on_progress(assemble_resume(user_data, sections))
+    get_job_executor().gather(*[lambda s=s: generate(s) for s in pending])
+    return assemble_resume(user_data, sections)
+
+
+def recommend_courses(missing_skills, courses_df, limit=2, semantic=True, min_score=None, top_k=None):
+    """
+    Up to `limit` courses per missing skill. Substring matches against the catalog
+    index come first; skills with none fall back to TF-IDF retrieval when
+    `semantic` is on (candidates: best `top_k` rows scoring at least `min_score`,
+    defaulting to course_retrieval.DEFAULT_TOP_K / DEFAULT_MIN_SCORE).
+    """
+    if courses_df is None or courses_df.empty: return {}
+    from course_index import get_course_index
+    from course_retrieval import DEFAULT_MIN_SCORE, DEFAULT_TOP_K, get_course_retriever
+    min_score = DEFAULT_MIN_SCORE if min_score is None else min_score
+    top_k = DEFAULT_TOP_K if top_k is None else top_k
+    with telemetry.span("course_match", skills=len(missing_skills), catalog_rows=len(courses_df)) as attrs:
+        # All skills are answered in one batched lookup against the prebuilt catalog index
+        recs = get_course_index(courses_df).lookup(missing_skills, limit)
+        attrs["substring_hits"] = len(recs)
+        unmatched = [s for s in dict.fromkeys(missing_skills) if s not in recs]
+        if semantic and unmatched:
+            recs.update(get_course_retriever(courses_df).recommend(unmatched, limit, top_k, min_score))
+            recs = {s: recs[s] for s in missing_skills if s in recs}
+        attrs["semantic_hits"] = len(recs) - attrs["substring_hits"]
+        return recs
@@ -0,0 +1,251 @@
+"""
+Compaction of resume / job-description text before it goes into a prompt.
+
+    result = compact(resume_text, "resume", max_tokens=3000)
+    result.text, result.bytes_saved, result.tokens_saved
+
+Steps, in order:
+  1. normalize: unify whitespace and bullets, drop page markers ("Page 2 of 3")
+  2. drop boilerplate (job descriptions only): EEO / accommodation / E-Verify
+     sentences; in a resume the same words describe real work
+  3. deduplicate: running headers/footers, i.e. lines at the top or bottom of a
+     page that repeat there on another page. Pages are separated by PAGE_BREAK
+     (pdf_extract puts one between pages); repeated lines elsewhere, such as an
+     achievement listed under two jobs, are left alone.
+  4. fit the token budget by section priority: the sections that matter most for
+     the document kind (experience and skills for a resume, requirements for a
+     JD) keep their text; lower-priority sections are clipped, then dropped.
+"""
+import re
+import unicodedata
+from collections import Counter, namedtuple
+
+import telemetry
+from chat_context import clip_tokens, estimate_tokens
+
+CompactionResult = namedtuple("CompactionResult", [
+    "text", "original_bytes", "compacted_bytes", "original_tokens", "compacted_tokens", "clipped_sections",
+])
+CompactionResult.bytes_saved = property(lambda r: r.original_bytes - r.compacted_bytes)
+CompactionResult.tokens_saved = property(lambda r: r.original_tokens - r.compacted_tokens)
+
+# Context windows in tokens. Analysis and import budgets come from these, not from
+# chat_context's chat budget, which is kept small on purpose (flat cost per chat turn);
+# trimming a CV to that budget loses sections the structured output requires.
+MODEL_CONTEXT_WINDOWS = {
+    "gemini-2.5-flash": 1_048_576,
+    "gemini-2.5-pro": 1_048_576,
+    "gemini-1.5-flash": 1_048_576,
+    "llama-3.3-70b-versatile": 131_072,
+}
+DEFAULT_CONTEXT_WINDOW = 32_768
+# Part of the window documents may fill; the rest is instructions and the reply
+CONTEXT_SHARE = 0.25
+# Even a 1M window gets at most this: no real CV or JD is longer, a runaway PDF is
+MAX_DOCUMENT_BUDGET = 32_000
+
+# Share of the document budget each document may use
+DOCUMENT_SHARES = {"resume": 0.45, "jd": 0.35, "document": 0.5}
+
+# Lower number = kept first when trimming. "_preamble" is the text before the first heading.
+SECTION_PRIORITIES = {
+    "resume": {
+        "_preamble": 0, "experience": 1, "skills": 1, "summary": 2, "projects": 3,
+        "education": 3, "certifications": 4, "awards": 5, "publications": 5,
+        "volunteer": 6, "interests": 7, "references": 8,
+    },
+    "jd": {
+        "_preamble": 1, "requirements": 0, "responsibilities": 1, "preferred": 2,
+        "about the role": 2, "about us": 5, "benefits": 6,
+    },
+    "document": {"_preamble": 0},
+}
+DEFAULT_PRIORITY = 4
+
+# Heading keyword -> canonical section name
+HEADING_ALIASES = {
+    "summary": "summary", "profile": "summary", "objective": "summary", "about me": "summary",
+    "experience": "experience", "employment": "experience", "work history": "experience",
+    "skills": "skills", "technical skills": "skills", "core competencies": "skills", "technologies": "skills",
+    "projects": "projects", "education": "education",
+    "certifications": "certifications", "certificates": "certifications", "licenses": "certifications",
+    "awards": "awards", "honors": "awards", "publications": "publications",
+    "volunteer": "volunteer", "interests": "interests", "hobbies": "interests", "references": "references",
+    "requirements": "requirements", "qualifications": "requirements", "what you bring": "requirements",
+    "must have": "requirements", "you have": "requirements",
+    "responsibilities": "responsibilities", "what you will do": "responsibilities",
+    "what you'll do": "responsibilities", "duties": "responsibilities",
+    "preferred": "preferred", "nice to have": "preferred", "bonus": "preferred",
+    "about the role": "about the role", "the role": "about the role",
+    "about us": "about us", "about the company": "about us", "who we are": "about us",
+    "benefits": "benefits", "perks": "benefits", "what we offer": "benefits",
+}
+
+# Only lines that say "page": bare numbers and "06/2019" are real resume content.
+# Other running headers/footers are caught by deduplicate() when they repeat.
+PAGE_MARKER_RE = re.compile(r"^-?\s*page\s*\d+(?:\s*(?:of|/)\s*\d+)?\s*-?$", re.IGNORECASE)
+BULLET_RE = re.compile(r"^(?:[•●▪◦‣⁃∙·]\s*|[*–]\s+)")
+SPACES_RE = re.compile(r"[ \t\u00a0\u2000-\u200b\u3000]+")
+SENTENCE_RE = re.compile(r"(?<=[.!?])\s+")
+BLANK_RUN_RE = re.compile(r"\n{3,}")
+BOILERPLATE_RE = re.compile(
+    r"equal (?:employment )?opportunity|without regard to (?:race|age|sex|gender)|affirmative action"
+    r"|protected veteran|reasonable accommodation|e-verify|sexual orientation|gender identity"
+    r"|national origin|genetic information|disability status",
+    re.IGNORECASE,
+)
+# Separates pages in extracted PDF text, on a line of its own (as pdftotext does)
+PAGE_BREAK = "\f"
+# Lines at each end of a page that may be a running header or footer
+HEADER_LINES = 2
+
+
+def normalize(text):
+    """Unifies whitespace and bullets, and removes page markers and blank-line runs."""
+    text = unicodedata.normalize("NFKC", str(text)).replace("\r\n", "\n").replace("\r", "\n")
+    lines, blank = [], False
+    for raw in text.split("\n"):
+        if PAGE_BREAK in raw:
+            # Kept for deduplicate(), which removes it
+            lines.append(PAGE_BREAK)
+            blank = True
+            continue
+        line = SPACES_RE.sub(" ", raw).strip()
+        if not line or PAGE_MARKER_RE.match(line):
+            if not blank and lines:
+                lines.append("")
+            blank = True
+            continue
+        lines.append(BULLET_RE.sub("- ", line))
+        blank = False
+    return "\n".join(lines).strip()
+
+
+def strip_boilerplate(text):
+    """Drops EEO / accommodation sentences; the rest of their line is kept."""
+    out = []
+    for line in text.split("\n"):
+        if BOILERPLATE_RE.search(line):
+            line = " ".join(s for s in SENTENCE_RE.split(line) if not BOILERPLATE_RE.search(s))
+            if not line:
+                continue
+        out.append(line)
+    return "\n".join(out)
+
+
+def _page_edges(page):
+    """Indexes of the first and last HEADER_LINES non-empty lines of a page."""
+    filled = [i for i, line in enumerate(page) if line]
+    return set(filled[:HEADER_LINES] + filled[-HEADER_LINES:])
+
+
+def deduplicate(text):
+    """
+    Drops running headers and footers: a line near the top or bottom of a page
+    that also sits near the top or bottom of an earlier page. Page breaks are
+    removed; text without them is returned unchanged.
+    """
+    lines = text.split("\n")
+    if PAGE_BREAK not in lines:
+        return text
+    pages = [[]]
+    for line in lines:
+        if line == PAGE_BREAK:
+            pages.append([])
+        else:
+            pages[-1].append(line)
+    edges = [_page_edges(page) for page in pages]
+    counts = Counter(key for page, idx in zip(pages, edges) for key in {page[i].lower() for i in idx})
+    seen, out = set(), []
+    for page, idx in zip(pages, edges):
+        for i, line in enumerate(page):
+            key = line.lower()
+            if i in idx and counts[key] > 1:
+                if key in seen:
+                    continue
+                seen.add(key)
+            out.append(line)
+        out.append("")
+    return BLANK_RUN_RE.sub("\n\n", "\n".join(out)).strip()
+
+
+def _heading(line):
+    """Canonical section name if `line` looks like a section heading, else None."""
+    if len(line) > 40:
+        return None
+    key = line.strip("#*:-_ ").lower()
+    return HEADING_ALIASES.get(key)
+
+
+def split_sections(text):
+    """[(section_name, text), ...] in document order; text before the first heading is "_preamble"."""
+    sections = [["_preamble", []]]
+    for line in text.split("\n"):
+        name = _heading(line)
+        if name:
+            sections.append([name, [line]])
+        else:
+            sections[-1][1].append(line)
+    return [(name, "\n".join(lines).strip()) for name, lines in sections if "\n".join(lines).strip()]
+
+
+def fit_budget(text, max_tokens, kind="document"):
+    """Trims `text` to about `max_tokens`, spending the budget on high-priority sections first."""
+    if estimate_tokens(text) <= max_tokens:
+        return text, []
+    priorities = SECTION_PRIORITIES.get(kind, SECTION_PRIORITIES["document"])
+    sections = split_sections(text)
+    order = sorted(range(len(sections)), key=lambda i: (priorities.get(sections[i][0], DEFAULT_PRIORITY), i))
+    remaining = max_tokens
+    kept, clipped = {}, []
+    for i in order:
+        name, body = sections[i]
+        cost = estimate_tokens(body)
+        if cost <= remaining:
+            kept[i] = body
+            remaining -= cost
+        else:
+            # Lower-priority sections never take budget a higher-priority one could not get
+            if remaining > 20:
+                kept[i] = clip_tokens(body, remaining)
+            remaining = 0
+            clipped.append(name)
+    return "\n\n".join(kept[i] for i in sorted(kept)), clipped
+
+
+def compact(text, kind="document", max_tokens=None):
+    """Runs every compaction step; `max_tokens=None` skips the budget step."""
+    text = text or ""
+    with telemetry.span("compact", kind=kind) as attrs:
+        compacted = normalize(text)
+        if kind == "jd":
+            compacted = strip_boilerplate(compacted)
+        compacted = deduplicate(compacted)
+        clipped = []
+        if max_tokens:
+            compacted, clipped = fit_budget(compacted, max_tokens, kind)
+        result = CompactionResult(
+            text=compacted,
+            original_bytes=len(text.encode("utf-8", "replace")),
+            compacted_bytes=len(compacted.encode("utf-8", "replace")),
+            original_tokens=estimate_tokens(text),
+            compacted_tokens=estimate_tokens(compacted),
+            clipped_sections=clipped,
+        )
+        attrs.update(bytes_saved=result.bytes_saved, tokens_saved=result.tokens_saved, clipped_sections=clipped)
+    telemetry.inc("career_prompt_bytes_saved_total", result.bytes_saved, kind=kind)
+    telemetry.inc("career_prompt_tokens_saved_total", result.tokens_saved, kind=kind)
+    return result
+
+
+def document_budget(model_name):
+    """Tokens the documents of an analysis / import prompt may use for `model_name`."""
+    name = model_name.replace("models/", "").replace("groq/", "")
+    window = MODEL_CONTEXT_WINDOWS.get(name, DEFAULT_CONTEXT_WINDOW)
+    return min(int(window * CONTEXT_SHARE), MAX_DOCUMENT_BUDGET)
+
+
+def compact_for_model(text, kind, model_name, share=None):
+    """compact() with `share` (default: DOCUMENT_SHARES[kind]) of the model's document budget."""
+    share = share or DOCUMENT_SHARES.get(kind, DOCUMENT_SHARES["document"])
+    return compact(text, kind, int(document_budget(model_name) * share))
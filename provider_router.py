@@ -0,0 +1,261 @@
+"""
+Provider routing with per-model health memory.
+
+Each model gets a circuit breaker: after `failure_threshold` consecutive
+failures (or one "model not found") it opens and the model is skipped; after
+`cooldown` seconds it half-opens and lets a single probe through.
+
+Only errors another model may not hit fall through to the next candidate:
+404 (unknown model), 429 / quota, 5xx, timeouts and dropped connections. Auth
+errors and bad requests are raised straight away; no other model fixes them,
+and they say nothing about the model's health.
+
+Latency-sensitive calls can be hedged: if the first healthy model has not
+answered within its observed p95 latency, the next one is fired as well and
+the first good answer wins. Python cannot abort an in-flight HTTP request from
+another thread, so the loser is cancelled if it has not started yet and
+otherwise left to finish with its result discarded.
+"""
+import contextvars
+import re
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from rate_limiter import RateLimitExceeded, status_code, is_retryable_error
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+# 5xx in the message of an SDK error that carries no status code
+SERVER_ERROR_RE = re.compile(r"\b5\d\d\b")
+
+
+def is_permanent_error(error):
+    """Errors that will not go away by retrying the same model (unknown model, 404)."""
+    text = str(error).lower()
+    return "404" in text or "not found" in text
+
+
+def is_timeout_error(error):
+    """Timeouts and dropped connections, whichever SDK raised them (httpx, groq, google.api_core)."""
+    if isinstance(error, (TimeoutError, ConnectionError)):
+        return True
+    name = type(error).__name__.lower()
+    if "timeout" in name or "deadline" in name or "connection" in name:
+        return True
+    text = str(error).lower()
+    return "timed out" in text or "deadline exceeded" in text
+
+
+def should_fall_back(error):
+    """Whether the next candidate model is worth trying after `error`."""
+    return (isinstance(error, RateLimitExceeded) or is_permanent_error(error)
+            or is_retryable_error(error) or is_timeout_error(error)
+            or (status_code(error) is None and SERVER_ERROR_RE.search(str(error)) is not None))
+
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold=3, cooldown=60.0):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.state == OPEN and time.monotonic() - self.opened_at >= self.cooldown:
+                self.state = HALF_OPEN
+                self._probe_in_flight = False
+            if self.state == CLOSED:
+                return True
+            if self.state == HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = CLOSED
+            self.failures = 0
+            self._probe_in_flight = False
+
+    def release_probe(self):
+        """Gives back a half-open probe slot that was taken but never used."""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def record_failure(self, permanent=False):
+        with self._lock:
+            self.failures += 1
+            self._probe_in_flight = False
+            if permanent or self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = OPEN
+                self.opened_at = time.monotonic()
+
+
+class ModelHealth:
+    def __init__(self, failure_threshold, cooldown, window=50):
+        self.breaker = CircuitBreaker(failure_threshold, cooldown)
+        self.latencies = deque(maxlen=window)
+        self.calls = 0
+        self.errors = 0
+
+    def p95(self):
+        if not self.latencies:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))]
+
+
+class ProviderRouter:
+    def __init__(self, failure_threshold=3, cooldown=60.0, hedge_default_deadline=8.0,
+                 hedge_min_samples=5, max_workers=8):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.hedge_default_deadline = hedge_default_deadline
+        self.hedge_min_samples = hedge_min_samples
+        self._health = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="llm-hedge")
+        self.hedges_fired = 0
+        self.hedges_won = 0
+
+    def health(self, model_name):
+        with self._lock:
+            if model_name not in self._health:
+                self._health[model_name] = ModelHealth(self.failure_threshold, self.cooldown)
+            return self._health[model_name]
+
+    def hedge_deadline(self, model_name):
+        h = self.health(model_name)
+        if len(h.latencies) < self.hedge_min_samples:
+            return self.hedge_default_deadline
+        return h.p95()
+
+    def _attempt(self, model_name, invoke, record_latency):
+        h = self.health(model_name)
+        start = time.monotonic()
+        h.calls += 1
+        try:
+            result = invoke(model_name)
+        except RateLimitExceeded:
+            # Out of quota is not ill health: fall through without tripping the breaker
+            h.breaker.release_probe()
+            raise
+        except Exception as e:
+            self._record_error(h, e)
+            raise
+        if record_latency:
+            h.latencies.append(time.monotonic() - start)
+        h.breaker.record_success()
+        return result
+
+    def _record_error(self, h, error):
+        h.errors += 1
+        if should_fall_back(error):
+            h.breaker.record_failure(permanent=is_permanent_error(error))
+        else:
+            # The model answered; the request itself was at fault
+            h.breaker.release_probe()
+
+    def record_failure(self, model_name, error):
+        """Records an error seen after the attempt returned, e.g. a stream that broke mid-reply."""
+        self._record_error(self.health(model_name), error)
+
+    def call(self, candidates, invoke, hedge=False, record_latency=True):
+        """
+        Calls `invoke(model_name)` on the first healthy candidate, falling through
+        the list on errors should_fall_back() accepts. Returns the first successful
+        result or re-raises the last error (any other error at once). If every
+        circuit is open the primary is probed anyway rather than failing without trying.
+        """
+        # Breakers are consulted lazily so a half-open probe slot is only taken
+        # by a model we actually call.
+        remaining = iter(m for m in candidates if self.health(m).breaker.allow())
+        first = next(remaining, None)
+        if first is None:
+            first = candidates[0]
+
+        try:
+            if hedge:
+                return self._hedged(first, remaining, invoke, record_latency)
+            return self._attempt(first, invoke, record_latency)
+        except Exception as e:
+            if not should_fall_back(e):
+                raise
+            last_error = e
+
+        for model_name in remaining:
+            try:
+                return self._attempt(model_name, invoke, record_latency)
+            except Exception as e:
+                if not should_fall_back(e):
+                    raise
+                last_error = e
+        raise last_error
+
+    def _submit(self, model_name, invoke, record_latency):
+        # Attempts see the caller's context (rate-limit session, current trace)
+        return self._executor.submit(contextvars.copy_context().run, self._attempt, model_name, invoke, record_latency)
+
+    def _hedged(self, primary, remaining, invoke, record_latency):
+        futures = {self._submit(primary, invoke, record_latency): primary}
+        done, _ = wait(futures, timeout=self.hedge_deadline(primary))
+        primary_failed = bool(done) and next(iter(done)).exception() is not None
+        if primary_failed and not should_fall_back(next(iter(done)).exception()):
+            raise next(iter(done)).exception()
+        secondary = None
+        if not done or primary_failed:
+            secondary = next(remaining, None)
+            if secondary is not None:
+                if not done:
+                    self.hedges_fired += 1
+                futures[self._submit(secondary, invoke, record_latency)] = secondary
+
+        last_error = None
+        pending = set(futures)
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for fut in done:
+                if fut.exception() is None:
+                    for other in pending:
+                        other.cancel()
+                    if futures[fut] == secondary and not primary_failed:
+                        self.hedges_won += 1
+                    return fut.result()
+                last_error = fut.exception()
+        raise last_error
+
+    def stats(self):
+        with self._lock:
+            models = dict(self._health)
+        return {
+            "hedges_fired": self.hedges_fired,
+            "hedges_won": self.hedges_won,
+            "models": {
+                name: {
+                    "state": h.breaker.state,
+                    "calls": h.calls,
+                    "errors": h.errors,
+                    "p95_latency": h.p95(),
+                }
+                for name, h in models.items()
+            },
+        }
+
+
+_router = None
+_router_lock = threading.Lock()
+
+
+def get_router():
+    """Process-wide router so model health is shared by every session."""
+    global _router
+    with _router_lock:
+        if _router is None:
+            _router = ProviderRouter()
+        return _router
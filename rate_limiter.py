@@ -0,0 +1,320 @@
+"""
+Process-wide admission control for provider calls, shared by every session.
+
+Each model gets a quota of two token buckets: requests per minute and
+(estimated) tokens per minute. A call is admitted once both buckets can cover
+it; otherwise it waits in that model's queue. The queue is fair across
+sessions: waiters are ordered by a per-session virtual clock, so a session
+that submits ten calls at once is served round-robin with everyone else
+instead of ahead of them.
+
+Waits are bounded (LLM_QUEUE_MAX_WAIT): a call that cannot be admitted in time
+raises RateLimitExceeded, which the router treats as "try the next model".
+Provider 429/5xx replies are retried with jittered exponential backoff, and a
+429 also pauses the model's quota so queued calls back off with it.
+
+Limits come from DEFAULT_LIMITS and can be overridden per provider or model:
+
+    LLM_RATE_LIMITS="gemini=15:1000000,gemini/gemini-2.5-pro=5:250000,groq=30:12000"
+
+Use "off" to disable admission control.
+"""
+import contextvars
+import heapq
+import itertools
+import os
+import random
+import threading
+import time
+
+import telemetry
+
+# (requests per minute, tokens per minute) per provider; free-tier numbers
+DEFAULT_LIMITS = {
+    "gemini": (15, 1_000_000),
+    "groq": (30, 6_000),
+}
+# Reserved for the reply when estimating a call's tokens
+OUTPUT_TOKEN_RESERVE = 512
+
+_session = contextvars.ContextVar("rate_limit_session", default=None)
+
+
+class RateLimitExceeded(RuntimeError):
+    """A call could not be admitted within the maximum queue wait."""
+
+
+def set_session(session_id):
+    """Tags calls made from this context (and jobs it submits) with `session_id` for fair queuing."""
+    _session.set(session_id)
+
+
+def current_session():
+    return _session.get()
+
+
+def status_code(error):
+    """HTTP status of a provider error, when the SDK exposes one."""
+    for obj in (error, getattr(error, "response", None)):
+        code = getattr(obj, "status_code", None)
+        if code is None:
+            code = getattr(obj, "code", None)
+        if isinstance(code, int):
+            return code
+    return None
+
+
+def is_retryable_error(error):
+    """429 (rate limit / quota) and 5xx replies, which are worth retrying after a pause."""
+    code = status_code(error)
+    if code is not None:
+        return code == 429 or code >= 500
+    text = str(error).lower()
+    return any(s in text for s in ("429", "rate limit", "resource exhausted", "quota", "503", "unavailable", "overloaded"))
+
+
+def retry_after(error):
+    """Seconds from a Retry-After header on the error's response, if any."""
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+def parse_limits(spec):
+    """"gemini=15:1000000,groq/llama-3.3-70b-versatile=30:12000" -> {key: (rpm, tpm)}."""
+    limits = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        key, _, values = item.partition("=")
+        rpm, _, tpm = values.partition(":")
+        limits[key.strip()] = (float(rpm), float(tpm) if tpm else float("inf"))
+    return limits
+
+
+class TokenBucket:
+    def __init__(self, per_minute):
+        self.rate = per_minute / 60.0
+        self.capacity = per_minute
+        self.tokens = per_minute
+        self.updated = time.monotonic()
+
+    def refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount):
+        """Seconds until `amount` is available (callers refill first)."""
+        missing = min(amount, self.capacity) - self.tokens
+        return 0.0 if missing <= 0 else missing / self.rate
+
+
+class Quota:
+    def __init__(self, rpm, tpm):
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self.paused_until = 0.0
+        self.waiters = []
+        self.vclock = 0
+        self.session_vtimes = {}
+
+    def wait_time(self, tokens, now):
+        self.requests.refill(now)
+        self.tokens.refill(now)
+        return max(self.paused_until - now, self.requests.wait_time(1), self.tokens.wait_time(tokens))
+
+    def take(self, tokens):
+        self.requests.tokens -= 1
+        self.tokens.tokens -= min(tokens, self.tokens.capacity)
+
+
+class RateLimiter:
+    def __init__(self, limits=None, max_wait=30.0, max_retries=3, backoff_base=1.0, backoff_max=20.0):
+        self.limits = DEFAULT_LIMITS if limits is None else limits
+        self.max_wait = max_wait
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._quotas = {}
+        self._cond = threading.Condition()
+        self._seq = itertools.count()
+        self._stats = {"admitted": 0, "queued": 0, "timeouts": 0, "retries": 0, "throttled": 0}
+
+    def limits_for(self, provider, model_name):
+        """(rpm, tpm) for a model: its own entry, else its provider's, else None (unlimited)."""
+        return self.limits.get(f"{provider}/{model_name}") or self.limits.get(model_name) or self.limits.get(provider)
+
+    def set_rpm(self, key, rpm):
+        """Overrides requests per minute for a provider or model (0 = unlimited), keeping its token limit."""
+        with self._cond:
+            _, tpm = self.limits.get(key) or (0, float("inf"))
+            self.limits = {**self.limits, key: (rpm, tpm) if rpm else None}
+            # Quotas are rebuilt from the new limits on their next call
+            self._quotas = {k: q for k, q in self._quotas.items() if k != key and not k.startswith(f"{key}/")}
+
+    def _quota(self, provider, model_name):
+        # Callers hold self._cond
+        key = f"{provider}/{model_name}"
+        quota = self._quotas.get(key)
+        if quota is None:
+            limits = self.limits_for(provider, model_name)
+            if limits is None:
+                return None
+            quota = self._quotas[key] = Quota(*limits)
+        return quota
+
+    # --- admission ---
+
+    def acquire(self, provider, model_name, tokens, session=None, deadline=None):
+        """Blocks until the call is admitted; returns seconds waited or raises RateLimitExceeded."""
+        start = time.monotonic()
+        deadline = deadline or start + self.max_wait
+        session = session if session is not None else current_session()
+        with self._cond:
+            quota = self._quota(provider, model_name)
+            if quota is None:
+                return 0.0
+            if not quota.waiters and quota.wait_time(tokens, start) == 0:
+                quota.take(tokens)
+                self._stats["admitted"] += 1
+                return 0.0
+
+            # Start-time fair queuing: a session's next waiter goes one step after its previous one
+            vtime = max(quota.vclock, quota.session_vtimes.get(session, 0)) + 1
+            quota.session_vtimes[session] = vtime
+            waiter = (vtime, next(self._seq), session)
+            heapq.heappush(quota.waiters, waiter)
+            self._stats["queued"] += 1
+            with telemetry.span("llm_queue", provider=provider, model=model_name) as attrs:
+                try:
+                    self._wait_turn(quota, waiter, tokens, deadline)
+                finally:
+                    quota.waiters.remove(waiter)
+                    heapq.heapify(quota.waiters)
+                    if not any(w[2] == session for w in quota.waiters):
+                        quota.session_vtimes.pop(session, None)
+                    self._cond.notify_all()
+                waited = time.monotonic() - start
+                attrs["wait_s"] = round(waited, 6)
+        telemetry.observe("career_llm_queue_wait_seconds", waited, provider=provider)
+        return waited
+
+    def _wait_turn(self, quota, waiter, tokens, deadline):
+        # Callers hold self._cond; `waiter` is in quota.waiters
+        while True:
+            now = time.monotonic()
+            remaining = deadline - now
+            if quota.waiters[0] is waiter:
+                wait = quota.wait_time(tokens, now)
+                if wait == 0:
+                    quota.take(tokens)
+                    quota.vclock = waiter[0]
+                    self._stats["admitted"] += 1
+                    return
+                if wait > remaining:
+                    # Fail now rather than sleep into a timeout we can already see
+                    self._stats["timeouts"] += 1
+                    telemetry.inc("career_llm_rate_limited_total", reason="queue_timeout")
+                    raise RateLimitExceeded(
+                        f"rate limit: {quota.requests.capacity:g} requests / {quota.tokens.capacity:g} tokens "
+                        f"per minute, no capacity within {self.max_wait:g}s")
+                self._cond.wait(wait)
+            else:
+                if remaining <= 0:
+                    self._stats["timeouts"] += 1
+                    telemetry.inc("career_llm_rate_limited_total", reason="queue_timeout")
+                    raise RateLimitExceeded(f"rate limit: still queued after {self.max_wait:g}s")
+                self._cond.wait(remaining)
+
+    def _pause(self, provider, model_name, seconds):
+        with self._cond:
+            quota = self._quota(provider, model_name)
+            if quota is not None:
+                quota.paused_until = max(quota.paused_until, time.monotonic() + seconds)
+                self._cond.notify_all()
+
+    def call(self, provider, model_name, tokens, fn):
+        """
+        Runs fn() once admitted. 429/5xx errors are retried up to max_retries times
+        with full-jitter exponential backoff (or the provider's Retry-After), as long
+        as the retry still fits in max_wait; anything else is raised unchanged.
+        """
+        deadline = time.monotonic() + self.max_wait
+        for attempt in itertools.count():
+            self.acquire(provider, model_name, tokens, deadline=deadline)
+            try:
+                return fn()
+            except Exception as e:
+                if not is_retryable_error(e) or attempt >= self.max_retries:
+                    raise
+                delay = retry_after(e) or random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+                if time.monotonic() + delay > deadline:
+                    raise
+                with self._cond:
+                    self._stats["retries"] += 1
+                    if status_code(e) == 429 or "429" in str(e):
+                        self._stats["throttled"] += 1
+                telemetry.inc("career_llm_retries_total", provider=provider)
+                self._pause(provider, model_name, delay)
+                time.sleep(delay)
+
+    # --- reporting ---
+
+    def queue_position(self, session):
+        """1-based position of `session`'s earliest queued call, or None when it has nothing queued."""
+        with self._cond:
+            queues = [sorted(quota.waiters) for quota in self._quotas.values() if quota.waiters]
+        positions = [i for queue in queues for i, w in enumerate(queue, 1) if w[2] == session]
+        return min(positions) if positions else None
+
+    def stats(self):
+        now = time.monotonic()
+        with self._cond:
+            models = {}
+            for key, quota in self._quotas.items():
+                quota.wait_time(0, now)
+                models[key] = {
+                    "rpm": quota.requests.capacity,
+                    "tpm": quota.tokens.capacity,
+                    "requests_available": round(quota.requests.tokens, 1),
+                    "tokens_available": round(quota.tokens.tokens),
+                    "queued": len(quota.waiters),
+                    "paused_s": round(max(0.0, quota.paused_until - now), 1),
+                }
+            return {**self._stats, "max_wait": self.max_wait, "models": models}
+
+
+class _Unlimited:
+    """Stand-in used when LLM_RATE_LIMITS=off."""
+
+    def call(self, provider, model_name, tokens, fn):
+        return fn()
+
+    def set_rpm(self, key, rpm):
+        pass
+
+    def queue_position(self, session):
+        return None
+
+    def stats(self):
+        return {"disabled": True}
+
+
+_limiter = None
+_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter():
+    global _limiter
+    with _limiter_lock:
+        if _limiter is None:
+            spec = os.getenv("LLM_RATE_LIMITS", "")
+            if spec.strip().lower() == "off":
+                _limiter = _Unlimited()
+            else:
+                _limiter = RateLimiter(
+                    limits={**DEFAULT_LIMITS, **parse_limits(spec)},
+                    max_wait=float(os.getenv("LLM_QUEUE_MAX_WAIT", "30")),
+                    max_retries=int(os.getenv("LLM_MAX_RETRIES", "3")),
+                )
+        return _limiter
@@ -0,0 +1,464 @@
+"""
+Bounded per-session chat state for multi-user deployments.
+
+st.session_state only keeps the session id; the chat history, attachments
+and ChatContext state of each session live here:
+
+  - messages are compact slot records; once a session goes over its memory
+    cap (SESSION_MEMORY_KB) its oldest turns spill to an SQLite file keyed by
+    session, leaving the last `keep_recent` messages in memory;
+  - attachment texts are written to disk when added and read back only when a
+    prompt needs them, so memory holds just their names;
+  - sessions idle for SESSION_IDLE_MINUTES are flushed to disk and dropped from
+    memory; a tab that comes back while its Streamlit session is still alive
+    gets its history back from disk. Disk rows expire after
+    SESSION_DISK_TTL_HOURS.
+
+With SESSION_URL_RESTORE=1 the app also keeps the session id in the page URL,
+so a reload or a dropped websocket restores the chat too. That is off by
+default: anyone holding such a URL can read the chat and its attachments.
+Tabs opened from the same URL share one session; its lock keeps their
+appends and spills from interleaving.
+
+Without a writable store directory everything stays in memory (no spilling,
+no idle eviction), like the app behaved before.
+"""
+import json
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+from pathlib import Path
+
+DEFAULT_STORE_DIR = Path(__file__).parent / ".cache" / "sessions"
+# Per-record overhead on top of the content string (slots object + small fields)
+RECORD_OVERHEAD = 96
+SPILL_TARGET = 0.75
+# Session ids are uuid4 hex; anything else in the URL gets a fresh session
+SESSION_ID_RE = re.compile(r"[0-9a-f]{32}")
+
+
+class Message:
+    """One chat turn. Reads like the dicts the app used before (msg["role"], msg.get(...))."""
+
+    __slots__ = ("role", "content", "attachments", "attachment_names")
+
+    def __init__(self, role, content, attachments=(), attachment_names=()):
+        self.role = sys.intern(role)
+        self.content = content
+        self.attachments = tuple(attachments)
+        self.attachment_names = tuple(attachment_names)
+
+    @classmethod
+    def from_dict(cls, msg):
+        return cls(msg["role"], msg["content"], msg.get("attachments", ()), msg.get("attachment_names", ()))
+
+    def to_dict(self):
+        msg = {"role": self.role, "content": self.content}
+        if self.attachments:
+            msg["attachments"] = list(self.attachments)
+        if self.attachment_names:
+            msg["attachment_names"] = list(self.attachment_names)
+        return msg
+
+    def __getitem__(self, key):
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def get(self, key, default=None):
+        value = getattr(self, key, default)
+        return default if value == () else value
+
+    @property
+    def size(self):
+        return sys.getsizeof(self.content) + RECORD_OVERHEAD + 16 * len(self.attachments)
+
+
+class MessageLog:
+    """
+    Chat history of one session, indexed like a list. Messages [0, spilled) are
+    on disk and read back on access; the rest are in memory.
+    """
+
+    def __init__(self, session, spilled=0):
+        self._session = session
+        self.spilled = spilled
+        self._recent = []
+        self.bytes = 0
+
+    def __len__(self):
+        return self.spilled + len(self._recent)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            with self._session.lock:
+                start, stop, step = index.indices(len(self))
+                older = self._session.load_messages(start, min(stop, self.spilled)) if start < self.spilled else []
+                recent = self._recent[max(start - self.spilled, 0):max(stop - self.spilled, 0)]
+            return (older + recent)[::step]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("message index out of range")
+        return self[index:index + 1][0]
+
+    def __iter__(self):
+        return iter(self[:])
+
+    @property
+    def recent(self):
+        """The in-memory tail of the history."""
+        with self._session.lock:
+            return list(self._recent)
+
+    def append(self, msg):
+        record = msg if isinstance(msg, Message) else Message.from_dict(msg)
+        with self._session.lock:
+            self._recent.append(record)
+            self.bytes += record.size
+            self._session.enforce_cap()
+
+    def _take_oldest(self, count):
+        taken, self._recent = self._recent[:count], self._recent[count:]
+        self.bytes -= sum(m.size for m in taken)
+        self.spilled += len(taken)
+        return taken
+
+
+class AttachmentMap:
+    """attachment id -> {"name", "text"}; with a disk store only the names stay in memory."""
+
+    def __init__(self, session, names=None):
+        self._session = session
+        self._names = dict(names or {})
+        self._texts = {}  # used only when the store has no disk
+
+    def __contains__(self, attachment_id):
+        return attachment_id in self._names
+
+    def __len__(self):
+        return len(self._names)
+
+    def __getitem__(self, attachment_id):
+        name = self._names[attachment_id]
+        text = self._texts.get(attachment_id)
+        if text is None:
+            text = self._session.load_blob(attachment_id) or ""
+        return {"name": name, "text": text}
+
+    def setdefault(self, attachment_id, value):
+        with self._session.lock:
+            if attachment_id not in self._names:
+                self._names[attachment_id] = value["name"]
+                if not self._session.save_blob(attachment_id, value["name"], value["text"]):
+                    self._texts[attachment_id] = value["text"]
+        return self[attachment_id]
+
+    @property
+    def names(self):
+        return dict(self._names)
+
+    @property
+    def bytes(self):
+        return sum(sys.getsizeof(n) for n in self._names.values()) + sum(sys.getsizeof(t) for t in self._texts.values())
+
+
+class Session:
+    def __init__(self, store, session_id, state=None, spilled=0):
+        state = dict(state or {})
+        self.store = store
+        self.id = session_id
+        self.last_seen = time.time()
+        # Held while the history or attachments change (tabs sharing a URL share the session)
+        self.lock = threading.RLock()
+        self.messages = MessageLog(self, spilled)
+        self.state = state  # ChatContext state: summary, summarized_upto, attachments
+        self.state["attachments"] = AttachmentMap(self, state.get("attachments"))
+
+    # --- disk access, delegated to the store ---
+
+    def load_messages(self, start, stop):
+        return self.store._load_messages(self.id, start, stop)
+
+    def load_blob(self, attachment_id):
+        return self.store._load_blob(self.id, attachment_id)
+
+    def save_blob(self, attachment_id, name, text):
+        return self.store._save_blob(self, attachment_id, name, text)
+
+    # --- memory ---
+
+    @property
+    def memory_bytes(self):
+        small = sum(sys.getsizeof(v) for k, v in self.state.items() if k != "attachments")
+        return self.messages.bytes + self.state["attachments"].bytes + small
+
+    def enforce_cap(self):
+        """Spills the oldest messages to disk while over the cap, keeping `keep_recent` in memory."""
+        store = self.store
+        if self.memory_bytes <= store.max_session_bytes or not store.enabled:
+            return
+        # Spill down to SPILL_TARGET of the cap so spills happen in batches, not on every turn
+        excess = self.memory_bytes - int(store.max_session_bytes * SPILL_TARGET)
+        spill, freed = 0, 0
+        for msg in self.messages._recent[:max(len(self.messages._recent) - store.keep_recent, 0)]:
+            if freed >= excess:
+                break
+            spill += 1
+            freed += msg.size
+        if spill:
+            store._spill(self, spill)
+
+    def snapshot_state(self):
+        state = {k: v for k, v in self.state.items() if k != "attachments"}
+        state["attachments"] = self.state["attachments"].names
+        return state
+
+
+class SessionStore:
+    def __init__(self, store_dir=DEFAULT_STORE_DIR, max_session_bytes=256 * 1024, keep_recent=8,
+                 idle_seconds=30 * 60, disk_ttl_seconds=24 * 3600, sweep_interval=60.0, enabled=True,
+                 url_restore=False):
+        self.store_dir = Path(store_dir)
+        self.db_path = self.store_dir / "sessions.sqlite3"
+        self.max_session_bytes = max_session_bytes
+        self.keep_recent = keep_recent
+        self.idle_seconds = idle_seconds
+        self.disk_ttl_seconds = disk_ttl_seconds
+        self.sweep_interval = sweep_interval
+        self.enabled = enabled
+        # Whether the app may take the session id from the page URL (see the module docstring)
+        self.url_restore = url_restore
+        self._sessions = {}
+        self._lock = threading.RLock()
+        self._last_sweep = time.time()
+        self._stats = {"spilled_messages": 0, "evicted_sessions": 0, "restored_sessions": 0}
+        if self.enabled:
+            self._init_db()
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path, timeout=10)
+
+    def _init_db(self):
+        try:
+            self.store_dir.mkdir(parents=True, exist_ok=True)
+            with self._connect() as conn:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute("""
+                    CREATE TABLE IF NOT EXISTS sessions (
+                        session TEXT PRIMARY KEY,
+                        state TEXT NOT NULL,
+                        updated REAL NOT NULL
+                    )
+                """)
+                conn.execute("""
+                    CREATE TABLE IF NOT EXISTS messages (
+                        session TEXT NOT NULL,
+                        seq INTEGER NOT NULL,
+                        record TEXT NOT NULL,
+                        PRIMARY KEY (session, seq)
+                    )
+                """)
+                conn.execute("""
+                    CREATE TABLE IF NOT EXISTS blobs (
+                        session TEXT NOT NULL,
+                        id TEXT NOT NULL,
+                        name TEXT NOT NULL,
+                        text TEXT NOT NULL,
+                        PRIMARY KEY (session, id)
+                    )
+                """)
+                conn.execute("CREATE INDEX IF NOT EXISTS idx_sessions_updated ON sessions (updated)")
+        except (sqlite3.Error, OSError):
+            # An unwritable store dir should never break the app; keep everything in memory.
+            self.enabled = False
+
+    # --- sessions ---
+
+    def get(self, session_id):
+        """The session's state, restored from disk if it was evicted; marks it as active."""
+        with self._lock:
+            self._maybe_sweep()
+            session = self._sessions.get(session_id)
+            if session is None:
+                session = self._sessions[session_id] = self._restore(session_id) or Session(self, session_id)
+            session.last_seen = time.time()
+            return session
+
+    def _restore(self, session_id):
+        if not self.enabled:
+            return None
+        try:
+            with self._connect() as conn:
+                row = conn.execute("SELECT state FROM sessions WHERE session = ?", (session_id,)).fetchone()
+                if row is None:
+                    return None
+                spilled = conn.execute("SELECT COUNT(*) FROM messages WHERE session = ?", (session_id,)).fetchone()[0]
+        except sqlite3.Error:
+            return None
+        self._stats["restored_sessions"] += 1
+        return Session(self, session_id, json.loads(row[0]), spilled)
+
+    def _save_state(self, conn, session):
+        conn.execute(
+            "INSERT OR REPLACE INTO sessions (session, state, updated) VALUES (?, ?, ?)",
+            (session.id, json.dumps(session.snapshot_state(), ensure_ascii=False), time.time()),
+        )
+
+    def _spill(self, session, count):
+        """Moves the session's `count` oldest in-memory messages to disk."""
+        # Lock order everywhere: session.lock, then self._lock
+        with session.lock, self._lock:
+            first = session.messages.spilled
+            records = session.messages._recent[:count]
+            try:
+                with self._connect() as conn:
+                    conn.executemany(
+                        "INSERT OR REPLACE INTO messages (session, seq, record) VALUES (?, ?, ?)",
+                        [(session.id, first + i, json.dumps(m.to_dict(), ensure_ascii=False)) for i, m in enumerate(records)],
+                    )
+                    session.messages._take_oldest(count)
+                    self._save_state(conn, session)
+            except sqlite3.Error:
+                return False
+            self._stats["spilled_messages"] += count
+            return True
+
+    def _load_messages(self, session_id, start, stop):
+        if stop <= start:
+            return []
+        try:
+            with self._connect() as conn:
+                rows = conn.execute(
+                    "SELECT record FROM messages WHERE session = ? AND seq >= ? AND seq < ? ORDER BY seq",
+                    (session_id, start, stop),
+                ).fetchall()
+        except sqlite3.Error:
+            return []
+        return [Message.from_dict(json.loads(r[0])) for r in rows]
+
+    def _save_blob(self, session, attachment_id, name, text):
+        if not self.enabled:
+            return False
+        try:
+            with session.lock, self._lock, self._connect() as conn:
+                conn.execute(
+                    "INSERT OR IGNORE INTO blobs (session, id, name, text) VALUES (?, ?, ?, ?)",
+                    (session.id, attachment_id, name, text),
+                )
+                # The session row is what ties the blob to the disk TTL
+                self._save_state(conn, session)
+            return True
+        except sqlite3.Error:
+            return False
+
+    def _load_blob(self, session_id, attachment_id):
+        try:
+            with self._connect() as conn:
+                row = conn.execute("SELECT text FROM blobs WHERE session = ? AND id = ?", (session_id, attachment_id)).fetchone()
+        except sqlite3.Error:
+            return None
+        return row[0] if row else None
+
+    # --- eviction ---
+
+    def _maybe_sweep(self):
+        # Callers hold self._lock
+        now = time.time()
+        if now - self._last_sweep >= self.sweep_interval:
+            self._last_sweep = now
+            self.sweep(now)
+
+    def sweep(self, now=None):
+        """Flushes and drops sessions idle for idle_seconds, and expires old rows on disk."""
+        if not self.enabled:
+            return
+        now = now or time.time()
+        with self._lock:
+            for session_id, session in list(self._sessions.items()):
+                if now - session.last_seen < self.idle_seconds:
+                    continue
+                # A session busy in some tab is not idle; waiting for it here would invert the lock order
+                if not session.lock.acquire(blocking=False):
+                    continue
+                try:
+                    if session.messages.recent and not self._spill(session, len(session.messages.recent)):
+                        continue
+                    try:
+                        with self._connect() as conn:
+                            self._save_state(conn, session)
+                    except sqlite3.Error:
+                        continue
+                finally:
+                    session.lock.release()
+                del self._sessions[session_id]
+                self._stats["evicted_sessions"] += 1
+            try:
+                with self._connect() as conn:
+                    expired = [r[0] for r in conn.execute(
+                        "SELECT session FROM sessions WHERE updated < ?", (now - self.disk_ttl_seconds,)).fetchall()
+                        if r[0] not in self._sessions]
+                    for table in ("messages", "blobs", "sessions"):
+                        conn.executemany(f"DELETE FROM {table} WHERE session = ?", [(s,) for s in expired])
+            except sqlite3.Error:
+                pass
+
+    # --- reporting ---
+
+    def stats(self, top=10):
+        now = time.time()
+        with self._lock:
+            sessions = list(self._sessions.values())
+            stats = dict(self._stats)
+        per_session = sorted((
+            {
+                "session": s.id[:8],
+                "memory_bytes": s.memory_bytes,
+                "messages_in_memory": len(s.messages.recent),
+                "messages_on_disk": s.messages.spilled,
+                "attachments": len(s.state["attachments"]),
+                "idle_s": round(now - s.last_seen),
+            } for s in sessions), key=lambda r: -r["memory_bytes"])
+        disk_bytes = 0
+        if self.enabled:
+            try:
+                disk_bytes = sum(p.stat().st_size for p in self.store_dir.glob("sessions.sqlite3*"))
+            except OSError:
+                pass
+        return {
+            "enabled": self.enabled,
+            "sessions": len(sessions),
+            "memory_bytes": sum(r["memory_bytes"] for r in per_session),
+            "max_session_bytes": self.max_session_bytes,
+            "disk_bytes": disk_bytes,
+            **stats,
+            "top_sessions": per_session[:top],
+        }
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_session_store():
+    """
+    Process-wide store, configured from the environment: SESSION_STORE_DISABLED,
+    SESSION_STORE_DIR, SESSION_MEMORY_KB, SESSION_IDLE_MINUTES, SESSION_DISK_TTL_HOURS,
+    SESSION_URL_RESTORE.
+    """
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = SessionStore(
+                store_dir=os.getenv("SESSION_STORE_DIR") or DEFAULT_STORE_DIR,
+                max_session_bytes=int(float(os.getenv("SESSION_MEMORY_KB", "256")) * 1024),
+                idle_seconds=float(os.getenv("SESSION_IDLE_MINUTES", "30")) * 60,
+                disk_ttl_seconds=float(os.getenv("SESSION_DISK_TTL_HOURS", "24")) * 3600,
+                enabled=os.getenv("SESSION_STORE_DISABLED", "").strip().lower() not in ("1", "true", "yes", "on"),
+                url_restore=os.getenv("SESSION_URL_RESTORE", "").strip().lower() in ("1", "true", "yes", "on"),
+            )
+        return _store
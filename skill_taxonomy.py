@@ -0,0 +1,140 @@
+"""
+Local, deterministic skill extraction.
+
+The taxonomy is seeded from the catalog's `Skill` column plus DEFAULT_COURSES.
+Long catalog phrases ("Experience with cloud platforms beyond basic AWS (e.g.,
+IBM Cloud, Google Cloud)") are split into short aliases ("IBM Cloud",
+"Google Cloud") so they can be found in free text.
+
+Matching is a vectorized membership test of every alias against the token
+n-grams of a document, so comparing a resume with a JD takes milliseconds and
+needs no LLM call.
+"""
+import re
+import threading
+import weakref
+
+import numpy as np
+
+from course_catalog import DEFAULT_COURSES
+
+MAX_ALIAS_TOKENS = 4
+TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9+#]*(?:\.[a-z0-9+#]+)*")
+SPLIT_RE = re.compile(r"[,;/()]|\be\.g\.|\bi\.e\.|\band\b|\bor\b", re.IGNORECASE)
+FILLER_PREFIXES = (
+    "experience with", "experience in", "understanding of", "knowledge of",
+    "familiarity with", "proficiency in", "basic", "advanced", "strong",
+)
+STOPWORDS = {"a", "an", "the", "of", "in", "with", "for", "to", "on", "at", "by", "beyond", "etc"}
+
+
+def tokenize(text):
+    return TOKEN_RE.findall(str(text).lower())
+
+
+def _aliases(skill):
+    """Yields (alias_key, display) pairs for one catalog skill phrase."""
+    skill = str(skill).strip()
+    candidates = [skill] + [f.strip() for f in SPLIT_RE.split(skill)]
+    for fragment in candidates:
+        lowered = fragment.lower()
+        for prefix in FILLER_PREFIXES:
+            if lowered.startswith(prefix + " "):
+                fragment = fragment[len(prefix) + 1:].strip()
+                lowered = fragment.lower()
+        tokens = tokenize(fragment)
+        if not tokens or len(tokens) > MAX_ALIAS_TOKENS or all(t in STOPWORDS for t in tokens):
+            continue
+        if len(tokens) == 1 and len(tokens[0]) < 2:
+            continue
+        yield " ".join(tokens), fragment
+
+
+def _ngrams(tokens, max_n):
+    grams = set()
+    for n in range(1, max_n + 1):
+        for i in range(len(tokens) - n + 1):
+            grams.add(" ".join(tokens[i:i + n]))
+    return grams
+
+
+class SkillTaxonomy:
+    def __init__(self, skills):
+        display = {}
+        for skill in skills:
+            if skill is None or skill != skill:  # skip None / NaN
+                continue
+            for key, shown in _aliases(skill):
+                display.setdefault(key, shown)
+        self.keys = np.array(sorted(display), dtype=object)
+        self.display = np.array([display[k] for k in self.keys], dtype=object)
+        self.max_tokens = max((k.count(" ") + 1 for k in display), default=1)
+
+    @classmethod
+    def from_catalog(cls, courses_df=None):
+        skills = [c["Skill"] for c in DEFAULT_COURSES]
+        if courses_df is not None and "Skill" in courses_df.columns:
+            skills = courses_df["Skill"].dropna().astype(str).unique().tolist() + skills
+        return cls(skills)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def presence(self, text):
+        """Boolean mask over the taxonomy: which aliases occur in `text`."""
+        grams = _ngrams(tokenize(text), self.max_tokens)
+        if not grams or not len(self.keys):
+            return np.zeros(len(self.keys), dtype=bool)
+        return np.isin(self.keys, np.array(list(grams), dtype=object))
+
+    def _names(self, mask):
+        keys = self.keys[mask]
+        # Drop aliases already covered by a longer match ("cloud" inside "google cloud")
+        keep = [k for k in keys if not any(k != other and f" {k} " in f" {other} " for other in keys)]
+        return [self.display[np.searchsorted(self.keys, k)] for k in keep]
+
+    def compare(self, resume_text, job_desc):
+        """Skills the JD asks for, split into those the resume has and those it lacks."""
+        in_jd = self.presence(job_desc)
+        in_resume = self.presence(resume_text)
+        return {
+            "matched": self._names(in_jd & in_resume),
+            "missing": self._names(in_jd & ~in_resume),
+            "resume_only": self._names(in_resume & ~in_jd),
+        }
+
+    def compare_many(self, resume_text, job_descs):
+        """
+        compare() against several JDs with the resume tokenized once. Also returns
+        the (len(job_descs) x skills) JD presence matrix and the resume mask.
+        """
+        in_resume = self.presence(resume_text)
+        in_jds = np.array([self.presence(jd) for jd in job_descs], dtype=bool).reshape(len(job_descs), len(self.keys))
+        screens = [{
+            "matched": self._names(row & in_resume),
+            "missing": self._names(row & ~in_resume),
+            "resume_only": self._names(in_resume & ~row),
+        } for row in in_jds]
+        return screens, in_jds, in_resume
+
+
+_taxonomies = {}
+_taxonomies_lock = threading.Lock()
+
+
+def get_skill_taxonomy(courses_df=None):
+    """Taxonomy for `courses_df` (or DEFAULT_COURSES alone), built once per DataFrame."""
+    if courses_df is None:
+        key, ref = None, None
+    else:
+        key, ref = id(courses_df), weakref.ref(courses_df)
+    with _taxonomies_lock:
+        entry = _taxonomies.get(key)
+        if entry is not None and (entry[0] is None or entry[0]() is courses_df):
+            return entry[1]
+    taxonomy = SkillTaxonomy.from_catalog(courses_df)
+    with _taxonomies_lock:
+        _taxonomies[key] = (ref, taxonomy)
+        if courses_df is not None:
+            weakref.finalize(courses_df, _taxonomies.pop, key, None)
+    return taxonomy
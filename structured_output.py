@@ -0,0 +1,281 @@
+"""
+Schema-constrained JSON output from the LLMs.
+
+    result = generate_structured(prompt, model_name, RESUME_SCHEMA)
+    result.data, result.invalid, result.reasks, result.error
+
+- The schema goes to the provider's JSON mode (Gemini response_schema, Groq
+  json_object) through query_llm / LLMStream.
+- Replies are read with repair_json, which accepts what models actually send:
+  code fences and prose around the object, trailing commas, single quotes,
+  Python literals, unquoted keys, raw newlines in strings and output cut off
+  mid-object (every complete field is kept).
+- Values are coerced to the schema ("a, b" -> ["a", "b"] for string arrays).
+  Fields still missing or invalid are re-asked on their own, so one bad field
+  costs a short follow-up instead of regenerating the whole answer.
+- StreamingJSONParser gives the partial object while a reply streams in.
+
+Schemas are the JSON-schema subset both providers accept: an object whose
+properties are strings or arrays of strings.
+"""
+import json
+import re
+from collections import namedtuple
+
+import telemetry
+from llm import LLMStream, query_llm
+
+StructuredResult = namedtuple("StructuredResult", ["data", "invalid", "reasks", "error"])
+
+FENCE_RE = re.compile(r"```(?:json)?\s*", re.IGNORECASE)
+BARE_WORD_RE = re.compile(r"[A-Za-z_][\w\-]*|-?\d+(?:\.\d+)?(?:[eE][+-]?\d+)?")
+LIST_SPLIT_RE = re.compile(r"\s*(?:,|;|\n)\s*(?:[-*•]\s*)?")
+LITERALS = {"true": "true", "false": "false", "null": "null", "True": "true", "False": "false", "None": "null"}
+CLOSERS = {"{": "}", "[": "]"}
+MAX_REASKS = 1
+
+
+def _closers(stack):
+    return "".join(CLOSERS[c] for c in reversed(stack))
+
+
+def _drop_trailing_comma(out):
+    i = len(out) - 1
+    while i >= 0 and out[i].isspace():
+        i -= 1
+    if i >= 0 and out[i] == ",":
+        del out[i]
+
+
+def _normalize(text):
+    """
+    Rewrites near-JSON into JSON. Returns (text, stack, safe_points, cut) where
+    stack and safe_points let a truncated reply be closed, and cut is True when
+    the input ends inside a string.
+    """
+    text = FENCE_RE.sub("", text)
+    start = min((i for i in (text.find("{"), text.find("[")) if i >= 0), default=-1)
+    if start < 0:
+        return "", [], [], False
+    out, stack, safe = [], [], []
+    i, n = start, len(text)
+    while i < n:
+        c = text[i]
+        if c in "\"'":
+            # String: re-quote with ", escape what JSON does not allow raw
+            quote, j = c, i + 1
+            out.append('"')
+            closed = False
+            while j < n:
+                d = text[j]
+                if d == "\\" and j + 1 < n:
+                    nxt = text[j + 1]
+                    out.append(nxt if quote == "'" and nxt == "'" else "\\" + nxt)
+                    j += 2
+                    continue
+                if d == quote:
+                    closed = True
+                    break
+                out.append({'"': '\\"', "\n": "\\n", "\r": "\\r", "\t": "\\t"}.get(d, d))
+                j += 1
+            if not closed:
+                out.append('"')
+                return "".join(out), stack, safe, True
+            out.append('"')
+            safe.append((len(out), tuple(stack)))
+            i = j + 1
+        elif c in "{[":
+            stack.append(c)
+            out.append(c)
+            i += 1
+        elif c in "}]":
+            _drop_trailing_comma(out)
+            if stack:
+                out.append(CLOSERS[stack.pop()])
+            i += 1
+            safe.append((len(out), tuple(stack)))
+            if not stack:
+                break  # ignore anything after the top-level value
+        elif c == "/" and text.startswith("//", i):
+            i = text.find("\n", i) if "\n" in text[i:] else n
+        elif c.isalpha() or c == "_" or c == "-" or c.isdigit():
+            m = BARE_WORD_RE.match(text, i)
+            if not m:
+                out.append(c)
+                i += 1
+                continue
+            word = m.group()
+            rest = text[m.end():].lstrip()
+            if rest.startswith(":") and not word[0].isdigit():
+                out.append(json.dumps(word))  # unquoted key
+            elif word in LITERALS:
+                out.append(LITERALS[word])
+            elif word[0].isdigit() or word[0] == "-":
+                out.append(word)
+            else:
+                out.append("null" if word in ("NaN", "undefined") else json.dumps(word))
+            i = m.end()
+            safe.append((len(out), tuple(stack)))
+        else:
+            out.append(c)
+            i += 1
+    return "".join(out), stack, safe, False
+
+
+def repair_json(text, partial=False):
+    """
+    Best-effort parse of a model's JSON reply; None when nothing usable is in it.
+    A string cut off by truncation is dropped unless `partial` (used while streaming).
+    """
+    if not text:
+        return None
+    try:
+        return json.loads(text)
+    except (TypeError, ValueError):
+        pass
+    fixed, stack, safe, cut = _normalize(str(text))
+    if not fixed:
+        return None
+    candidates = [] if cut and not partial else [fixed + _closers(stack)]
+    # Truncated reply: fall back to the last point where a value was complete
+    for pos, stack_at in reversed(safe):
+        head = list(fixed[:pos])
+        _drop_trailing_comma(head)
+        candidates.append("".join(head) + _closers(stack_at))
+    for candidate in candidates:
+        try:
+            return json.loads(candidate)
+        except ValueError:
+            continue
+    return None
+
+
+class StreamingJSONParser:
+    """Feed reply chunks; each feed returns the best parse of everything so far (or None)."""
+
+    def __init__(self):
+        self.text = ""
+        self.value = None
+
+    def feed(self, chunk):
+        self.text += chunk
+        # Only re-parse once something that can complete a value has arrived
+        if any(c in chunk for c in "\",}]"):
+            value = repair_json(self.text, partial=True)
+            if value is not None:
+                self.value = value
+        return self.value
+
+
+def _coerce(value, spec):
+    """(value, ok) with `value` converted to the property's type where that is unambiguous."""
+    kind = spec.get("type", "string")
+    if kind == "array":
+        if isinstance(value, str):
+            value = [v for v in LIST_SPLIT_RE.split(value.strip().lstrip("-*• ")) if v]
+        if not isinstance(value, list):
+            return None, False
+        items = [v if isinstance(v, str) else json.dumps(v, ensure_ascii=False) if isinstance(v, (dict, list)) else str(v)
+                 for v in value if v is not None]
+        return [v.strip() for v in items if v.strip()], True
+    if isinstance(value, list):
+        items = [str(v).strip() for v in value if v is not None]
+        # A list of short items (skills, links) reads best as one line; anything longer as lines
+        short = all(len(v) <= 40 and "\n" not in v for v in items)
+        return (", " if short else "\n").join(items), True
+    if isinstance(value, dict):
+        return None, False
+    if value is None:
+        return "", False
+    return str(value).strip(), True
+
+
+def coerce(data, schema):
+    """(clean, invalid): properties coerced to the schema, and the required ones that are missing or unusable."""
+    clean, invalid = {}, []
+    data = data if isinstance(data, dict) else {}
+    required = set(schema.get("required", schema["properties"]))
+    for name, spec in schema["properties"].items():
+        value, ok = _coerce(data[name], spec) if name in data else (None, False)
+        if ok:
+            clean[name] = value
+        elif name in required:
+            invalid.append(name)
+    return clean, invalid
+
+
+def subschema(schema, fields):
+    return {
+        "type": "object",
+        "properties": {name: schema["properties"][name] for name in fields},
+        "required": list(fields),
+    }
+
+
+def describe(schema):
+    """Compact text form of the schema for the prompt (the JSON modes do not tell the model field meanings)."""
+    lines = []
+    for name, spec in schema["properties"].items():
+        kind = "list of strings" if spec.get("type") == "array" else "string"
+        desc = f" - {spec['description']}" if spec.get("description") else ""
+        lines.append(f'  "{name}": {kind}{desc}')
+    return "{\n" + ",\n".join(lines) + "\n}"
+
+
+def structured_prompt(prompt, schema):
+    return f"{prompt.rstrip()}\n\nReturn ONLY a JSON object with these keys:\n{describe(schema)}\n"
+
+
+def reask_prompt(prompt, schema, fields):
+    return (
+        f"{prompt.rstrip()}\n\nAn earlier answer was missing or had invalid values for: {', '.join(fields)}.\n"
+        f"Return ONLY a JSON object with just these keys:\n{describe(subschema(schema, fields))}\n"
+    )
+
+
+def _is_repaired(reply):
+    try:
+        json.loads(reply)
+        return False
+    except ValueError:
+        return True
+
+
+def _ask(prompt, model_name, schema, on_partial=None, hedge=False):
+    if on_partial is None:
+        return query_llm(prompt, model_name, hedge=hedge, json_schema=schema)
+    stream = LLMStream(prompt, model_name, json_schema=schema)
+    parser = StreamingJSONParser()
+    for chunk in stream:
+        partial = parser.feed(chunk)
+        if isinstance(partial, dict):
+            on_partial(partial)
+    return stream.text
+
+
+def generate_structured(prompt, model_name, schema, on_partial=None, hedge=False, max_reasks=MAX_REASKS):
+    """
+    Asks for `schema`-shaped JSON and returns a StructuredResult. `data` holds
+    every field that could be read (coerced to the schema); `invalid` lists the
+    required fields still unusable after up to `max_reasks` targeted re-asks.
+    A provider error on the first call is returned in `error` with data=None.
+    `on_partial(dict)` receives the partial object while the first reply streams.
+    """
+    base = structured_prompt(prompt, schema)
+    with telemetry.span("structured_output", fields=len(schema["properties"])) as attrs:
+        reply = _ask(base, model_name, schema, on_partial, hedge)
+        if reply.startswith("Error generating content"):
+            attrs["error"] = reply
+            return StructuredResult(None, list(schema["properties"]), 0, reply)
+        data, invalid = coerce(repair_json(reply), schema)
+        attrs["repaired"] = _is_repaired(reply)
+        reasks = 0
+        while invalid and reasks < max_reasks:
+            reasks += 1
+            sub = subschema(schema, invalid)
+            fix, _ = coerce(repair_json(_ask(reask_prompt(prompt, schema, invalid), model_name, sub)), sub)
+            data.update(fix)
+            invalid = [name for name in invalid if name not in fix]
+        attrs.update(reasks=reasks, invalid=invalid)
+    telemetry.inc("career_structured_reasks_total", reasks)
+    return StructuredResult(data, invalid, reasks, None)
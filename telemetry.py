@@ -0,0 +1,241 @@
+"""
+Per-stage tracing and metrics for the analysis and builder pipelines.
+
+    with telemetry.trace("skill_gap", mode="full"):
+        with telemetry.span("pdf_extract") as s:
+            ...
+            s["pages"] = 3
+
+A trace groups the spans of one user request. Finished traces are
+  - appended to a rotating JSONL log (TELEMETRY_LOG, default logs/telemetry.jsonl),
+  - kept in memory (last TELEMETRY_RECENT, default 50) for the diagnostics panel,
+  - folded into counters/histograms exposed in Prometheus text format, served
+    on /metrics when METRICS_PORT is set.
+Spans opened outside a trace still update the metrics.
+"""
+import contextvars
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from logging.handlers import RotatingFileHandler
+from pathlib import Path
+
+DEFAULT_LOG_PATH = Path(__file__).parent / "logs" / "telemetry.jsonl"
+DURATION_BUCKETS = (0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+_current_trace = contextvars.ContextVar("telemetry_trace", default=None)
+_lock = threading.Lock()
+_recent = deque(maxlen=int(os.getenv("TELEMETRY_RECENT", "50")))
+_counters = {}
+_histograms = {}
+_logger = None
+_server = None
+
+
+def _label_key(labels):
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def inc(name, amount=1, **labels):
+    with _lock:
+        key = (name, _label_key(labels))
+        _counters[key] = _counters.get(key, 0) + amount
+
+
+def observe(name, value, **labels):
+    with _lock:
+        key = (name, _label_key(labels))
+        hist = _histograms.get(key)
+        if hist is None:
+            hist = _histograms[key] = {"buckets": [0] * len(DURATION_BUCKETS), "count": 0, "sum": 0.0}
+        hist["count"] += 1
+        hist["sum"] += value
+        for i, bound in enumerate(DURATION_BUCKETS):
+            if value <= bound:
+                hist["buckets"][i] += 1
+
+
+class Trace:
+    def __init__(self, name, attrs):
+        self.id = uuid.uuid4().hex[:12]
+        self.name = name
+        self.attrs = attrs
+        self.started = time.time()
+        self.spans = []
+        self._lock = threading.Lock()
+
+    def add_span(self, record):
+        with self._lock:
+            self.spans.append(record)
+
+
+def current_trace():
+    return _current_trace.get()
+
+
+def annotate(**attrs):
+    """Adds attributes to the current trace (no-op outside one)."""
+    t = _current_trace.get()
+    if t is not None:
+        t.attrs.update(attrs)
+
+
+@contextmanager
+def span(name, **attrs):
+    """Times a pipeline stage. Yields a dict; keys set on it are recorded as span attributes."""
+    start = time.perf_counter()
+    error = None
+    try:
+        yield attrs
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        duration = time.perf_counter() - start
+        observe("career_stage_duration_seconds", duration, stage=name)
+        inc("career_stage_total", stage=name, status="error" if error else "ok")
+        t = _current_trace.get()
+        if t is not None:
+            record = {"name": name, "duration_s": round(duration, 6), **attrs}
+            if error:
+                record["error"] = error
+            t.add_span(record)
+
+
+@contextmanager
+def trace(name, **attrs):
+    """Groups the spans of one request and exports it when done."""
+    t = Trace(name, attrs)
+    token = _current_trace.set(t)
+    start = time.perf_counter()
+    error = None
+    try:
+        yield t
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        _current_trace.reset(token)
+        duration = time.perf_counter() - start
+        observe("career_request_duration_seconds", duration, request=name)
+        inc("career_requests_total", request=name, status="error" if error else "ok")
+        record = {
+            "trace_id": t.id,
+            "name": name,
+            "start": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(t.started)),
+            "duration_s": round(duration, 6),
+            "attrs": t.attrs,
+            "spans": t.spans,
+        }
+        if error:
+            record["error"] = error
+        _export(record)
+
+
+def _get_logger():
+    global _logger
+    with _lock:
+        if _logger is None:
+            logger = logging.getLogger("career_assistant.telemetry")
+            logger.propagate = False
+            logger.setLevel(logging.INFO)
+            try:
+                path = Path(os.getenv("TELEMETRY_LOG") or DEFAULT_LOG_PATH)
+                path.parent.mkdir(parents=True, exist_ok=True)
+                handler = RotatingFileHandler(path, maxBytes=5 * 1024 * 1024, backupCount=3, encoding="utf-8")
+                handler.setFormatter(logging.Formatter("%(message)s"))
+                logger.addHandler(handler)
+            except OSError:
+                logger.addHandler(logging.NullHandler())
+            _logger = logger
+        return _logger
+
+
+def _export(record):
+    with _lock:
+        _recent.append(record)
+    if os.getenv("TELEMETRY_DISABLED", "").strip().lower() in ("1", "true", "yes", "on"):
+        return
+    _get_logger().info(json.dumps(record, default=str, ensure_ascii=False))
+
+
+def recent_traces(limit=None):
+    """Newest first."""
+    with _lock:
+        items = list(_recent)
+    items.reverse()
+    return items[:limit] if limit else items
+
+
+# --- PROMETHEUS EXPORT ---
+
+def _format_labels(key, extra=()):
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{str(v).replace(chr(34), chr(39))}"' for k, v in pairs) + "}"
+
+
+def render_prometheus():
+    lines = []
+    with _lock:
+        counters = dict(_counters)
+        histograms = {k: {"buckets": list(v["buckets"]), "count": v["count"], "sum": v["sum"]} for k, v in _histograms.items()}
+    for name in sorted({n for n, _ in counters}):
+        lines.append(f"# TYPE {name} counter")
+        for (n, labels), value in sorted(counters.items()):
+            if n == name:
+                lines.append(f"{name}{_format_labels(labels)} {value}")
+    for name in sorted({n for n, _ in histograms}):
+        lines.append(f"# TYPE {name} histogram")
+        for (n, labels), hist in sorted(histograms.items()):
+            if n != name:
+                continue
+            # Buckets are stored per-bound already, so they are cumulative
+            for bound, count in zip(DURATION_BUCKETS, hist["buckets"]):
+                lines.append(f"{name}_bucket{_format_labels(labels, [('le', bound)])} {count}")
+            lines.append(f"{name}_bucket{_format_labels(labels, [('le', '+Inf')])} {hist['count']}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {hist['sum']:.6f}")
+            lines.append(f"{name}_count{_format_labels(labels)} {hist['count']}")
+    return "\n".join(lines) + "\n"
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.rstrip("/") != "/metrics":
+            self.send_error(404)
+            return
+        body = render_prometheus().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_metrics_server(port=None):
+    """
+    Serves /metrics on `port` (default: METRICS_PORT) in a daemon thread.
+    Safe to call on every Streamlit rerun; only the first call starts a server.
+    """
+    global _server
+    port = port or os.getenv("METRICS_PORT")
+    if not port:
+        return None
+    with _lock:
+        if _server is None:
+            try:
+                _server = ThreadingHTTPServer(("0.0.0.0", int(port)), _MetricsHandler)
+            except OSError:
+                return None
+            threading.Thread(target=_server.serve_forever, name="metrics-http", daemon=True).start()
+        return _server
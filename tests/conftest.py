@@ -0,0 +1,8 @@
+import os
+import sys
+from pathlib import Path
+
+# The app's modules are top-level files in the repository root
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("LLM_CACHE_DISABLED", "1")
+os.environ.setdefault("TELEMETRY_DISABLED", "1")
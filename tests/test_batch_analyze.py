@@ -0,0 +1,29 @@
+import json
+
+from batch_analyze import ResultWriter, load_completed
+
+
+def _record(resume, status="ok"):
+    return {"resume": resume, "jd": "jd.txt", "status": status, "elapsed_s": 0.1}
+
+
+def test_append_after_torn_line_stays_parseable(tmp_path):
+    out = tmp_path / "results.jsonl"
+    out.write_text(json.dumps(_record("a.pdf")) + "\n" + '{"resume": "b.pdf", "jd": "jd', encoding="utf-8")
+    assert load_completed(out) == {"a.pdf::jd.txt"}
+
+    writer = ResultWriter(out)
+    writer.write(_record("c.pdf"))
+    writer.close()
+
+    lines = out.read_text(encoding="utf-8").splitlines()
+    assert [json.loads(line)["resume"] for line in lines] == ["a.pdf", "c.pdf"]
+    assert load_completed(out) == {"a.pdf::jd.txt", "c.pdf::jd.txt"}
+
+
+def test_single_torn_line_is_dropped(tmp_path):
+    out = tmp_path / "results.jsonl"
+    out.write_text('{"resume": "b.pdf"', encoding="utf-8")
+    ResultWriter(out).close()
+    assert out.read_bytes() == b""
+
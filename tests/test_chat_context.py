@@ -0,0 +1,32 @@
+import re
+
+from chat_context import ChatContext, estimate_tokens
+
+
+def _document_lengths(prompt):
+    blocks = re.findall(r"\[DOCUMENT \w+: (\w+)\]\n(.*?)(?=\n\n\[DOCUMENT|\n\nHistory:)", prompt, re.S)
+    return {name: estimate_tokens(text) for name, text in blocks}
+
+
+def test_newest_document_gets_budget_first():
+    context = ChatContext({}, "gemini-2.5-flash")
+    old = context.add_attachment("old", "old words " * 5000)
+    new = context.add_attachment("new", "new words " * 5000)
+    prompt = context.build_prompt([{"role": "user", "content": "cv", "attachments": [old]}], "and this?",
+                                  summarize=lambda p: "", attachment_ids=[new])
+    lengths = _document_lengths(prompt)
+    doc_budget = int(context.budget * context.attachment_share)
+    assert lengths["new"] > lengths["old"] >= doc_budget // 4 - 1
+    assert sum(lengths.values()) <= doc_budget + 10
+
+
+def test_short_newest_document_leaves_the_rest_to_older_ones():
+    context = ChatContext({}, "gemini-2.5-flash")
+    old = context.add_attachment("old", "old words " * 5000)
+    new = context.add_attachment("new", "a short note")
+    prompt = context.build_prompt([{"role": "user", "content": "cv", "attachments": [old]}], "and this?",
+                                  summarize=lambda p: "", attachment_ids=[new])
+    lengths = _document_lengths(prompt)
+    doc_budget = int(context.budget * context.attachment_share)
+    assert lengths["new"] == estimate_tokens("a short note")
+    assert lengths["old"] > doc_budget * 0.9
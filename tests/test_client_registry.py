@@ -0,0 +1,36 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from client_registry import ClientRegistry
+
+
+def test_gemini_model_handles_are_reused_per_key():
+    registry = ClientRegistry()
+    registry.configure_gemini("key-1")
+    first = registry.gemini_model("gemini-2.5-flash")
+    assert registry.gemini_model("models/gemini-2.5-flash") is first
+    stats = registry.stats()
+    assert (stats["model_handles_created"], stats["model_handle_hits"]) == (1, 1)
+    assert stats["gemini_models"] == ["gemini-2.5-flash"]
+
+    registry.configure_gemini("key-1")
+    assert registry.gemini_model("gemini-2.5-flash") is first
+    registry.configure_gemini("key-2")
+    assert registry.gemini_model("gemini-2.5-flash") is not first
+
+
+def test_one_groq_client_shared_across_threads():
+    registry = ClientRegistry(max_connections=4)
+    assert registry.groq() is None and not registry.has_groq
+    registry.configure_groq("key-1")
+    with ThreadPoolExecutor(8) as pool:
+        clients = list(pool.map(lambda _: registry.groq(), range(32)))
+    assert all(c is clients[0] for c in clients)
+    stats = registry.stats()
+    assert stats["groq_clients_created"] == 1
+    assert stats["groq_pool"] == {"open": 0, "idle": 0, "active": 0}
+    assert stats["max_connections"] == 4
+
+    registry.configure_groq("key-2")
+    assert registry.groq() is not clients[0]
+    registry.configure_groq("")
+    assert registry.groq() is None and not registry.has_groq
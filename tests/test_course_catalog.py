@@ -0,0 +1,30 @@
+import os
+
+import course_catalog
+
+
+CSV = b"skill_name,course_title,course_url\n Python ,Python 101,https://example.com/py\nSQL,SQL Basics,https://example.com/sql\n"
+
+
+def test_normalize_maps_columns_and_adds_skill_key():
+    df = course_catalog.read_catalog_bytes(CSV)
+    assert list(df.columns) == ["Skill", "Course Name", "URL", "skill_key"]
+    assert df["skill_key"].tolist() == ["python", "sql"]
+    assert df.to_dict("records")[1]["Course Name"] == "SQL Basics"
+
+
+def test_file_and_bytes_give_the_same_catalog(tmp_path):
+    path = tmp_path / "courses.csv"
+    path.write_bytes(CSV)
+    assert course_catalog.read_catalog_file(path).equals(course_catalog.read_catalog_bytes(CSV))
+
+
+def test_cache_keys_change_when_the_catalog_is_edited(tmp_path):
+    path = tmp_path / "courses.csv"
+    path.write_bytes(CSV)
+    before = course_catalog.file_signature(path)
+    edited = CSV + b"Docker,Docker 101,https://example.com/docker\n"
+    path.write_bytes(edited)
+    os.utime(path, ns=(before[1] + 1, before[1] + 1))
+    assert course_catalog.file_signature(path) != before
+    assert course_catalog.content_digest(edited) != course_catalog.content_digest(CSV)
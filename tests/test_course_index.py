@@ -0,0 +1,24 @@
+import sys
+from pathlib import Path
+
+import course_catalog
+from course_index import CourseIndex
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "benchmarks"))
+import fixtures  # noqa: E402
+from bench_course_matcher import legacy_recommend_courses  # noqa: E402
+
+EDGE_SKILLS = ["", "a", "py", "SQL", "Python Programming", "Machine Learning Engineer", "C++", "Zzz"]
+
+
+def test_lookup_matches_substring_scan_on_generated_catalogs():
+    skills = fixtures.make_skills(60) + EDGE_SKILLS
+    for rows, seed in [(50, 0), (2000, 1)]:
+        df = fixtures.make_catalog(rows, seed=seed)
+        assert CourseIndex(df).lookup(skills) == legacy_recommend_courses(skills, df)
+
+
+def test_lookup_matches_substring_scan_on_default_catalog():
+    df = course_catalog.catalog_from_records(course_catalog.DEFAULT_COURSES)
+    skills = [record["Skill"] for record in course_catalog.DEFAULT_COURSES] + EDGE_SKILLS
+    assert CourseIndex(df).lookup(skills) == legacy_recommend_courses(skills, df)
@@ -0,0 +1,34 @@
+import course_catalog
+from course_retrieval import CourseRetriever
+from pipeline import recommend_courses
+
+EXTRA_COURSES = [
+    {"Skill": "JavaScript", "Course Name": "JavaScript Essentials", "URL": "https://example.com/js"},
+    {"Skill": "Spark", "Course Name": "Apache Spark", "URL": "https://example.com/spark"},
+    {"Skill": "Rest APIs", "Course Name": "Building RESTful APIs", "URL": "https://example.com/api"},
+]
+
+
+def _catalog():
+    return course_catalog.catalog_from_records(course_catalog.DEFAULT_COURSES + EXTRA_COURSES)
+
+
+def test_unrelated_short_skill_returns_nothing():
+    df = _catalog()
+    retriever = CourseRetriever.build(df)
+    assert retriever.search(["Java", "Spa"]) == [[], []]
+    # "Fund" (as in fund accounting) used to land on "AWS Fundamentals" via n-grams
+    assert recommend_courses(["Fund"], df) == {}
+
+
+def test_skill_sharing_only_character_ngrams_returns_nothing():
+    # "processing" is inside "preprocessing" (Data Science Foundations), but no word is shared
+    df = course_catalog.catalog_from_records(course_catalog.DEFAULT_COURSES)
+    assert CourseRetriever.build(df).search(["Natural Language Processing"]) == [[]]
+    assert "Natural Language Processing" not in recommend_courses(["Natural Language Processing"], df)
+
+
+def test_short_skill_with_a_shared_word_and_long_skills_still_match():
+    retriever = CourseRetriever.build(_catalog())
+    rest, cloud, aws = retriever.search(["Rest", "cloud", "Experience with cloud platforms beyond basic AWS"])
+    assert rest and cloud and aws
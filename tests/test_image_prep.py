@@ -0,0 +1,33 @@
+import io
+
+import pytest
+from PIL import Image
+
+from image_prep import ImagePreprocessor, _slices
+
+
+@pytest.mark.parametrize("size,max_parts", [
+    ((500, 6000), 6), ((1080, 20000), 6), ((1080, 8000), 6), ((1080, 3000), 6), ((300, 100000), 3), ((1080, 9000), 1),
+])
+def test_slices_cover_the_whole_image(size, max_parts):
+    width, height = size
+    boxes = _slices(Image.new("L", size), 2.5, max_parts, 1600)
+    assert len(boxes) <= max_parts
+    assert boxes[0][1] == 0
+    assert boxes[-1][3] == height
+    # Consecutive slices overlap or touch, so no rows are skipped
+    assert all(nxt[1] <= prev[3] for prev, nxt in zip(boxes, boxes[1:]))
+
+
+def test_short_image_is_not_split():
+    assert _slices(Image.new("L", (1000, 2000)), 2.5, 6, 1600) == [(0, 0, 1000, 2000)]
+
+
+def test_prepare_downscales_and_caches():
+    buf = io.BytesIO()
+    Image.effect_noise((3000, 2000), 64).convert("RGB").save(buf, format="JPEG", quality=95)
+    preprocessor = ImagePreprocessor(max_dim=800)
+    first = preprocessor.prepare(buf.getvalue())
+    assert max(Image.open(io.BytesIO(first.parts[0])).size) == 800
+    assert first.processed_bytes < first.original_bytes
+    assert preprocessor.prepare(buf.getvalue()).cached
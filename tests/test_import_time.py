@@ -0,0 +1,40 @@
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+HEAVY = ["pandas", "scipy", "fpdf", "PyPDF2"]
+# Generous: a cold chatbot first paint takes well under a second on a laptop
+BUDGET_SECONDS = 10.0
+
+PROBE = """
+import json, sys, time, warnings
+warnings.filterwarnings("ignore")
+sys.path.insert(0, {root!r})
+from streamlit.testing.v1 import AppTest
+
+app = AppTest.from_file({app!r}, default_timeout=60)
+app.session_state["app_mode"] = "Career Chatbot"
+start = time.perf_counter()
+app.run()
+elapsed = time.perf_counter() - start
+print(json.dumps({{
+    "seconds": elapsed,
+    "titles": [t.value for t in app.title],
+    "exceptions": [e.value for e in app.exception],
+    "loaded": [m for m in {heavy!r} if m in sys.modules],
+}}))
+"""
+
+
+def test_chatbot_first_paint_skips_heavy_imports(tmp_path, monkeypatch):
+    monkeypatch.setenv("GOOGLE_API_KEY", "test-key")
+    monkeypatch.setenv("SESSION_STORE_DIR", str(tmp_path))
+    code = PROBE.format(root=str(ROOT), app=str(ROOT / "app.py"), heavy=HEAVY)
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True, timeout=120).stdout
+    result = json.loads(out.strip().splitlines()[-1])
+    assert result["exceptions"] == []
+    assert result["titles"] == ["💬 Career Coach"]
+    assert result["loaded"] == []
+    assert result["seconds"] < BUDGET_SECONDS
@@ -0,0 +1,42 @@
+from jd_ranking import jd_title, score_job_descriptions, split_job_descriptions
+
+RESUME = """Jane Doe - Data Engineer
+Built ETL data pipelines in Python and SQL on AWS; deployed services with Docker.
+Trained machine learning models for churn prediction."""
+
+PASTED = """Senior Data Engineer
+We need Python, SQL and data pipelines on AWS. Docker is a plus.
+---
+Frontend Developer
+React, JavaScript, HTML and CSS. You will build our customer dashboard.
+===
+ML Engineer
+Machine learning, Python and Kubernetes. Experience with model serving.
+"""
+
+
+def test_split_and_title():
+    jds = split_job_descriptions(PASTED)
+    assert [jd_title(jd) for jd in jds] == ["Senior Data Engineer", "Frontend Developer", "ML Engineer"]
+    assert split_job_descriptions("") == []
+    assert jd_title("## " + "x" * 80).endswith("…") and len(jd_title("x" * 80)) == 60
+
+
+def test_best_matching_jd_ranks_first():
+    ranked = score_job_descriptions(RESUME, split_job_descriptions(PASTED))
+    assert [r["title"] for r in ranked] == ["Senior Data Engineer", "ML Engineer", "Frontend Developer"]
+    assert [r["index"] for r in ranked] == [0, 2, 1]
+    scores = [r["score"] for r in ranked]
+    assert scores == sorted(scores, reverse=True)
+    best, _, worst = ranked
+    assert best["skill_coverage"] == 1.0 and best["missing"] == []
+    assert worst["skill_coverage"] == 0.0 and "React" in worst["missing"]
+
+
+def test_jd_without_catalog_skills_is_ranked_on_terms():
+    jds = ["Churn prediction analyst for customer models", "Forklift operator for our warehouse night shift"]
+    ranked = score_job_descriptions(RESUME, jds)
+    assert [r["index"] for r in ranked] == [0, 1]
+    assert ranked[0]["score"] == ranked[0]["term_similarity"] > 0
+    assert ranked[1]["score"] == 0.0
+    assert score_job_descriptions(RESUME, []) == []
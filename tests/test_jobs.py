@@ -0,0 +1,40 @@
+from jobs import DONE, JobExecutor
+
+
+def test_finished_results_are_bounded_by_size():
+    executor = JobExecutor(max_workers=1, max_finished=256, max_finished_bytes=10_000)
+    jobs = [executor.submit(lambda: "x" * 4000) for _ in range(5)]
+    for job in jobs:
+        assert job.wait(5)
+    assert executor.stats()["result_bytes"] <= 10_000
+    # The oldest results went first; the newest is still there for its page
+    assert executor.get(jobs[0].id) is None
+    assert executor.get(jobs[-1].id).status == DONE
+
+
+def test_finished_results_are_bounded_by_count():
+    executor = JobExecutor(max_workers=1, max_finished=2)
+    jobs = [executor.submit(lambda i=i: i) for i in range(4)]
+    for job in jobs:
+        assert job.wait(5)
+    assert [executor.get(job.id) is not None for job in jobs] == [False, False, True, True]
+
+
+def test_a_result_larger_than_the_budget_waits_for_its_page():
+    executor = JobExecutor(max_workers=1, max_finished_bytes=10_000)
+    job = executor.submit(lambda: "x" * 50_000)
+    assert job.wait(5)
+    assert executor.get(job.id).result == "x" * 50_000
+
+
+def test_collected_results_are_evicted_before_uncollected_ones():
+    executor = JobExecutor(max_workers=1, max_finished_bytes=10_000)
+    waiting = executor.submit(lambda: "a" * 4000)
+    collected = executor.submit(lambda: "b" * 4000)
+    for job in (waiting, collected):
+        assert job.wait(5)
+    assert executor.get(collected.id) is not None
+    newest = executor.submit(lambda: "c" * 4000)
+    assert newest.wait(5)
+    assert executor.get(collected.id) is None
+    assert executor.get(waiting.id) is not None and executor.get(newest.id) is not None
@@ -0,0 +1,70 @@
+from types import SimpleNamespace
+
+import pytest
+
+import llm
+import llm_cache
+from llm_cache import ResponseCache
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(llm_cache, "time", SimpleNamespace(time=clock))
+    return clock
+
+
+def test_evicts_least_recently_used_past_size_budget(tmp_path, clock):
+    cache = ResponseCache(tmp_path, max_bytes=25, ttl_seconds=0)
+    cache.set("a", "a" * 10)
+    clock.now += 1
+    cache.set("b", "b" * 10)
+    clock.now += 1
+    assert cache.get("a") == "a" * 10
+    clock.now += 1
+    cache.set("c", "c" * 10)
+    assert cache.get("b") is None
+    assert cache.get("a") == "a" * 10
+    assert cache.get("c") == "c" * 10
+    assert cache.stats()["evictions"] == 1
+
+
+def test_expires_entries_past_ttl(tmp_path, clock):
+    cache = ResponseCache(tmp_path, ttl_seconds=60)
+    cache.set("a", "reply")
+    clock.now += 59
+    assert cache.get("a") == "reply"
+    clock.now += 2
+    assert cache.get("a") is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_errors_are_never_cached(tmp_path, monkeypatch):
+    cache = ResponseCache(tmp_path)
+    monkeypatch.setattr(llm, "get_response_cache", lambda: cache)
+    replies = iter([RuntimeError("401 invalid API key"), RuntimeError("401 invalid API key"), "fine", "other"])
+
+    def provider(model_name, prompt, image_data, stream):
+        reply = next(replies)
+        if isinstance(reply, Exception):
+            raise reply
+        return iter([reply]) if stream else reply
+
+    llm.register_provider("cachetest/", provider)
+    try:
+        assert llm.query_llm("hi", "cachetest/m").startswith("Error generating content")
+        assert "".join(llm.LLMStream("hi", "cachetest/m")).startswith("Error generating content")
+        assert cache.stats()["entries"] == 0
+        assert llm.query_llm("hi", "cachetest/m") == "fine"
+        assert llm.query_llm("hi", "cachetest/m") == "fine"
+    finally:
+        llm.unregister_provider("cachetest/")
+    assert cache.stats()["entries"] == 1
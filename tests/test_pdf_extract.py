@@ -0,0 +1,77 @@
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+from fpdf import FPDF
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "benchmarks"))
+import fixtures  # noqa: E402
+from pdf_extract import PDFTextExtractor  # noqa: E402
+
+
+def make_slow_pdf(pages, marks=20000):
+    """Pages made of many tiny text runs, each of which takes PyPDF2 around a second to extract."""
+    pdf = FPDF()
+    pdf.set_auto_page_break(auto=False)
+    for _ in range(pages):
+        pdf.add_page()
+        pdf.set_font("Arial", size=6)
+        for i in range(marks):
+            pdf.text(10 + (i % 30) * 6, 10 + (i // 30) % 250, "ab")
+    return pdf.output(dest="S").encode("latin-1")
+
+
+@pytest.fixture
+def extractor():
+    extractor = PDFTextExtractor(max_workers=2, parallel_min_pages=4, cache_size=4)
+    yield extractor
+    extractor.close()
+
+
+def test_short_documents_are_read_in_process(extractor):
+    result = extractor.extract(fixtures.make_pdf(2))
+    assert result.pages_read == 2 and "Experience (page 2)" in result.text
+    assert extractor._pool is None
+
+
+def test_serial_and_parallel_paths_agree_and_reuse_the_pool(extractor):
+    data = fixtures.make_pdf(6)
+    parallel = extractor.extract(data)
+    pool = extractor._pool
+    assert parallel.pages_read == 6 and not parallel.skipped_pages
+    extractor.clear_cache()
+    assert extractor.extract(data).text == parallel.text
+    assert extractor._pool is pool
+    serial = PDFTextExtractor(max_workers=2, parallel_min_pages=100, cache_size=0)
+    assert serial.extract(data).text == parallel.text
+
+
+def test_a_slow_page_kills_only_its_worker(extractor):
+    extractor.page_timeout = 0.3
+    slow = extractor.extract(make_slow_pdf(4, marks=40000))
+    assert slow.skipped_pages and slow.pages_read < 4
+    # The shared pool survives, and timed-out results are not cached
+    pool = extractor._pool
+    extractor.page_timeout = 10.0
+    assert extractor.extract(fixtures.make_pdf(6)).pages_read == 6
+    assert extractor._pool is pool
+
+
+def test_time_queued_behind_other_documents_is_not_billed(extractor):
+    # Two documents' slow pages share two workers: the later pages wait about as
+    # long as they run, so a clock started at submission would time them out.
+    data = [make_slow_pdf(4, marks=16000), make_slow_pdf(4, marks=16001)]
+    extractor.extract(fixtures.make_pdf(4))  # pool up before the clock matters
+    extractor.page_timeout = 2.0
+    results = [None, None]
+
+    def run(k):
+        results[k] = extractor.extract(data[k])
+
+    threads = [threading.Thread(target=run, args=(k,)) for k in range(2)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert [r.pages_read for r in results] == [4, 4]
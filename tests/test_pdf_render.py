@@ -0,0 +1,62 @@
+import random
+import re
+import sys
+import zipfile
+from pathlib import Path
+
+import pytest
+from fpdf import FPDF
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "benchmarks"))
+import fixtures  # noqa: E402
+from bench_pdf_render import legacy_create_pdf, page_text  # noqa: E402
+import pdf_render  # noqa: E402
+
+
+def _without_date(pdf_bytes):
+    return re.sub(rb"/CreationDate \(D:\d+\)", b"", pdf_bytes)
+
+
+def _stock_render(monkeypatch, markdown_text, theme_color):
+    """render_pdf with fpdf's own multi_cell."""
+    with monkeypatch.context() as m:
+        m.setattr(pdf_render, "_pdf_class", lambda: FPDF)
+        return pdf_render.render_pdf(markdown_text, theme_color)
+
+
+def _awkward_markdown(seed):
+    rng = random.Random(seed)
+    lines = ["# Jane Doe"]
+    for _ in range(rng.randint(5, 80)):
+        lines.append(" ".join(rng.choice(["a", "to", "Wide", "M" * rng.randint(1, 120), ""]) for _ in range(rng.randint(0, 60))))
+    return "\n".join(lines) + "\n" * rng.randint(0, 2)
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_layout_matches_legacy_renderer(seed):
+    md = fixtures.make_resume_markdown(sections=3 + seed, bullets=4 + seed, seed=seed)
+    assert page_text(pdf_render.render_pdf(md, "#4b6cb7")) == page_text(legacy_create_pdf(md, "#4b6cb7"))
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_fast_multi_cell_is_byte_identical_to_fpdf(monkeypatch, seed):
+    # Long words, blank lines, trailing newlines and page breaks mid-paragraph
+    md = _awkward_markdown(seed)
+    assert _without_date(pdf_render.render_pdf(md)) == _without_date(_stock_render(monkeypatch, md, "#000000"))
+
+
+def test_wrap_paragraph_breaks_at_spaces_and_inside_long_words():
+    widths = {c: 100 for c in "ab "}
+    assert pdf_render.wrap_paragraph("aa bb aa", widths, 550) == [("aa bb", 2, 500), ("aa", None, None)]
+    assert pdf_render.wrap_paragraph("aaaaaaa", widths, 250) == [("aa", None, None), ("aa", None, None),
+                                                                ("aa", None, None), ("a", None, None)]
+    assert pdf_render.wrap_paragraph("", widths, 250) == [("", None, None)]
+
+
+def test_render_batch_writes_a_zip(tmp_path):
+    items = [(f"r{i}.md", fixtures.make_resume_markdown(seed=i)) for i in range(3)]
+    summary = pdf_render.render_batch(items, tmp_path / "out.zip", workers=1)
+    assert summary["rendered"] == 3 and not summary["errors"]
+    with zipfile.ZipFile(tmp_path / "out.zip") as z:
+        assert sorted(z.namelist()) == ["r0.pdf", "r1.pdf", "r2.pdf"]
+        assert all(z.read(name).startswith(b"%PDF") for name in z.namelist())
@@ -0,0 +1,61 @@
+import re
+
+import pytest
+
+import llm
+import pipeline
+from llm_cache import ResponseCache
+
+USER = {
+    "name": "Jane Doe", "email": "jane@example.com",
+    "summary": "Data engineer", "experience": "Built ETL pipelines at Acme",
+    "education": "BSc Computer Science", "skills": "Python, SQL",
+}
+
+
+@pytest.fixture
+def calls(tmp_path, monkeypatch):
+    monkeypatch.setattr(pipeline, "get_response_cache", lambda: ResponseCache(tmp_path))
+    calls = []
+
+    def provider(model_name, prompt, image_data, stream):
+        title = re.search(r'Write the "([^"]+)" section', prompt).group(1)
+        calls.append(title)
+        if title == "Skills" and "fail" in prompt:
+            raise RuntimeError("401 invalid API key")
+        return f"## {title}\nTailored {title.lower()}"
+
+    llm.register_provider("sectiontest/", provider)
+    yield calls
+    llm.unregister_provider("sectiontest/")
+
+
+def test_unchanged_sections_come_from_cache(calls):
+    first = pipeline.generate_resume_sections(USER, "Data engineer JD", "sectiontest/m")
+    assert sorted(calls) == ["Education", "Experience", "Professional Summary", "Skills"]
+    assert first.startswith("# Jane Doe\njane@example.com\n\n## Professional Summary")
+
+    calls.clear()
+    assert pipeline.generate_resume_sections(USER, "Data engineer JD", "sectiontest/m") == first
+    assert calls == []
+
+    pipeline.generate_resume_sections({**USER, "education": "MSc Data Science"}, "Data engineer JD", "sectiontest/m")
+    assert calls == ["Education"]
+
+    calls.clear()
+    pipeline.generate_resume_sections({**USER, "skills": "Python, SQL, Spark"}, "Data engineer JD", "sectiontest/m")
+    # The summary is written from the skills too
+    assert sorted(calls) == ["Professional Summary", "Skills"]
+
+    calls.clear()
+    pipeline.generate_resume_sections(USER, "Platform engineer JD", "sectiontest/m")
+    assert len(calls) == 4
+
+
+def test_failed_section_falls_back_and_is_retried(calls):
+    user = {**USER, "skills": "fail"}
+    resume = pipeline.generate_resume_sections(user, "JD", "sectiontest/m")
+    assert "## Skills\nfail" in resume
+    calls.clear()
+    pipeline.generate_resume_sections(user, "JD", "sectiontest/m")
+    assert calls == ["Skills"]
@@ -0,0 +1,38 @@
+from prompt_compaction import normalize
+
+
+def test_page_markers_removed_but_dates_and_numbers_kept():
+    text = "Senior Engineer\n06/2019\n08/2021\n42\nPage 2 of 3\n- Page 3 -\npage 4"
+    assert normalize(text).split("\n") == ["Senior Engineer", "06/2019", "08/2021", "42"]
+
+
+def test_long_resume_keeps_education_for_analysis():
+    from prompt_compaction import compact_for_model
+
+    experience = "\n".join(f"- Led project {i}: migrated pipelines and cut costs by {i}% across teams" for i in range(400))
+    resume = f"Jane Doe\nExperience\n{experience}\nEducation\nBSc Computer Science, 2015"
+    assert len(resume) > 25_000
+    assert "BSc Computer Science" in compact_for_model(resume, "resume", "gemini-2.5-flash").text
+
+
+def test_only_running_headers_and_footers_are_deduplicated():
+    from prompt_compaction import compact
+
+    shared = "- Cut cloud spend by 30% by rightsizing clusters and reserved capacity"
+    pages = [
+        "Jane Doe - Resume\nExperience\nAcme Corp, Data Engineer\n" + shared + "\njane@example.com",
+        "Jane Doe - Resume\nGlobex, Platform Engineer\n" + shared + "\n- Built the CI pipeline\njane@example.com",
+    ]
+    text = compact("\n\f\n".join(pages), "resume").text
+    assert text.count("Jane Doe - Resume") == 1
+    assert text.count("jane@example.com") == 1
+    assert text.count(shared) == 2
+    assert "\f" not in text
+
+
+def test_eeo_boilerplate_is_only_stripped_from_job_descriptions():
+    from prompt_compaction import compact
+
+    line = "Led gender identity inclusion training for 200 managers."
+    assert line in compact(line, "resume").text
+    assert line not in compact(line, "jd").text
@@ -0,0 +1,115 @@
+import contextvars
+
+import pytest
+
+import llm
+from provider_router import CLOSED, OPEN, ProviderRouter
+from rate_limiter import current_session, set_session
+
+
+def _in_session(session_id, fn):
+    def run():
+        set_session(session_id)
+        return fn()
+    return contextvars.copy_context().run(run)
+
+
+def test_hedged_attempt_sees_caller_session():
+    router = ProviderRouter()
+    seen = []
+
+    def invoke(model_name):
+        seen.append((model_name, current_session()))
+        if model_name == "a":
+            raise RuntimeError("503 unavailable")
+        return "ok"
+
+    assert _in_session("S1", lambda: router.call(["a", "b"], invoke, hedge=True)) == "ok"
+    assert seen == [("a", "S1"), ("b", "S1")]
+
+
+def test_hedged_query_llm_keeps_session():
+    seen = []
+
+    def provider(model_name, prompt, image_data, stream):
+        seen.append(current_session())
+        return "reply"
+
+    llm.register_provider("sessiontest/", provider)
+    try:
+        for hedge in (False, True):
+            _in_session("S1", lambda: llm.query_llm("hello", "sessiontest/m", use_cache=False, hedge=hedge))
+    finally:
+        llm.unregister_provider("sessiontest/")
+    assert seen == ["S1", "S1"]
+
+
+def test_falls_back_only_on_retryable_errors():
+    for error, falls_back in [(RuntimeError("404 models/x is not found"), True),
+                              (RuntimeError("429 resource exhausted"), True),
+                              (RuntimeError("502 bad gateway"), True),
+                              (TimeoutError("read timed out"), True),
+                              (RuntimeError("401 invalid API key"), False),
+                              (ValueError("400 bad request"), False)]:
+        router = ProviderRouter()
+        called = []
+
+        def invoke(model_name):
+            called.append(model_name)
+            if model_name == "a":
+                raise error
+            return "ok"
+
+        if falls_back:
+            assert router.call(["a", "b"], invoke) == "ok"
+            assert called == ["a", "b"]
+        else:
+            with pytest.raises(type(error)):
+                router.call(["a", "b"], invoke)
+            assert called == ["a"]
+            assert router.health("a").breaker.state == CLOSED
+
+
+def _stream_provider(model_name, prompt, image_data, stream):
+    def chunks():
+        if model_name.endswith("/broken"):
+            raise RuntimeError("503 unavailable")
+        yield "one "
+        if model_name.endswith("/flaky"):
+            raise RuntimeError("503 unavailable")
+        yield "two"
+    return chunks()
+
+
+def _with_stream_provider(monkeypatch, candidates):
+    router = ProviderRouter(failure_threshold=1)
+    monkeypatch.setattr(llm, "get_router", lambda: router)
+    monkeypatch.setattr(llm, "model_candidates", lambda model_name, image_data=None: candidates)
+    llm.register_provider("streamtest/", _stream_provider)
+    return router
+
+
+def test_stream_falls_back_before_first_chunk(monkeypatch):
+    router = _with_stream_provider(monkeypatch, ["streamtest/broken", "streamtest/ok"])
+    served = []
+    try:
+        text = "".join(llm.generate_with_fallback("streamtest/broken", "hi", stream=True, served=served))
+    finally:
+        llm.unregister_provider("streamtest/")
+    assert text == "one two"
+    assert served == ["streamtest/ok"]
+    assert router.health("streamtest/broken").breaker.state == OPEN
+
+
+def test_stream_failure_midway_is_recorded(monkeypatch):
+    router = _with_stream_provider(monkeypatch, ["streamtest/flaky", "streamtest/ok"])
+    try:
+        chunks = llm.generate_with_fallback("streamtest/flaky", "hi", stream=True)
+        assert next(chunks) == "one "
+        with pytest.raises(RuntimeError):
+            next(chunks)
+    finally:
+        llm.unregister_provider("streamtest/")
+    health = router.health("streamtest/flaky")
+    assert health.errors == 1
+    assert health.breaker.state == OPEN
@@ -0,0 +1,21 @@
+import pytest
+
+from rate_limiter import RateLimiter, RateLimitExceeded
+
+
+def test_set_rpm_limits_every_call_and_keeps_token_limit():
+    limiter = RateLimiter(limits={"gemini": (15, 1000)}, max_wait=0.05)
+    limiter.set_rpm("gemini", 2)
+    assert limiter.limits_for("gemini", "gemini-2.5-flash") == (2, 1000)
+    for _ in range(2):
+        limiter.call("gemini", "gemini-2.5-flash", 10, lambda: "ok")
+    with pytest.raises(RateLimitExceeded):
+        limiter.call("gemini", "gemini-2.5-flash", 10, lambda: "ok")
+
+
+def test_set_rpm_zero_is_unlimited():
+    limiter = RateLimiter(limits={"gemini": (1, 1000)}, max_wait=0.05)
+    limiter.call("gemini", "m", 10, lambda: "ok")
+    limiter.set_rpm("gemini", 0)
+    for _ in range(5):
+        assert limiter.call("gemini", "m", 10, lambda: "ok") == "ok"
@@ -0,0 +1,36 @@
+import threading
+
+from session_store import SessionStore
+
+
+def test_tabs_sharing_a_session_do_not_lose_messages(tmp_path):
+    # A tiny cap makes every few appends spill while other threads append
+    store = SessionStore(store_dir=tmp_path, max_session_bytes=2048, keep_recent=2)
+    session = store.get("a" * 32)
+
+    def tab(k):
+        for i in range(50):
+            session.messages.append({"role": "user", "content": f"tab{k}-{i:02d} " + "x" * 64})
+
+    threads = [threading.Thread(target=tab, args=(k,)) for k in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    contents = [m["content"].split()[0] for m in session.messages]
+    assert len(contents) == 200 and len(set(contents)) == 200
+    for k in range(4):
+        assert [c for c in contents if c.startswith(f"tab{k}-")] == [f"tab{k}-{i:02d}" for i in range(50)]
+    assert session.messages.spilled > 0
+
+
+def test_evicted_session_is_restored_from_disk(tmp_path):
+    store = SessionStore(store_dir=tmp_path, idle_seconds=0)
+    store.get("b" * 32).messages.append({"role": "user", "content": "hello"})
+    store.sweep()
+    assert store.stats()["sessions"] == 0
+    assert [m["content"] for m in store.get("b" * 32).messages] == ["hello"]
+
+
+def test_url_restore_is_off_by_default(tmp_path):
+    assert SessionStore(store_dir=tmp_path).url_restore is False
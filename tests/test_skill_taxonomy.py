@@ -0,0 +1,33 @@
+from skill_taxonomy import SkillTaxonomy
+
+SKILLS = ["Python", "SQL", "Docker", "Kubernetes", "Machine Learning",
+          "Experience with cloud platforms beyond basic AWS (e.g., IBM Cloud, Google Cloud)"]
+
+
+def test_compare_splits_jd_skills_by_resume():
+    taxonomy = SkillTaxonomy(SKILLS)
+    resume = "Built machine-learning pipelines in Python and SQL; deployed them with Docker."
+    jd = "We need Python, Kubernetes and Google Cloud experience. Machine learning is a plus."
+    assert taxonomy.compare(resume, jd) == {
+        "matched": ["Machine Learning", "Python"],
+        "missing": ["Google Cloud", "Kubernetes"],
+        "resume_only": ["Docker", "SQL"],
+    }
+
+
+def test_compare_needs_whole_words():
+    taxonomy = SkillTaxonomy(SKILLS)
+    result = taxonomy.compare("Pythonic scripts, Dockerfile reviews", "Python and Docker")
+    assert result["matched"] == []
+    assert result["missing"] == ["Docker", "Python"]
+
+
+def test_compare_many_matches_compare():
+    taxonomy = SkillTaxonomy(SKILLS)
+    resume = "Python, SQL and AWS"
+    jds = ["Python and Kubernetes", "IBM Cloud and SQL", ""]
+    screens, in_jds, in_resume = taxonomy.compare_many(resume, jds)
+    assert screens == [taxonomy.compare(resume, jd) for jd in jds]
+    assert in_jds.shape == (3, len(taxonomy))
+    assert not in_jds[2].any()
+    assert taxonomy.keys[in_resume].tolist() == ["python", "sql"]
@@ -0,0 +1,57 @@
+import pytest
+
+import llm
+from structured_output import StreamingJSONParser, generate_structured, repair_json
+
+SCHEMA = {
+    "type": "object",
+    "properties": {
+        "name": {"type": "string"},
+        "skills": {"type": "array", "items": {"type": "string"}},
+        "education": {"type": "string"},
+    },
+    "required": ["name", "skills", "education"],
+}
+
+
+@pytest.mark.parametrize("reply, expected", [
+    ('Here you go:\n```json\n{"name": "Jane", "skills": ["Python"],}\n```\nAnything else?',
+     {"name": "Jane", "skills": ["Python"]}),
+    ("{'name': 'Jane O\\'Neil', 'remote': True, 'manager': None}",
+     {"name": "Jane O'Neil", "remote": True, "manager": None}),
+    ('{name: "Jane", skills: ["SQL", "Python"]}', {"name": "Jane", "skills": ["SQL", "Python"]}),
+    ('{"summary": "line one\nline two"}', {"summary": "line one\nline two"}),
+    ('{"name": "Jane", "skills": ["SQL", "Pyth', {"name": "Jane", "skills": ["SQL"]}),
+    ('{"name": "Jane", "education": {"degree": "BSc"', {"name": "Jane", "education": {"degree": "BSc"}}),
+    ("I could not read the resume.", None),
+])
+def test_repair_json(reply, expected):
+    assert repair_json(reply) == expected
+
+
+def test_truncated_string_is_kept_only_while_streaming():
+    assert repair_json('{"name": "Ja', partial=True) == {"name": "Ja"}
+    assert repair_json('{"name": "Ja') is None
+    parser = StreamingJSONParser()
+    assert [parser.feed(c) for c in ['{"na', 'me": "Jane"', ', "skills": ["SQL"', "]}"]] == [
+        None, {"name": "Jane"}, {"name": "Jane", "skills": ["SQL"]}, {"name": "Jane", "skills": ["SQL"]}]
+
+
+def test_only_invalid_field_is_reasked():
+    prompts = []
+    replies = iter(["{'name': 'Jane', 'skills': 'Python, SQL', 'education': {}}",
+                    '```json\n{"education": "BSc Computer Science"}\n```'])
+
+    def provider(model_name, prompt, image_data, stream):
+        prompts.append(prompt)
+        return next(replies)
+
+    llm.register_provider("structtest/", provider)
+    try:
+        result = generate_structured("Parse this resume.", "structtest/m", SCHEMA)
+    finally:
+        llm.unregister_provider("structtest/")
+    assert result.data == {"name": "Jane", "skills": ["Python", "SQL"], "education": "BSc Computer Science"}
+    assert result.invalid == [] and result.reasks == 1 and result.error is None
+    assert "invalid values for: education" in prompts[1]
+    assert '"education"' in prompts[1] and '"name"' not in prompts[1] and '"skills"' not in prompts[1]
@@ -0,0 +1,56 @@
+import re
+
+import pytest
+
+import telemetry
+
+SAMPLE_RE = re.compile(r'^[a-zA-Z_:][a-zA-Z0-9_:]*(\{[a-zA-Z_][a-zA-Z0-9_]*="[^"]*"(,[a-zA-Z_][a-zA-Z0-9_]*="[^"]*")*\})? \S+$')
+
+
+def test_trace_records_spans_and_errors():
+    with pytest.raises(ValueError):
+        with telemetry.trace("test_request", mode="fast") as t:
+            with telemetry.span("test_extract") as s:
+                s["pages"] = 3
+            telemetry.annotate(resumes=1)
+            with telemetry.span("test_llm"):
+                raise ValueError("boom")
+    record = telemetry.recent_traces(1)[0]
+    assert record["trace_id"] == t.id
+    assert record["name"] == "test_request"
+    assert record["attrs"] == {"mode": "fast", "resumes": 1}
+    assert record["error"] == "ValueError: boom"
+    extract, llm = record["spans"]
+    assert extract["name"] == "test_extract" and extract["pages"] == 3 and "error" not in extract
+    assert llm["error"] == "ValueError: boom"
+    assert telemetry.current_trace() is None
+
+
+def test_span_outside_trace_only_updates_metrics():
+    before = len(telemetry.recent_traces())
+    with telemetry.span("test_untraced"):
+        pass
+    assert len(telemetry.recent_traces()) == before
+    assert 'career_stage_total{stage="test_untraced",status="ok"} 1' in telemetry.render_prometheus()
+
+
+def test_prometheus_text_format():
+    telemetry.inc("test_calls_total", provider="gemini", cache_hit=True)
+    telemetry.inc("test_calls_total", 2, provider="gemini", cache_hit=True)
+    for value in (0.02, 0.3, 100):
+        telemetry.observe("test_duration_seconds", value, stage='say "hi"')
+    text = telemetry.render_prometheus()
+    lines = text.splitlines()
+    assert text.endswith("\n")
+    assert all(line.startswith("# TYPE ") or SAMPLE_RE.match(line) for line in lines)
+    assert "# TYPE test_calls_total counter" in lines
+    assert 'test_calls_total{cache_hit="True",provider="gemini"} 3' in lines
+    assert "# TYPE test_duration_seconds histogram" in lines
+    samples = [line for line in lines if line.startswith("test_duration_seconds")]
+    assert "test_duration_seconds_bucket{stage=\"say 'hi'\",le=\"0.01\"} 0" in samples
+    assert "test_duration_seconds_bucket{stage=\"say 'hi'\",le=\"0.05\"} 1" in samples
+    assert "test_duration_seconds_bucket{stage=\"say 'hi'\",le=\"0.5\"} 2" in samples
+    assert "test_duration_seconds_bucket{stage=\"say 'hi'\",le=\"60\"} 2" in samples
+    assert "test_duration_seconds_bucket{stage=\"say 'hi'\",le=\"+Inf\"} 3" in samples
+    assert "test_duration_seconds_sum{stage=\"say 'hi'\"} 100.320000" in samples
+    assert "test_duration_seconds_count{stage=\"say 'hi'\"} 3" in samples